@@ -0,0 +1,32 @@
+from passlib.context import CryptContext
+
+from api.entities.auth import AuthUser
+
+
+def test_document_round_trip():
+    user = AuthUser(user_id="my_id", username="my_username", password="my_hash")
+    document = user.to_document()
+    assert document == {
+        "user_id": "my_id",
+        "username": "my_username",
+        "password": "my_hash",
+    }
+    restored = AuthUser.from_document(document)
+    assert restored.user_id == "my_id"
+    assert restored.username == "my_username"
+    assert restored.password == "my_hash"
+    assert not hasattr(restored, "__dict__")
+
+
+def test_structural_equality():
+    user = AuthUser(user_id="my_id", username="my_username", password="my_hash")
+    assert user == AuthUser(user_id="my_id", username="my_username", password="my_hash")
+    assert user != AuthUser(user_id="my_id", username="my_username", password="other")
+    assert user != "my_username"
+
+
+def test_verify_password():
+    hashed = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4).hash("my_password")
+    user = AuthUser(user_id="my_id", username="my_username", password=hashed)
+    assert user.verify_password("my_password")
+    assert not user.verify_password("not_my_password")
@@ -0,0 +1,64 @@
+from datetime import datetime
+
+import pytest
+
+from api.entities.movie import Movie
+
+
+def test_document_round_trip():
+    movie = Movie(
+        movie_id="my_id",
+        title="my_title",
+        description="my_description",
+        released_year=2020,
+        watched=True,
+        version=3,
+        updated_at=datetime(2023, 5, 1),
+    )
+    assert movie.to_document() == {
+        "id": "my_id",
+        "title": "my_title",
+        "description": "my_description",
+        "released_year": 2020,
+        "watched": True,
+    }
+    restored = Movie.from_document(
+        {**movie.to_document(), "version": 3, "updated_at": datetime(2023, 5, 1)}
+    )
+    assert restored == movie
+    assert restored.version == 3
+    assert restored.updated_at == datetime(2023, 5, 1)
+
+
+def test_from_document_defaults():
+    movie = Movie.from_document(
+        {
+            "id": "my_id",
+            "title": "my_title",
+            "description": "my_description",
+            "released_year": 2020,
+        }
+    )
+    assert movie.watched is False
+    assert movie.version == 1
+    assert movie.updated_at is None
+
+
+def test_from_document_missing_fields():
+    movie = Movie.from_document({"id": "my_id"})
+    assert movie.id == "my_id"
+    assert movie.title is None
+    assert movie.description is None
+    assert movie.released_year is None
+
+
+def test_no_instance_dict():
+    movie = Movie(
+        movie_id="my_id",
+        title="my_title",
+        description="my_description",
+        released_year=2020,
+    )
+    assert not hasattr(movie, "__dict__")
+    with pytest.raises(AttributeError):
+        movie.rating = 5
@@ -2,6 +2,7 @@ import asyncio
 import secrets
 
 import pytest
+from redis.asyncio import Redis
 from starlette.testclient import TestClient
 
 from api.api import create_app
@@ -9,6 +10,12 @@ from api.repository.movie.memory import MemoryMovieRepository
 from api.repository.movie.mongo import MongoMovieRepository
 from api.repository.auth.memory import MemoryAuthRepository
 from api.repository.auth.mongo import MongoAuthRepository
+from api.repository.revocation.memory import MemoryTokenRevocationRepository
+from api.repository.revocation.redis import RedisTokenRevocationRepository
+from api.repository.registry import RepositoryRegistry
+from api.settings.auth import jwt_settings_instance
+from api.utils.auth import signing_key, token_cache
+from api.utils.cache import principal_cache
 
 
 @pytest.fixture
@@ -16,6 +23,30 @@ def test_client():
     return TestClient(app=create_app())
 
 
+@pytest.fixture
+def memory_test_client(monkeypatch):
+    monkeypatch.setenv("SECRET_KEY", secrets.token_hex(16))
+    monkeypatch.setenv("ALGORITHM", "HS256")
+    monkeypatch.setenv("ACCESS_TOKEN_EXPIRE_MINUTES", "15")
+    monkeypatch.setenv("REFRESH_TOKEN_EXPIRE_MINUTES", "60")
+    # The JWT settings, key, verified tokens and known principals are process
+    # wide singletons
+    jwt_settings_instance.cache_clear()
+    signing_key.cache_clear()
+    token_cache().clear()
+    principal_cache().clear()
+    with TestClient(app=create_app(repositories=RepositoryRegistry.memory())) as client:
+        yield client
+
+
+@pytest.fixture
+def auth_headers(memory_test_client):
+    credentials = {"username": "my_username", "password": "my_password"}
+    memory_test_client.post("/api/v1/auth/register", data=credentials)
+    response = memory_test_client.post("/api/v1/auth/login", data=credentials)
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
 @pytest.fixture
 def memory_movie_repo_fixture():
     repo = MemoryMovieRepository()
@@ -52,3 +83,20 @@ def mongo_auth_repo_fixture():
 
     loop = asyncio.get_event_loop()
     loop.run_until_complete(repo._client.drop_database(random_database_name))
+
+
+@pytest.fixture
+def memory_revocation_repo_fixture():
+    repo = MemoryTokenRevocationRepository()
+    yield repo
+    del repo
+
+
+@pytest.fixture
+def redis_revocation_repo_fixture():
+    # Keys are namespaced per test and expire with the tokens, no cleanup needed
+    repo = RedisTokenRevocationRepository(
+        client=Redis(host="127.0.0.1", port=6379, db=0),
+        key_prefix=f"test_token_revoked:{secrets.token_hex(5)}:",
+    )
+    yield repo
@@ -0,0 +1,61 @@
+import pytest
+from jose import jwt
+
+from api._tests.fixture import auth_headers, memory_test_client
+from api.settings.auth import JWTSettings
+from api.utils.auth import create_refresh_token, signing_key
+
+
+def test_logout(memory_test_client, auth_headers):
+    refresh_token = create_refresh_token(username="my_username")
+
+    response = memory_test_client.post(
+        "/api/v1/auth/logout",
+        data={"refresh_token": refresh_token},
+        headers=auth_headers,
+    )
+    assert response.status_code == 200
+    response = memory_test_client.get("/api/v1/movies/my_id", headers=auth_headers)
+    assert response.status_code == 401
+
+
+def test_logout_invalid_refresh_token(memory_test_client, auth_headers):
+    response = memory_test_client.post(
+        "/api/v1/auth/logout",
+        data={"refresh_token": "not a token"},
+        headers=auth_headers,
+    )
+    assert response.status_code == 401
+    assert response.json() == {"message": "Invalid token"}
+
+
+def test_logout_refresh_token_without_expiry(memory_test_client, auth_headers):
+    refresh_token = jwt.encode(
+        {"sub": "my_username"}, signing_key(), JWTSettings.get_settings().ALGORITHM
+    )
+
+    response = memory_test_client.post(
+        "/api/v1/auth/logout",
+        data={"refresh_token": refresh_token},
+        headers=auth_headers,
+    )
+    assert response.status_code == 200
+    revocations = memory_test_client.app.state.repositories.revocations
+    assert memory_test_client.portal.call(revocations.is_revoked, refresh_token)
+
+
+def test_logout_backend_failure_is_not_unauthorized(
+    memory_test_client, auth_headers, monkeypatch
+):
+    async def revoke_many(tokens):
+        raise ConnectionError("revocation store unavailable")
+
+    revocations = memory_test_client.app.state.repositories.revocations
+    monkeypatch.setattr(revocations, "revoke_many", revoke_many)
+
+    with pytest.raises(ConnectionError):
+        memory_test_client.post(
+            "/api/v1/auth/logout",
+            data={"refresh_token": create_refresh_token(username="my_username")},
+            headers=auth_headers,
+        )
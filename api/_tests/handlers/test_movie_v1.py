@@ -0,0 +1,299 @@
+import json
+
+from api._tests.fixture import auth_headers, memory_test_client
+from api.dto.movie import MovieResponse
+from api.entities.movie import Movie
+from api.handlers.movie_v1 import movie_payload
+
+
+def create_movies(client, headers, count, title="my_title"):
+    response = client.post(
+        "/api/v1/movies/bulk",
+        json={
+            "movies": [
+                {
+                    "title": title,
+                    "description": "my_description",
+                    "released_year": 2020,
+                }
+            ]
+            * count
+        },
+        headers=headers,
+    )
+    return sorted(result["id"] for result in response.json()["results"])
+
+
+def test_create_and_get_by_id(memory_test_client, auth_headers):
+    response = memory_test_client.post(
+        "/api/v1/movies/",
+        json={
+            "title": "my_title",
+            "description": "my_description",
+            "released_year": 2020,
+        },
+        headers=auth_headers,
+    )
+    assert response.status_code == 201
+    movie_id = response.json()["id"]
+
+    response = memory_test_client.get(
+        f"/api/v1/movies/{movie_id}", headers=auth_headers
+    )
+    assert response.status_code == 200
+    assert response.json() == {
+        "id": movie_id,
+        "title": "my_title",
+        "description": "my_description",
+        "released_year": 2020,
+        "watched": False,
+    }
+
+
+def test_get_by_title_requires_token(memory_test_client):
+    response = memory_test_client.get("/api/v1/movies/", params={"title": "my_title"})
+    assert response.status_code == 401
+
+
+def test_movie_routes_require_token(memory_test_client):
+    assert memory_test_client.get("/api/v1/movies/my_id").status_code == 401
+    assert memory_test_client.delete("/api/v1/movies/my_id").status_code == 401
+    response = memory_test_client.post("/api/v1/movies/bulk", json={"movies": []})
+    assert response.status_code == 401
+    # CORS preflight requests carry no token
+    response = memory_test_client.options(
+        "/api/v1/movies/my_id",
+        headers={
+            "Origin": "http://example.com",
+            "Access-Control-Request-Method": "GET",
+        },
+    )
+    assert response.status_code == 200
+
+
+def test_get_by_title_cursor(memory_test_client, auth_headers):
+    movie_ids = create_movies(memory_test_client, auth_headers, 3)
+
+    response = memory_test_client.get(
+        "/api/v1/movies/",
+        params={"title": "my_title", "limit": 2},
+        headers=auth_headers,
+    )
+    assert [movie["id"] for movie in response.json()] == movie_ids[:2]
+
+    response = memory_test_client.get(
+        "/api/v1/movies/",
+        params={
+            "title": "my_title",
+            "limit": 2,
+            "cursor": response.headers["X-Next-Cursor"],
+        },
+        headers=auth_headers,
+    )
+    assert [movie["id"] for movie in response.json()] == movie_ids[2:]
+    assert "X-Next-Cursor" not in response.headers
+
+
+def test_get_by_title_invalid_cursor(memory_test_client, auth_headers):
+    response = memory_test_client.get(
+        "/api/v1/movies/",
+        params={"title": "my_title", "cursor": "not a cursor"},
+        headers=auth_headers,
+    )
+    assert response.status_code == 400
+
+
+def test_get_by_title_ndjson(memory_test_client, auth_headers):
+    movie_ids = create_movies(memory_test_client, auth_headers, 3)
+
+    response = memory_test_client.get(
+        "/api/v1/movies/",
+        params={"title": "my_title"},
+        headers={**auth_headers, "Accept": "application/x-ndjson"},
+    )
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = response.text.splitlines()
+    assert [json.loads(line)["id"] for line in lines] == movie_ids
+
+
+def test_get_by_id_not_modified(memory_test_client, auth_headers):
+    movie_id = create_movies(memory_test_client, auth_headers, 1)[0]
+
+    response = memory_test_client.get(
+        f"/api/v1/movies/{movie_id}", headers=auth_headers
+    )
+    etag = response.headers["etag"]
+    assert "last-modified" in response.headers
+
+    response = memory_test_client.get(
+        f"/api/v1/movies/{movie_id}", headers={**auth_headers, "If-None-Match": etag}
+    )
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+
+    memory_test_client.patch(
+        f"/api/v1/movies/{movie_id}", json={"watched": True}, headers=auth_headers
+    )
+    response = memory_test_client.get(
+        f"/api/v1/movies/{movie_id}", headers={**auth_headers, "If-None-Match": etag}
+    )
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert response.json()["watched"] is True
+
+
+def test_get_by_title_not_modified(memory_test_client, auth_headers):
+    create_movies(memory_test_client, auth_headers, 2)
+
+    response = memory_test_client.get(
+        "/api/v1/movies/", params={"title": "my_title"}, headers=auth_headers
+    )
+    etag = response.headers["etag"]
+
+    response = memory_test_client.get(
+        "/api/v1/movies/",
+        params={"title": "my_title"},
+        headers={**auth_headers, "If-None-Match": etag},
+    )
+    assert response.status_code == 304
+
+    create_movies(memory_test_client, auth_headers, 1)
+    response = memory_test_client.get(
+        "/api/v1/movies/",
+        params={"title": "my_title"},
+        headers={**auth_headers, "If-None-Match": etag},
+    )
+    assert response.status_code == 200
+    assert len(response.json()) == 3
+
+
+def test_get_by_title_not_modified_after_delete(memory_test_client, auth_headers):
+    movie_ids = create_movies(memory_test_client, auth_headers, 2)
+
+    response = memory_test_client.get(
+        "/api/v1/movies/", params={"title": "my_title"}, headers=auth_headers
+    )
+    etag = response.headers["etag"]
+    # Lists are validated by their ETag only
+    assert "last-modified" not in response.headers
+
+    memory_test_client.delete(f"/api/v1/movies/{movie_ids[0]}", headers=auth_headers)
+    for conditional in (
+        {"If-None-Match": etag},
+        {"If-Modified-Since": "Fri, 01 Jan 2100 00:00:00 GMT"},
+    ):
+        response = memory_test_client.get(
+            "/api/v1/movies/",
+            params={"title": "my_title"},
+            headers={**auth_headers, **conditional},
+        )
+        assert response.status_code == 200
+        assert [movie["id"] for movie in response.json()] == movie_ids[1:]
+
+
+def test_movie_payload_matches_response_model():
+    movie = Movie(
+        movie_id="my_id",
+        title="my_title",
+        description="my_description",
+        released_year=2020,
+        watched=True,
+    )
+    payload = movie_payload(movie)
+    assert payload == MovieResponse(**payload).dict()
+
+
+def test_search(memory_test_client, auth_headers):
+    movie_ids = create_movies(memory_test_client, auth_headers, 3)
+    create_movies(memory_test_client, auth_headers, 2, title="other_title")
+
+    response = memory_test_client.get(
+        "/api/v1/movies/search",
+        params={"title": "my_title", "released_year": 2020, "limit": 2},
+        headers=auth_headers,
+    )
+    assert response.status_code == 200
+    assert [movie["id"] for movie in response.json()] == movie_ids[:2]
+
+    response = memory_test_client.get(
+        "/api/v1/movies/search",
+        params={
+            "title": "my_title",
+            "released_year": 2020,
+            "limit": 2,
+            "cursor": response.headers["X-Next-Cursor"],
+        },
+        headers=auth_headers,
+    )
+    assert [movie["id"] for movie in response.json()] == movie_ids[2:]
+
+
+def test_search_invalid_cursor(memory_test_client, auth_headers):
+    create_movies(memory_test_client, auth_headers, 2)
+    response = memory_test_client.get(
+        "/api/v1/movies/search",
+        params={"limit": 1},
+        headers=auth_headers,
+    )
+    # A cursor cannot resume a page with another sort
+    response = memory_test_client.get(
+        "/api/v1/movies/search",
+        params={"sort": "released_year", "cursor": response.headers["X-Next-Cursor"]},
+        headers=auth_headers,
+    )
+    assert response.status_code == 400
+
+
+def test_text_search(memory_test_client, auth_headers):
+    movie_ids = create_movies(memory_test_client, auth_headers, 2)
+    create_movies(memory_test_client, auth_headers, 1, title="other_title")
+
+    response = memory_test_client.get(
+        "/api/v1/movies/search/text", params={"q": "my_ti"}, headers=auth_headers
+    )
+    assert response.status_code == 200
+    assert [movie["id"] for movie in response.json()] == movie_ids
+
+
+def test_batch_get(memory_test_client, auth_headers):
+    movie_ids = create_movies(memory_test_client, auth_headers, 2)
+
+    response = memory_test_client.post(
+        "/api/v1/movies/batch-get",
+        json={"ids": [movie_ids[1], "missing_id", movie_ids[0], movie_ids[1]]},
+        headers=auth_headers,
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert [movie["id"] for movie in body["movies"]] == [movie_ids[1], movie_ids[0]]
+    assert body["missing"] == ["missing_id"]
+
+
+def test_bulk_duplicate_ids(memory_test_client, auth_headers):
+    movie_id = create_movies(memory_test_client, auth_headers, 1)[0]
+
+    response = memory_test_client.request(
+        "DELETE",
+        "/api/v1/movies/bulk",
+        json={"ids": [movie_id, movie_id]},
+        headers=auth_headers,
+    )
+    assert response.status_code == 400
+    response = memory_test_client.patch(
+        "/api/v1/movies/bulk",
+        json={
+            "movies": [
+                {"id": movie_id, "title": "first_title"},
+                {"id": movie_id, "title": "second_title"},
+            ]
+        },
+        headers=auth_headers,
+    )
+    assert response.status_code == 400
+
+    # Nothing was applied
+    response = memory_test_client.get(
+        f"/api/v1/movies/{movie_id}", headers=auth_headers
+    )
+    assert response.json()["title"] == "my_title"
@@ -0,0 +1,40 @@
+from starlette_prometheus.middleware import REQUESTS, RESPONSES
+
+from api._tests.fixture import auth_headers, memory_test_client
+
+
+def sample(metric, **labels) -> float:
+    return metric.labels(**labels)._value.get()
+
+
+def test_rejects_missing_token(memory_test_client):
+    response = memory_test_client.get("/api/v1/movies/my_id")
+    assert response.status_code == 401
+    assert response.json() == {"message": "Invalid Authorization header"}
+
+
+def test_rejects_invalid_token(memory_test_client):
+    response = memory_test_client.get(
+        "/api/v1/movies/my_id", headers={"Authorization": "Bearer not_a_token"}
+    )
+    assert response.status_code == 401
+    assert response.json() == {"message": "Invalid token"}
+
+
+def test_accepts_valid_token(memory_test_client, auth_headers):
+    response = memory_test_client.get("/api/v1/movies/my_id", headers=auth_headers)
+    assert response.status_code == 404
+
+
+def test_records_request_metrics(memory_test_client, auth_headers):
+    labels = {"method": "GET", "path_template": "/api/v1/movies/{movie_id}"}
+    requests = sample(REQUESTS, **labels)
+    not_found = sample(RESPONSES, status_code=404, **labels)
+    unauthorized = sample(RESPONSES, status_code=401, **labels)
+
+    memory_test_client.get("/api/v1/movies/my_id", headers=auth_headers)
+    memory_test_client.get("/api/v1/movies/my_id")
+
+    assert sample(REQUESTS, **labels) == requests + 2
+    assert sample(RESPONSES, status_code=404, **labels) == not_found + 1
+    assert sample(RESPONSES, status_code=401, **labels) == unauthorized + 1
@@ -0,0 +1,57 @@
+import pytest
+
+from api.middleware.protected_routes import (
+    PROTECTED_ROUTES,
+    ProtectedRoute,
+    RouteMatcher,
+)
+
+
+@pytest.fixture
+def matcher():
+    return RouteMatcher(
+        [
+            ProtectedRoute("/api/v1/movies", prefix=True),
+            ProtectedRoute("/api/v1/users/{user_id}", methods=frozenset({"DELETE"})),
+            ProtectedRoute("/api/v1/users/{user_id}/watchlist"),
+            ProtectedRoute("/api/v1/users/me", methods=frozenset({"GET"})),
+            ProtectedRoute("/api/v1/auth/logout"),
+        ]
+    )
+
+
+@pytest.mark.parametrize(
+    "method, path, expected",
+    [
+        pytest.param("GET", "/api/v1/movies", True, id="prefix_root"),
+        pytest.param("GET", "/api/v1/movies/", True, id="prefix_slash"),
+        pytest.param("PATCH", "/api/v1/movies/my_id", True, id="prefix_child"),
+        pytest.param("GET", "/api/v1/moviesx", False, id="prefix_segment"),
+        pytest.param("OPTIONS", "/api/v1/movies/my_id", False, id="preflight"),
+        pytest.param("DELETE", "/api/v1/users/my_id", True, id="template"),
+        pytest.param("GET", "/api/v1/users/my_id", False, id="template_method"),
+        pytest.param("DELETE", "/api/v1/users/", False, id="template_empty"),
+        pytest.param("DELETE", "/api/v1/users/my_id/x", False, id="template_depth"),
+        pytest.param("POST", "/api/v1/users/my_id/watchlist", True, id="nested"),
+        pytest.param("GET", "/api/v1/users/me", True, id="literal"),
+        pytest.param("HEAD", "/api/v1/users/me", True, id="head_as_get"),
+        # Falls back to the template when the literal does not match
+        pytest.param("DELETE", "/api/v1/users/me", True, id="backtrack"),
+        pytest.param("POST", "/api/v1/auth/logout", True, id="exact"),
+        pytest.param("POST", "/api/v1/auth/logout/", False, id="exact_slash"),
+        pytest.param("POST", "/api/v1/auth/login", False, id="unprotected"),
+        pytest.param("GET", "/", False, id="root"),
+    ],
+)
+def test_matches(matcher, method, path, expected):
+    assert matcher.matches(method, path) is expected
+
+
+def test_protected_routes_table():
+    matcher = RouteMatcher(PROTECTED_ROUTES)
+    assert matcher.matches("GET", "/api/v1/movies/my_id")
+    assert matcher.matches("POST", "/api/v1/movies/bulk")
+    assert matcher.matches("POST", "/api/v1/auth/refresh")
+    assert not matcher.matches("POST", "/api/v1/auth/login")
+    assert not matcher.matches("POST", "/api/v1/auth/register")
+    assert not matcher.matches("GET", "/metrics")
@@ -4,6 +4,7 @@ from api._tests.fixture import memory_auth_repo_fixture
 from api.entities.auth import AuthUser
 from api.repository.auth.abstractions import RepositoryException
 from api.repository.auth.memory import MemoryAuthRepository
+from api.utils.cache import principal_cache
 
 
 @pytest.mark.asyncio
@@ -54,7 +55,13 @@ async def test_get_user(
     for authuser in authusers_seed:
         await memory_auth_repo_fixture.create(authuser)
     authuser = await memory_auth_repo_fixture.get_user(username=username)
-    assert authuser == expected_result
+    if expected_result is None:
+        assert authuser is None
+    else:
+        # The stored password is a hash, checked against the plain seed
+        assert authuser.user_id == expected_result.user_id
+        assert authuser.username == expected_result.username
+        assert authuser.verify_password(expected_result.password)
 
 
 @pytest.mark.parametrize(
@@ -182,3 +189,43 @@ async def test_update_fail(
             authuser=authuser,
             update_parameters=update_parameters,
         )
+
+
+@pytest.mark.asyncio
+async def test_delete_invalidates_principal_cache(memory_auth_repo_fixture):
+    await memory_auth_repo_fixture.create(
+        AuthUser(user_id="test_id", username="my_username", password="my_password")
+    )
+    principals = principal_cache()
+    principals.set("my_username", True)
+
+    await memory_auth_repo_fixture.delete(username="my_username")
+    assert principals.get("my_username") is None
+
+
+@pytest.mark.asyncio
+async def test_update_username_keeps_index(memory_auth_repo_fixture):
+    await memory_auth_repo_fixture.create(
+        AuthUser(user_id="test_id", username="my_username", password="my_password")
+    )
+    await memory_auth_repo_fixture.create(
+        AuthUser(user_id="other_id", username="other_username", password="password")
+    )
+
+    with pytest.raises(RepositoryException):
+        await memory_auth_repo_fixture.update(
+            authuser=AuthUser(
+                user_id="test_id", username="my_username", password="my_password"
+            ),
+            update_parameters={"username": "other_username"},
+        )
+
+    await memory_auth_repo_fixture.update(
+        authuser=AuthUser(
+            user_id="test_id", username="my_username", password="my_password"
+        ),
+        update_parameters={"username": "new_username"},
+    )
+    assert await memory_auth_repo_fixture.get_user(username="my_username") is None
+    authuser = await memory_auth_repo_fixture.get_user(username="new_username")
+    assert authuser.user_id == "test_id"
@@ -13,11 +13,14 @@ async def test_create(mongo_auth_repo_fixture):
     )
 
     authuser: AuthUser = await mongo_auth_repo_fixture.get_user(username="test")
-    assert authuser == AuthUser(user_id="test_id", username="test", password="test123")
+    assert authuser.user_id == "test_id"
+    assert authuser.username == "test"
+    assert authuser.verify_password("test123")
 
 
 @pytest.mark.asyncio
 async def test_create_fail(mongo_auth_repo_fixture):
+    await mongo_auth_repo_fixture.initialize()
     await mongo_auth_repo_fixture.create(
         authuser=AuthUser(user_id="test_id", username="test", password="test123")
     )
@@ -59,7 +62,13 @@ async def test_get_user(
         await mongo_auth_repo_fixture.create(authuser)
 
     authuser = await mongo_auth_repo_fixture.get_user(username=username)
-    assert authuser == expected_result
+    if expected_result is None:
+        assert authuser is None
+    else:
+        # The stored password is a hash, checked against the plain seed
+        assert authuser.user_id == expected_result.user_id
+        assert authuser.username == expected_result.username
+        assert authuser.verify_password(expected_result.password)
 
 
 @pytest.mark.parametrize(
@@ -187,3 +196,10 @@ async def test_update_fail(
             authuser=authuser,
             update_parameters=update_parameters,
         )
+
+
+@pytest.mark.asyncio
+async def test_initialize(mongo_auth_repo_fixture):
+    report = await mongo_auth_repo_fixture.initialize()
+    assert report["username_1"] == [("username", 1)]
+    assert report["user_id_1"] == [("user_id", 1)]
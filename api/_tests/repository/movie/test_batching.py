@@ -0,0 +1,122 @@
+import asyncio
+import gc
+
+import pytest
+
+from api.entities.movie import Movie
+from api.repository.movie.batching import BatchingMovieRepository
+from api.repository.movie.memory import MemoryMovieRepository
+
+
+class RecordingMovieRepository(MemoryMovieRepository):
+    """
+    Memory repository recording the ids of every get_many call
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.batches = []
+        self.fail = False
+
+    async def get_many(self, movie_ids):
+        self.batches.append(sorted(movie_ids))
+        if self.fail:
+            raise RuntimeError("backend down")
+        return await super().get_many(movie_ids)
+
+
+@pytest.fixture
+def batching_movie_repo_fixture():
+    return BatchingMovieRepository(RecordingMovieRepository(), window=0.005, max_size=3)
+
+
+async def seed(repo, count):
+    for index in range(count):
+        await repo.create(
+            Movie(
+                movie_id=f"my_id_{index}",
+                title="my_title",
+                description="my_description",
+                released_year=2020,
+            )
+        )
+
+
+@pytest.mark.asyncio
+async def test_concurrent_reads_share_a_batch(batching_movie_repo_fixture):
+    await seed(batching_movie_repo_fixture, 2)
+
+    movies = await asyncio.gather(
+        batching_movie_repo_fixture.get_by_id("my_id_0"),
+        batching_movie_repo_fixture.get_by_id("my_id_1"),
+        batching_movie_repo_fixture.get_by_id("my_id_0"),
+        batching_movie_repo_fixture.get_by_id("missing_id"),
+    )
+    assert [movie.id if movie else None for movie in movies] == [
+        "my_id_0",
+        "my_id_1",
+        "my_id_0",
+        None,
+    ]
+    # Deduplicated into a single read
+    assert batching_movie_repo_fixture._repository.batches == [
+        ["missing_id", "my_id_0", "my_id_1"]
+    ]
+
+
+@pytest.mark.asyncio
+async def test_full_batch_is_sent_early(batching_movie_repo_fixture):
+    await seed(batching_movie_repo_fixture, 4)
+
+    movies = await asyncio.gather(
+        *(batching_movie_repo_fixture.get_by_id(f"my_id_{index}") for index in range(4))
+    )
+    assert [movie.id for movie in movies] == [f"my_id_{index}" for index in range(4)]
+    assert batching_movie_repo_fixture._repository.batches == [
+        ["my_id_0", "my_id_1", "my_id_2"],
+        ["my_id_3"],
+    ]
+
+
+@pytest.mark.asyncio
+async def test_errors_reach_every_caller(batching_movie_repo_fixture):
+    batching_movie_repo_fixture._repository.fail = True
+
+    results = await asyncio.gather(
+        batching_movie_repo_fixture.get_by_id("my_id_0"),
+        batching_movie_repo_fixture.get_by_id("my_id_1"),
+        return_exceptions=True,
+    )
+    assert all(isinstance(result, RuntimeError) for result in results)
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_cancel_others(batching_movie_repo_fixture):
+    await seed(batching_movie_repo_fixture, 1)
+
+    first = asyncio.ensure_future(batching_movie_repo_fixture.get_by_id("my_id_0"))
+    second = asyncio.ensure_future(batching_movie_repo_fixture.get_by_id("my_id_0"))
+    await asyncio.sleep(0)
+    first.cancel()
+
+    assert (await second).id == "my_id_0"
+
+
+@pytest.mark.asyncio
+async def test_error_of_cancelled_caller_is_retrieved(batching_movie_repo_fixture):
+    batching_movie_repo_fixture._repository.fail = True
+    loop = asyncio.get_running_loop()
+    errors = []
+    loop.set_exception_handler(lambda loop, context: errors.append(context))
+
+    read = asyncio.ensure_future(batching_movie_repo_fixture.get_by_id("my_id_0"))
+    await asyncio.sleep(0)
+    read.cancel()
+    # The batch fails after its only caller is gone
+    await asyncio.sleep(0.02)
+    del read
+    gc.collect()
+    loop.set_exception_handler(None)
+
+    assert batching_movie_repo_fixture._repository.batches == [["my_id_0"]]
+    assert errors == []
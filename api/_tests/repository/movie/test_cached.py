@@ -0,0 +1,116 @@
+import asyncio
+
+import pytest
+
+from api.entities.movie import Movie
+from api.repository.movie.cached import CachedMovieRepository
+from api.repository.movie.memory import MemoryMovieRepository
+
+
+class CountingMovieRepository(MemoryMovieRepository):
+    """
+    Memory repository counting, and slowing down, the reads by id
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.reads = 0
+
+    async def get_by_id(self, movie_id: str):
+        self.reads += 1
+        await asyncio.sleep(0.01)
+        return await super().get_by_id(movie_id)
+
+
+@pytest.fixture
+def cached_movie_repo_fixture():
+    return CachedMovieRepository(CountingMovieRepository())
+
+
+def my_movie(title: str = "my_title") -> Movie:
+    return Movie(
+        movie_id="my_id",
+        title=title,
+        description="my_description",
+        released_year=2020,
+        watched=False,
+    )
+
+
+@pytest.mark.asyncio
+async def test_get_by_id_hit(cached_movie_repo_fixture):
+    await cached_movie_repo_fixture.create(my_movie())
+
+    assert await cached_movie_repo_fixture.get_by_id("my_id") == my_movie()
+    assert await cached_movie_repo_fixture.get_by_id("my_id") == my_movie()
+    assert cached_movie_repo_fixture._repository.reads == 1
+
+
+@pytest.mark.asyncio
+async def test_get_by_id_single_flight(cached_movie_repo_fixture):
+    await cached_movie_repo_fixture.create(my_movie())
+
+    movies = await asyncio.gather(
+        *(cached_movie_repo_fixture.get_by_id("my_id") for _ in range(10))
+    )
+    assert movies == [my_movie()] * 10
+    assert cached_movie_repo_fixture._repository.reads == 1
+
+
+@pytest.mark.asyncio
+async def test_get_by_id_missing_not_cached(cached_movie_repo_fixture):
+    assert await cached_movie_repo_fixture.get_by_id("my_id") is None
+    await cached_movie_repo_fixture.create(my_movie())
+    assert await cached_movie_repo_fixture.get_by_id("my_id") == my_movie()
+
+
+@pytest.mark.asyncio
+async def test_update_invalidates(cached_movie_repo_fixture):
+    await cached_movie_repo_fixture.create(my_movie())
+    await cached_movie_repo_fixture.get_by_id("my_id")
+
+    await cached_movie_repo_fixture.update(
+        movie_id="my_id", update_parameters={"title": "new_title"}
+    )
+    assert await cached_movie_repo_fixture.get_by_id("my_id") == my_movie(
+        title="new_title"
+    )
+    assert cached_movie_repo_fixture._repository.reads == 2
+
+
+@pytest.mark.asyncio
+async def test_delete_invalidates(cached_movie_repo_fixture):
+    await cached_movie_repo_fixture.create(my_movie())
+    await cached_movie_repo_fixture.get_by_id("my_id")
+
+    await cached_movie_repo_fixture.delete(movie_id="my_id")
+    assert await cached_movie_repo_fixture.get_by_id("my_id") is None
+
+
+@pytest.mark.asyncio
+async def test_read_racing_a_write_is_not_cached(cached_movie_repo_fixture):
+    await cached_movie_repo_fixture.create(my_movie())
+
+    read = asyncio.ensure_future(cached_movie_repo_fixture.get_by_id("my_id"))
+    await asyncio.sleep(0)
+    await cached_movie_repo_fixture.delete(movie_id="my_id")
+    await read
+
+    assert await cached_movie_repo_fixture.get_by_id("my_id") is None
+
+
+@pytest.mark.asyncio
+async def test_get_many_uses_cache(cached_movie_repo_fixture):
+    await cached_movie_repo_fixture.create(my_movie())
+    await cached_movie_repo_fixture.get_by_id("my_id")
+
+    movies = await cached_movie_repo_fixture.get_many(["my_id", "missing_id"])
+    assert movies == {"my_id": my_movie()}
+    # The cached movie was not read again
+    assert cached_movie_repo_fixture._repository.reads == 1
+
+    await cached_movie_repo_fixture.update("my_id", {"title": "new_title"})
+    movies = await cached_movie_repo_fixture.get_many(["my_id"])
+    assert movies["my_id"].title == "new_title"
+    assert (await cached_movie_repo_fixture.get_by_id("my_id")).title == "new_title"
+    assert cached_movie_repo_fixture._repository.reads == 1
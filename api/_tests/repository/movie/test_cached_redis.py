@@ -0,0 +1,99 @@
+import asyncio
+import copy
+import secrets
+
+import pytest
+from redis.asyncio import Redis
+
+from api.entities.movie import Movie
+from api.repository.movie.cached import CachedMovieRepository
+from api.repository.movie.memory import MemoryMovieRepository
+
+
+class SlowMovieRepository(MemoryMovieRepository):
+    """
+    Memory repository counting its reads by id, which return what was stored
+    when they started
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.reads = 0
+
+    async def get_by_id(self, movie_id: str):
+        self.reads += 1
+        movie = copy.copy(await super().get_by_id(movie_id))
+        await asyncio.sleep(0.05)
+        return movie
+
+    async def get_many(self, movie_ids):
+        self.reads += 1
+        movies = {
+            movie_id: copy.copy(movie)
+            for movie_id, movie in (await super().get_many(movie_ids)).items()
+        }
+        await asyncio.sleep(0.05)
+        return movies
+
+
+@pytest.fixture
+def workers_fixture():
+    # Two workers sharing the database and Redis, each with its own LRU
+    repository = SlowMovieRepository()
+    key_prefix = f"test_movie:{secrets.token_hex(5)}:"
+    return [
+        CachedMovieRepository(
+            repository,
+            redis=Redis(host="127.0.0.1", port=6379, db=0),
+            key_prefix=key_prefix,
+        )
+        for _ in range(2)
+    ]
+
+
+def my_movie(title: str = "my_title") -> Movie:
+    return Movie(
+        movie_id="my_id",
+        title=title,
+        description="my_description",
+        released_year=2020,
+        watched=False,
+    )
+
+
+@pytest.mark.asyncio
+async def test_get_by_id_shared_through_redis(workers_fixture):
+    first, second = workers_fixture
+    # Stored by another process, no tombstone holds the key
+    await first._repository.create(my_movie())
+
+    assert await first.get_by_id("my_id") == my_movie()
+    assert await second.get_by_id("my_id") == my_movie()
+    # The second worker was answered from Redis
+    assert first._repository.reads == 1
+
+
+@pytest.mark.asyncio
+async def test_stale_read_not_written_back(workers_fixture):
+    first, second = workers_fixture
+    await first.create(my_movie())
+
+    read = asyncio.ensure_future(first.get_by_id("my_id"))
+    await asyncio.sleep(0.01)
+    await second.update("my_id", {"title": "new_title"})
+    assert (await read).title == "my_title"
+
+    assert (await second.get_by_id("my_id")).title == "new_title"
+
+
+@pytest.mark.asyncio
+async def test_get_many_stale_read_not_written_back(workers_fixture):
+    first, second = workers_fixture
+    await first.create(my_movie())
+
+    read = asyncio.ensure_future(first.get_many(["my_id"]))
+    await asyncio.sleep(0.01)
+    await second.update("my_id", {"title": "new_title"})
+    assert (await read)["my_id"].title == "my_title"
+
+    assert (await second.get_many(["my_id"]))["my_id"].title == "new_title"
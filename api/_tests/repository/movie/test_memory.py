@@ -1,8 +1,10 @@
+from datetime import datetime
+
 import pytest
 
 from api._tests.fixture import memory_movie_repo_fixture
 from api.entities.movie import Movie
-from api.repository.movie.abstractions import RepositoryException
+from api.repository.movie.abstractions import BulkItemResult, RepositoryException
 from api.repository.movie.memory import MemoryMovieRepository
 
 
@@ -271,3 +273,446 @@ async def test_update_fail(memory_movie_repo_fixture):
         await memory_movie_repo_fixture.update(
             movie_id="my_id", update_parameters={"id": "new_id"}
         )
+
+
+@pytest.mark.asyncio
+async def test_get_by_title_pagination_mixed_titles(memory_movie_repo_fixture):
+    for index in range(6):
+        await memory_movie_repo_fixture.create(
+            Movie(
+                movie_id=f"my_id_{index}",
+                title="my_title" if index % 2 == 0 else "other_title",
+                description="my_description",
+                released_year=2020,
+                watched=False,
+            )
+        )
+
+    first_page = await memory_movie_repo_fixture.get_by_title(
+        title="my_title", skip=0, limit=2
+    )
+    second_page = await memory_movie_repo_fixture.get_by_title(
+        title="my_title", skip=2, limit=2
+    )
+    assert [movie.id for movie in first_page] == ["my_id_0", "my_id_2"]
+    assert [movie.id for movie in second_page] == ["my_id_4"]
+
+
+@pytest.mark.asyncio
+async def test_title_index_follows_update_and_delete(memory_movie_repo_fixture):
+    await memory_movie_repo_fixture.create(
+        Movie(
+            movie_id="my_id",
+            title="my_title",
+            description="my_description",
+            released_year=2020,
+            watched=False,
+        )
+    )
+    await memory_movie_repo_fixture.update(
+        movie_id="my_id", update_parameters={"title": "new_title"}
+    )
+    assert await memory_movie_repo_fixture.get_by_title(title="my_title") == []
+    assert [
+        movie.id
+        for movie in await memory_movie_repo_fixture.get_by_title(title="new_title")
+    ] == ["my_id"]
+
+    await memory_movie_repo_fixture.delete(movie_id="my_id")
+    assert await memory_movie_repo_fixture.get_by_title(title="new_title") == []
+
+
+@pytest.mark.parametrize(
+    "after_id, limit, expected_ids",
+    [
+        pytest.param(None, 2, ["my_id_1", "my_id_2"], id="first_page"),
+        pytest.param("my_id_2", 2, ["my_id_3"], id="last_page"),
+        pytest.param("my_id_3", 2, [], id="past_the_end"),
+        pytest.param("my_id_1", 0, ["my_id_2", "my_id_3"], id="no_limit"),
+    ],
+)
+@pytest.mark.asyncio
+async def test_get_by_title_after(
+    memory_movie_repo_fixture, after_id, limit, expected_ids
+):
+    for index in range(1, 4):
+        await memory_movie_repo_fixture.create(
+            Movie(
+                movie_id=f"my_id_{index}",
+                title="my_title",
+                description="my_description",
+                released_year=2020,
+                watched=False,
+            )
+        )
+    await memory_movie_repo_fixture.create(
+        Movie(
+            movie_id="my_id_0",
+            title="other_title",
+            description="my_description",
+            released_year=2020,
+            watched=False,
+        )
+    )
+
+    movies = await memory_movie_repo_fixture.get_by_title_after(
+        title="my_title", after_id=after_id, limit=limit
+    )
+    assert [movie.id for movie in movies] == expected_ids
+
+
+@pytest.mark.asyncio
+async def test_iter_by_title(memory_movie_repo_fixture):
+    for index in range(1, 4):
+        await memory_movie_repo_fixture.create(
+            Movie(
+                movie_id=f"my_id_{index}",
+                title="my_title",
+                description="my_description",
+                released_year=2020,
+                watched=False,
+            )
+        )
+
+    movies = [
+        movie
+        async for movie in memory_movie_repo_fixture.iter_by_title(
+            title="my_title", skip=1, limit=0
+        )
+    ]
+    assert [movie.id for movie in movies] == ["my_id_2", "my_id_3"]
+
+
+@pytest.mark.asyncio
+async def test_bulk_create(memory_movie_repo_fixture):
+    movies = [
+        Movie(
+            movie_id=f"my_id_{index}",
+            title="my_title",
+            description="my_description",
+            released_year=2020,
+            watched=False,
+        )
+        for index in range(3)
+    ]
+    results = await memory_movie_repo_fixture.bulk_create(movies)
+    assert results == [
+        BulkItemResult(id=f"my_id_{index}", status="created") for index in range(3)
+    ]
+    assert await memory_movie_repo_fixture.get_by_title(title="my_title") == movies
+
+
+@pytest.mark.asyncio
+async def test_bulk_update(memory_movie_repo_fixture):
+    for index in range(2):
+        await memory_movie_repo_fixture.create(
+            Movie(
+                movie_id=f"my_id_{index}",
+                title="my_title",
+                description="my_description",
+                released_year=2020,
+                watched=False,
+            )
+        )
+
+    results = await memory_movie_repo_fixture.bulk_update(
+        update_parameters={
+            "my_id_0": {"watched": True},
+            "my_id_1": {"id": "new_id"},
+            "missing_id": {"watched": True},
+        }
+    )
+    assert [(result.id, result.status) for result in results] == [
+        ("my_id_0", "updated"),
+        ("my_id_1", "failed"),
+        ("missing_id", "not_found"),
+    ]
+    movie = await memory_movie_repo_fixture.get_by_id(movie_id="my_id_0")
+    assert movie.watched is True
+
+
+@pytest.mark.asyncio
+async def test_bulk_delete(memory_movie_repo_fixture):
+    await memory_movie_repo_fixture.create(
+        Movie(
+            movie_id="my_id",
+            title="my_title",
+            description="my_description",
+            released_year=2020,
+            watched=False,
+        )
+    )
+    results = await memory_movie_repo_fixture.bulk_delete(
+        movie_ids=["my_id", "missing_id"]
+    )
+    assert results == [
+        BulkItemResult(id="my_id", status="deleted"),
+        BulkItemResult(id="missing_id", status="not_found"),
+    ]
+    assert await memory_movie_repo_fixture.get_by_id(movie_id="my_id") is None
+
+
+@pytest.mark.asyncio
+async def test_version_tracking(memory_movie_repo_fixture):
+    await memory_movie_repo_fixture.create(
+        Movie(
+            movie_id="my_id",
+            title="my_title",
+            description="my_description",
+            released_year=2020,
+            watched=False,
+        )
+    )
+    created = await memory_movie_repo_fixture.get_by_id(movie_id="my_id")
+    assert created.version == 1
+    assert created.updated_at is not None
+    created_version, created_at = created.version, created.updated_at
+
+    await memory_movie_repo_fixture.update(
+        movie_id="my_id", update_parameters={"watched": True}
+    )
+    updated = await memory_movie_repo_fixture.get_by_id(movie_id="my_id")
+    assert updated.version == created_version + 1
+    assert updated.updated_at >= created_at
+
+
+@pytest.mark.asyncio
+async def test_search(memory_movie_repo_fixture):
+    for index, (year, watched) in enumerate(
+        [(2020, True), (2019, False), (2020, False), (2021, True), (2020, True)]
+    ):
+        await memory_movie_repo_fixture.create(
+            Movie(
+                movie_id=f"my_id_{index}",
+                title="my_title" if index < 4 else "other_title",
+                description="my_description",
+                released_year=year,
+                watched=watched,
+            )
+        )
+
+    movies = await memory_movie_repo_fixture.search(
+        filters={"released_year": 2020, "watched": True}
+    )
+    assert [movie.id for movie in movies] == ["my_id_0", "my_id_4"]
+
+    movies = await memory_movie_repo_fixture.search(
+        filters={"title": "my_title"}, sort="released_year", limit=2
+    )
+    assert [movie.id for movie in movies] == ["my_id_1", "my_id_0"]
+    movies = await memory_movie_repo_fixture.search(
+        filters={"title": "my_title"},
+        sort="released_year",
+        limit=2,
+        cursor=(2020, "my_id_0"),
+    )
+    assert [movie.id for movie in movies] == ["my_id_2", "my_id_3"]
+
+    # Indexes follow updates
+    await memory_movie_repo_fixture.update(
+        movie_id="my_id_2", update_parameters={"watched": True}
+    )
+    movies = await memory_movie_repo_fixture.search(
+        filters={"released_year": 2020, "watched": True}
+    )
+    assert [movie.id for movie in movies] == ["my_id_0", "my_id_2", "my_id_4"]
+
+    assert await memory_movie_repo_fixture.search(filters={"watched": None}) == []
+    with pytest.raises(RepositoryException):
+        await memory_movie_repo_fixture.search(filters={"description": "x"})
+    with pytest.raises(RepositoryException):
+        await memory_movie_repo_fixture.search(filters={}, sort="watched")
+
+
+@pytest.mark.asyncio
+async def test_search_missing_sort_value(memory_movie_repo_fixture):
+    for index, year in enumerate([2020, None, 2019, None]):
+        await memory_movie_repo_fixture.create(
+            Movie(
+                movie_id=f"my_id_{index}",
+                title="my_title",
+                description="my_description",
+                released_year=year,
+            )
+        )
+
+    movies = await memory_movie_repo_fixture.search(
+        filters={}, sort="released_year", limit=2
+    )
+    assert [movie.id for movie in movies] == ["my_id_1", "my_id_3"]
+    movies = await memory_movie_repo_fixture.search(
+        filters={}, sort="released_year", limit=2, cursor=(None, "my_id_1")
+    )
+    assert [movie.id for movie in movies] == ["my_id_3", "my_id_2"]
+    movies = await memory_movie_repo_fixture.search(
+        filters={}, sort="released_year", cursor=(None, "my_id_3")
+    )
+    assert [movie.id for movie in movies] == ["my_id_2", "my_id_0"]
+
+
+@pytest.mark.asyncio
+async def test_search_pages(memory_movie_repo_fixture):
+    for index in range(10):
+        await memory_movie_repo_fixture.create(
+            Movie(
+                movie_id=f"my_id_{index}",
+                title=f"my_title_{9 - index}",
+                description="my_description",
+                released_year=2020,
+                watched=index % 2 == 0,
+            )
+        )
+
+    # Every page resumes on the sort index, with and without filters
+    for filters, expected_ids in [
+        ({}, [f"my_id_{index}" for index in range(9, -1, -1)]),
+        ({"watched": True}, ["my_id_8", "my_id_6", "my_id_4", "my_id_2", "my_id_0"]),
+        (
+            {"released_year": 2020, "watched": False},
+            ["my_id_9", "my_id_7", "my_id_5", "my_id_3", "my_id_1"],
+        ),
+    ]:
+        seen = []
+        cursor = None
+        while True:
+            movies = await memory_movie_repo_fixture.search(
+                filters=filters, sort="title", limit=2, cursor=cursor
+            )
+            seen.extend(movie.id for movie in movies)
+            if len(movies) < 2:
+                break
+            cursor = (movies[-1].title, movies[-1].id)
+        assert seen == expected_ids
+
+    movies = await memory_movie_repo_fixture.search(filters={}, limit=0)
+    assert len(movies) == 10
+
+
+@pytest.mark.asyncio
+async def test_text_search(memory_movie_repo_fixture):
+    for movie_id, title, description in [
+        ("my_id_0", "Star Wars", "A space opera"),
+        ("my_id_1", "Stardust", "A fairy tale with a fallen star"),
+        ("my_id_2", "Space Jam", "Basketball in space"),
+    ]:
+        await memory_movie_repo_fixture.create(
+            Movie(
+                movie_id=movie_id,
+                title=title,
+                description=description,
+                released_year=2020,
+            )
+        )
+
+    # Equal scores are ordered by title
+    movies = await memory_movie_repo_fixture.text_search(query="sta")
+    assert [movie.id for movie in movies] == ["my_id_0", "my_id_1"]
+
+    # Title matches rank above description ones
+    movies = await memory_movie_repo_fixture.text_search(query="space")
+    assert [movie.id for movie in movies] == ["my_id_2", "my_id_0"]
+
+    movies = await memory_movie_repo_fixture.text_search(query="space op")
+    assert [movie.id for movie in movies] == ["my_id_0"]
+    assert (
+        await memory_movie_repo_fixture.text_search(query="space op", prefix=False)
+        == []
+    )
+    assert await memory_movie_repo_fixture.text_search(query="") == []
+
+    # The index follows updates
+    await memory_movie_repo_fixture.update(
+        movie_id="my_id_2", update_parameters={"title": "Galaxy Jam"}
+    )
+    movies = await memory_movie_repo_fixture.text_search(query="gal")
+    assert [movie.id for movie in movies] == ["my_id_2"]
+    await memory_movie_repo_fixture.delete(movie_id="my_id_1")
+    movies = await memory_movie_repo_fixture.text_search(query="sta")
+    assert [movie.id for movie in movies] == ["my_id_0"]
+
+
+@pytest.mark.asyncio
+async def test_get_many(memory_movie_repo_fixture):
+    for index in range(3):
+        await memory_movie_repo_fixture.create(
+            Movie(
+                movie_id=f"my_id_{index}",
+                title="my_title",
+                description="my_description",
+                released_year=2020,
+            )
+        )
+
+    movies = await memory_movie_repo_fixture.get_many(
+        movie_ids=["my_id_2", "missing_id", "my_id_0", "my_id_2"]
+    )
+    assert sorted(movies) == ["my_id_0", "my_id_2"]
+    assert movies["my_id_2"].id == "my_id_2"
+    assert await memory_movie_repo_fixture.get_many(movie_ids=[]) == {}
+
+
+@pytest.mark.asyncio
+async def test_read_only_fields(memory_movie_repo_fixture):
+    movie = Movie(
+        movie_id="my_id",
+        title="my_title",
+        description="my_description",
+        released_year=2020,
+        version=7,
+    )
+    await memory_movie_repo_fixture.create(movie)
+    # The repository keeps its own version, the given movie is not changed
+    assert movie.version == 7
+    assert movie.updated_at is None
+    assert (await memory_movie_repo_fixture.get_by_id(movie_id="my_id")).version == 1
+
+    for field, value in (("version", 5), ("updated_at", datetime(2023, 5, 1))):
+        with pytest.raises(RepositoryException):
+            await memory_movie_repo_fixture.update(
+                movie_id="my_id", update_parameters={field: value}
+            )
+    results = await memory_movie_repo_fixture.bulk_update(
+        update_parameters={"my_id": {"version": 5}}
+    )
+    assert results == [
+        BulkItemResult(
+            id="my_id", status="failed", message="Cannot update movie version"
+        )
+    ]
+    assert (await memory_movie_repo_fixture.get_by_id(movie_id="my_id")).version == 1
+
+
+@pytest.mark.asyncio
+async def test_indexes_follow_batched_writes(memory_movie_repo_fixture):
+    # Large batches rebuild the sorted indexes, small ones are applied in place
+    await memory_movie_repo_fixture.bulk_create(
+        [
+            Movie(
+                movie_id=f"my_id_{index:03}",
+                title=f"my_title_{index % 3}",
+                description="my_description",
+                released_year=2000 + index % 7,
+            )
+            for index in range(200)
+        ]
+    )
+    for batch in (range(0, 200, 2), range(1, 4)):
+        assert len(await memory_movie_repo_fixture.get_by_title("my_title_0")) > 0
+        for index in batch:
+            await memory_movie_repo_fixture.update(
+                movie_id=f"my_id_{index:03}", update_parameters={"title": "new_title"}
+            )
+        await memory_movie_repo_fixture.delete(movie_id="my_id_199")
+
+    movies = list(memory_movie_repo_fixture._storage.values())
+    for title in ("my_title_0", "my_title_1", "new_title"):
+        expected_ids = sorted(movie.id for movie in movies if movie.title == title)
+        found = await memory_movie_repo_fixture.get_by_title(title, limit=0)
+        assert [movie.id for movie in found] == expected_ids
+    found = await memory_movie_repo_fixture.search(
+        filters={}, sort="released_year", limit=0
+    )
+    assert [movie.id for movie in found] == [
+        movie.id
+        for movie in sorted(movies, key=lambda movie: (movie.released_year, movie.id))
+    ]
@@ -1,8 +1,11 @@
+from datetime import datetime
+
 import pytest
 
-from api._tests.fixture import mongo_movie_repo_fixture
+from api._tests.fixture import memory_movie_repo_fixture, mongo_movie_repo_fixture
 from api.entities.movie import Movie
-from api.repository.movie.abstractions import RepositoryException
+from api.repository.movie.abstractions import BulkItemResult, RepositoryException
+from api.repository.movie.migrate import migrate
 from api.repository.movie.mongo import MongoMovieRepository
 
 
@@ -288,3 +291,494 @@ async def test_update_fail(mongo_movie_repo_fixture):
         await mongo_movie_repo_fixture.update(
             movie_id="my_id", update_parameters={"id": "new_id"}
         )
+
+
+@pytest.mark.asyncio
+async def test_initialize(mongo_movie_repo_fixture):
+    report = await mongo_movie_repo_fixture.initialize()
+    assert report["id_1"] == [("id", 1)]
+    assert report["title_1_id_1"] == [("title", 1), ("id", 1)]
+    assert report["watched_1_released_year_1_id_1"] == [
+        ("watched", 1),
+        ("released_year", 1),
+        ("id", 1),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_ensure_indexes_search_combinations(mongo_movie_repo_fixture):
+    report = await mongo_movie_repo_fixture.ensure_indexes()
+    assert report["title_1_released_year_1_id_1"] == [
+        ("title", 1),
+        ("released_year", 1),
+        ("id", 1),
+    ]
+    assert report["watched_1_title_1_id_1"] == [("watched", 1), ("title", 1), ("id", 1)]
+    assert report["released_year_1_title_1_id_1"] == [
+        ("released_year", 1),
+        ("title", 1),
+        ("id", 1),
+    ]
+
+
+@pytest.mark.parametrize(
+    "after_id, limit, expected_ids",
+    [
+        pytest.param(None, 2, ["my_id_1", "my_id_2"], id="first_page"),
+        pytest.param("my_id_2", 2, ["my_id_3"], id="last_page"),
+        pytest.param("my_id_3", 2, [], id="past_the_end"),
+        pytest.param("my_id_1", 0, ["my_id_2", "my_id_3"], id="no_limit"),
+    ],
+)
+@pytest.mark.asyncio
+async def test_get_by_title_after(
+    mongo_movie_repo_fixture, after_id, limit, expected_ids
+):
+    for index in range(1, 4):
+        await mongo_movie_repo_fixture.create(
+            Movie(
+                movie_id=f"my_id_{index}",
+                title="my_title",
+                description="my_description",
+                released_year=2020,
+                watched=False,
+            )
+        )
+    await mongo_movie_repo_fixture.create(
+        Movie(
+            movie_id="my_id_0",
+            title="other_title",
+            description="my_description",
+            released_year=2020,
+            watched=False,
+        )
+    )
+
+    movies = await mongo_movie_repo_fixture.get_by_title_after(
+        title="my_title", after_id=after_id, limit=limit
+    )
+    assert [movie.id for movie in movies] == expected_ids
+
+
+@pytest.mark.asyncio
+async def test_iter_by_title(mongo_movie_repo_fixture):
+    for index in range(1, 4):
+        await mongo_movie_repo_fixture.create(
+            Movie(
+                movie_id=f"my_id_{index}",
+                title="my_title",
+                description="my_description",
+                released_year=2020,
+                watched=False,
+            )
+        )
+
+    movies = [
+        movie
+        async for movie in mongo_movie_repo_fixture.iter_by_title(
+            title="my_title", skip=1, limit=0
+        )
+    ]
+    assert [movie.id for movie in movies] == ["my_id_2", "my_id_3"]
+
+
+@pytest.mark.asyncio
+async def test_bulk_create(mongo_movie_repo_fixture):
+    movies = [
+        Movie(
+            movie_id=f"my_id_{index}",
+            title="my_title",
+            description="my_description",
+            released_year=2020,
+            watched=False,
+        )
+        for index in range(3)
+    ]
+    results = await mongo_movie_repo_fixture.bulk_create(movies)
+    assert results == [
+        BulkItemResult(id=f"my_id_{index}", status="created") for index in range(3)
+    ]
+    assert await mongo_movie_repo_fixture.get_by_title(title="my_title") == movies
+
+
+@pytest.mark.asyncio
+async def test_bulk_update(mongo_movie_repo_fixture):
+    for index in range(2):
+        await mongo_movie_repo_fixture.create(
+            Movie(
+                movie_id=f"my_id_{index}",
+                title="my_title",
+                description="my_description",
+                released_year=2020,
+                watched=False,
+            )
+        )
+
+    results = await mongo_movie_repo_fixture.bulk_update(
+        update_parameters={
+            "my_id_0": {"watched": True},
+            "my_id_1": {"id": "new_id"},
+            "missing_id": {"watched": True},
+        }
+    )
+    assert [(result.id, result.status) for result in results] == [
+        ("my_id_0", "updated"),
+        ("my_id_1", "failed"),
+        ("missing_id", "not_found"),
+    ]
+    movie = await mongo_movie_repo_fixture.get_by_id(movie_id="my_id_0")
+    assert movie.watched is True
+
+
+@pytest.mark.asyncio
+async def test_bulk_delete(mongo_movie_repo_fixture):
+    await mongo_movie_repo_fixture.create(
+        Movie(
+            movie_id="my_id",
+            title="my_title",
+            description="my_description",
+            released_year=2020,
+            watched=False,
+        )
+    )
+    results = await mongo_movie_repo_fixture.bulk_delete(
+        movie_ids=["my_id", "missing_id"]
+    )
+    assert results == [
+        BulkItemResult(id="my_id", status="deleted"),
+        BulkItemResult(id="missing_id", status="not_found"),
+    ]
+    assert await mongo_movie_repo_fixture.get_by_id(movie_id="my_id") is None
+
+
+@pytest.mark.asyncio
+async def test_version_tracking(mongo_movie_repo_fixture):
+    await mongo_movie_repo_fixture.create(
+        Movie(
+            movie_id="my_id",
+            title="my_title",
+            description="my_description",
+            released_year=2020,
+            watched=False,
+        )
+    )
+    created = await mongo_movie_repo_fixture.get_by_id(movie_id="my_id")
+    assert created.version == 1
+    assert created.updated_at is not None
+    created_version, created_at = created.version, created.updated_at
+
+    await mongo_movie_repo_fixture.update(
+        movie_id="my_id", update_parameters={"watched": True}
+    )
+    updated = await mongo_movie_repo_fixture.get_by_id(movie_id="my_id")
+    assert updated.version == created_version + 1
+    assert updated.updated_at >= created_at
+
+
+@pytest.mark.asyncio
+async def test_search(mongo_movie_repo_fixture):
+    for index, (year, watched) in enumerate(
+        [(2020, True), (2019, False), (2020, False), (2021, True), (2020, True)]
+    ):
+        await mongo_movie_repo_fixture.create(
+            Movie(
+                movie_id=f"my_id_{index}",
+                title="my_title" if index < 4 else "other_title",
+                description="my_description",
+                released_year=year,
+                watched=watched,
+            )
+        )
+
+    movies = await mongo_movie_repo_fixture.search(
+        filters={"released_year": 2020, "watched": True}
+    )
+    assert [movie.id for movie in movies] == ["my_id_0", "my_id_4"]
+
+    movies = await mongo_movie_repo_fixture.search(
+        filters={"title": "my_title"}, sort="released_year", limit=2
+    )
+    assert [movie.id for movie in movies] == ["my_id_1", "my_id_0"]
+    movies = await mongo_movie_repo_fixture.search(
+        filters={"title": "my_title"},
+        sort="released_year",
+        limit=2,
+        cursor=(2020, "my_id_0"),
+    )
+    assert [movie.id for movie in movies] == ["my_id_2", "my_id_3"]
+
+    # Indexes follow updates
+    await mongo_movie_repo_fixture.update(
+        movie_id="my_id_2", update_parameters={"watched": True}
+    )
+    movies = await mongo_movie_repo_fixture.search(
+        filters={"released_year": 2020, "watched": True}
+    )
+    assert [movie.id for movie in movies] == ["my_id_0", "my_id_2", "my_id_4"]
+
+    assert await mongo_movie_repo_fixture.search(filters={"watched": None}) == []
+    with pytest.raises(RepositoryException):
+        await mongo_movie_repo_fixture.search(filters={"description": "x"})
+    with pytest.raises(RepositoryException):
+        await mongo_movie_repo_fixture.search(filters={}, sort="watched")
+
+
+@pytest.mark.asyncio
+async def test_search_missing_sort_value(mongo_movie_repo_fixture):
+    for index, year in enumerate([2020, None, 2019, None]):
+        await mongo_movie_repo_fixture.create(
+            Movie(
+                movie_id=f"my_id_{index}",
+                title="my_title",
+                description="my_description",
+                released_year=year,
+            )
+        )
+
+    movies = await mongo_movie_repo_fixture.search(
+        filters={}, sort="released_year", limit=2
+    )
+    assert [movie.id for movie in movies] == ["my_id_1", "my_id_3"]
+    movies = await mongo_movie_repo_fixture.search(
+        filters={}, sort="released_year", limit=2, cursor=(None, "my_id_1")
+    )
+    assert [movie.id for movie in movies] == ["my_id_3", "my_id_2"]
+    movies = await mongo_movie_repo_fixture.search(
+        filters={}, sort="released_year", cursor=(None, "my_id_3")
+    )
+    assert [movie.id for movie in movies] == ["my_id_2", "my_id_0"]
+
+
+@pytest.mark.asyncio
+async def test_text_search(mongo_movie_repo_fixture):
+    for movie_id, title, description in [
+        ("my_id_0", "Star Wars", "A space opera"),
+        ("my_id_1", "Stardust", "A fairy tale with a fallen star"),
+        ("my_id_2", "Space Jam", "Basketball in space"),
+    ]:
+        await mongo_movie_repo_fixture.create(
+            Movie(
+                movie_id=movie_id,
+                title=title,
+                description=description,
+                released_year=2020,
+            )
+        )
+
+    # Equal scores are ordered by title
+    movies = await mongo_movie_repo_fixture.text_search(query="sta")
+    assert [movie.id for movie in movies] == ["my_id_0", "my_id_1"]
+
+    # Title matches rank above description ones
+    movies = await mongo_movie_repo_fixture.text_search(query="space")
+    assert [movie.id for movie in movies] == ["my_id_2", "my_id_0"]
+
+    movies = await mongo_movie_repo_fixture.text_search(query="space op")
+    assert [movie.id for movie in movies] == ["my_id_0"]
+    assert (
+        await mongo_movie_repo_fixture.text_search(query="space op", prefix=False) == []
+    )
+    assert await mongo_movie_repo_fixture.text_search(query="") == []
+
+    # The index follows updates
+    await mongo_movie_repo_fixture.update(
+        movie_id="my_id_2", update_parameters={"title": "Galaxy Jam"}
+    )
+    movies = await mongo_movie_repo_fixture.text_search(query="gal")
+    assert [movie.id for movie in movies] == ["my_id_2"]
+    await mongo_movie_repo_fixture.delete(movie_id="my_id_1")
+    movies = await mongo_movie_repo_fixture.text_search(query="sta")
+    assert [movie.id for movie in movies] == ["my_id_0"]
+
+
+@pytest.mark.asyncio
+async def test_text_search_ranks_every_match(mongo_movie_repo_fixture):
+    await mongo_movie_repo_fixture.bulk_create(
+        [
+            Movie(
+                movie_id=f"my_id_{index:04}",
+                title="my_title",
+                description="A star is born",
+                released_year=2020,
+            )
+            for index in range(1500)
+        ]
+    )
+    await mongo_movie_repo_fixture.create(
+        Movie(
+            movie_id="title_match",
+            title="Stardust",
+            description="my_description",
+            released_year=2020,
+        )
+    )
+
+    movies = await mongo_movie_repo_fixture.text_search(query="sta", limit=3)
+    assert [movie.id for movie in movies] == ["title_match", "my_id_0000", "my_id_0001"]
+
+
+@pytest.mark.asyncio
+async def test_text_search_reads_past_first_batch(mongo_movie_repo_fixture):
+    # "wars" drives the search, the movie with "star" in its description is
+    # read after every other movie with "wars"
+    await mongo_movie_repo_fixture.bulk_create(
+        [
+            Movie(
+                movie_id=f"my_id_{index:04}",
+                title="my_title",
+                description="wars and wars and wars",
+                released_year=2020,
+            )
+            for index in range(250)
+        ]
+        + [
+            Movie(
+                movie_id="title_match",
+                title="Star Wars",
+                description="my_description",
+                released_year=2020,
+            ),
+            Movie(
+                movie_id="description_match",
+                title="my_title",
+                description="a star and its wars",
+                released_year=2020,
+            ),
+        ]
+    )
+
+    movies = await mongo_movie_repo_fixture.text_search(query="wars star", limit=2)
+    assert [movie.id for movie in movies] == ["title_match", "description_match"]
+    movies = await mongo_movie_repo_fixture.text_search(query="wars st", limit=0)
+    assert [movie.id for movie in movies] == ["title_match", "description_match"]
+
+    await mongo_movie_repo_fixture.bulk_delete(["title_match", "description_match"])
+    assert await mongo_movie_repo_fixture.text_search(query="star wars") == []
+    assert (
+        await mongo_movie_repo_fixture._tokens.count_documents(
+            {"movie_id": {"$in": ["title_match", "description_match"]}}
+        )
+        == 0
+    )
+
+
+@pytest.mark.parametrize(
+    "query, prefix",
+    [
+        pytest.param("star", True, id="prefix"),
+        pytest.param("star", False, id="token"),
+        pytest.param("stars", False, id="no_stemming"),
+        pytest.param("the", False, id="no_stopwords"),
+        pytest.param("space op", True, id="prefix_terms"),
+        pytest.param("wars star", False, id="terms_not_a_phrase"),
+        pytest.param("in space", False, id="description_terms"),
+    ],
+)
+@pytest.mark.asyncio
+async def test_text_search_matches_memory(
+    mongo_movie_repo_fixture, memory_movie_repo_fixture, query, prefix
+):
+    for movie_id, title, description in [
+        ("my_id_0", "Star Wars", "A space opera with the stars"),
+        ("my_id_1", "Stardust", "A fairy tale with a fallen star"),
+        ("my_id_2", "Space Jam", "Basketball in space"),
+        ("my_id_3", "The Stars", "Star star star"),
+        ("my_id_4", "Wars of the star", "Space wars"),
+    ]:
+        for repo in (mongo_movie_repo_fixture, memory_movie_repo_fixture):
+            await repo.create(
+                Movie(
+                    movie_id=movie_id,
+                    title=title,
+                    description=description,
+                    released_year=2020,
+                )
+            )
+
+    mongo_movies = await mongo_movie_repo_fixture.text_search(
+        query=query, prefix=prefix
+    )
+    memory_movies = await memory_movie_repo_fixture.text_search(
+        query=query, prefix=prefix
+    )
+    assert [movie.id for movie in mongo_movies] == [movie.id for movie in memory_movies]
+
+
+@pytest.mark.asyncio
+async def test_migrate(mongo_movie_repo_fixture):
+    await mongo_movie_repo_fixture._movies.insert_many(
+        [
+            {"id": "my_id_0", "title": "Star Wars", "description": "A space opera"},
+            {"id": "my_id_1", "title": "Stardust", "released_year": 2007},
+            {"id": "my_id_2", "description": "No title"},
+        ]
+    )
+    await mongo_movie_repo_fixture._movies.create_index(
+        [("title", "text"), ("description", "text")],
+        name="title_text_description_text",
+    )
+    await mongo_movie_repo_fixture._movies.create_index(
+        "search_tokens", name="search_tokens_1"
+    )
+
+    assert await migrate(mongo_movie_repo_fixture, batch_size=2) == 3
+    assert await migrate(mongo_movie_repo_fixture, batch_size=2) == 0
+    index_information = await mongo_movie_repo_fixture._movies.index_information()
+    assert "title_text_description_text" not in index_information
+    assert "search_tokens_1" not in index_information
+
+    movies = await mongo_movie_repo_fixture.text_search(query="sta")
+    assert [movie.id for movie in movies] == ["my_id_0", "my_id_1"]
+    movies = await mongo_movie_repo_fixture.text_search(query="title")
+    assert [movie.id for movie in movies] == ["my_id_2"]
+
+
+@pytest.mark.asyncio
+async def test_get_many(mongo_movie_repo_fixture):
+    for index in range(3):
+        await mongo_movie_repo_fixture.create(
+            Movie(
+                movie_id=f"my_id_{index}",
+                title="my_title",
+                description="my_description",
+                released_year=2020,
+            )
+        )
+
+    movies = await mongo_movie_repo_fixture.get_many(
+        movie_ids=["my_id_2", "missing_id", "my_id_0", "my_id_2"]
+    )
+    assert sorted(movies) == ["my_id_0", "my_id_2"]
+    assert movies["my_id_2"].id == "my_id_2"
+    assert await mongo_movie_repo_fixture.get_many(movie_ids=[]) == {}
+
+
+@pytest.mark.asyncio
+async def test_read_only_fields(mongo_movie_repo_fixture):
+    movie = Movie(
+        movie_id="my_id",
+        title="my_title",
+        description="my_description",
+        released_year=2020,
+        version=7,
+    )
+    await mongo_movie_repo_fixture.create(movie)
+    # The repository keeps its own version, the given movie is not changed
+    assert movie.version == 7
+    assert movie.updated_at is None
+    assert (await mongo_movie_repo_fixture.get_by_id(movie_id="my_id")).version == 1
+
+    for field, value in (("version", 5), ("updated_at", datetime(2023, 5, 1))):
+        with pytest.raises(RepositoryException):
+            await mongo_movie_repo_fixture.update(
+                movie_id="my_id", update_parameters={field: value}
+            )
+    results = await mongo_movie_repo_fixture.bulk_update(
+        update_parameters={"my_id": {"version": 5}}
+    )
+    assert results == [
+        BulkItemResult(
+            id="my_id", status="failed", message="Cannot update movie version"
+        )
+    ]
+    assert (await mongo_movie_repo_fixture.get_by_id(movie_id="my_id")).version == 1
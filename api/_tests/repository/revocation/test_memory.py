@@ -0,0 +1,26 @@
+import time
+
+import pytest
+
+from api._tests.fixture import memory_revocation_repo_fixture
+
+
+@pytest.mark.asyncio
+async def test_revoke(memory_revocation_repo_fixture):
+    await memory_revocation_repo_fixture.revoke(
+        "my_token", expires_at=int(time.time()) + 60
+    )
+    assert await memory_revocation_repo_fixture.is_revoked("my_token") is True
+    assert await memory_revocation_repo_fixture.is_revoked("other_token") is False
+
+
+@pytest.mark.asyncio
+async def test_revoke_many(memory_revocation_repo_fixture):
+    await memory_revocation_repo_fixture.revoke_many(
+        {
+            "my_token": int(time.time()) + 60,
+            "expired_token": int(time.time()) - 60,
+        }
+    )
+    assert await memory_revocation_repo_fixture.is_revoked("my_token") is True
+    assert await memory_revocation_repo_fixture.is_revoked("expired_token") is False
@@ -0,0 +1,47 @@
+import secrets
+import time
+
+import pytest
+from jose import jwt
+
+from api._tests.fixture import redis_revocation_repo_fixture
+from api.repository.revocation.migrate import drain_legacy_blacklist
+
+
+@pytest.mark.asyncio
+async def test_revoke(redis_revocation_repo_fixture):
+    await redis_revocation_repo_fixture.revoke(
+        "my_token", expires_at=int(time.time()) + 60
+    )
+    assert await redis_revocation_repo_fixture.is_revoked("my_token") is True
+    assert await redis_revocation_repo_fixture.is_revoked("other_token") is False
+
+
+@pytest.mark.asyncio
+async def test_revoke_many(redis_revocation_repo_fixture):
+    await redis_revocation_repo_fixture.revoke_many(
+        {
+            "my_token": int(time.time()) + 60,
+            "expired_token": int(time.time()) - 60,
+        }
+    )
+    assert await redis_revocation_repo_fixture.is_revoked("my_token") is True
+    assert await redis_revocation_repo_fixture.is_revoked("expired_token") is False
+
+
+@pytest.mark.asyncio
+async def test_drain_legacy_blacklist(redis_revocation_repo_fixture):
+    client = redis_revocation_repo_fixture._client
+    legacy_key = f"test_token_blacklist:{secrets.token_hex(5)}"
+    live_token = jwt.encode({"sub": "user", "exp": int(time.time()) + 60}, "secret")
+    expired_token = jwt.encode({"sub": "user", "exp": int(time.time()) - 60}, "secret")
+    await client.sadd(legacy_key, live_token, expired_token)
+
+    migrated = await drain_legacy_blacklist(
+        client, redis_revocation_repo_fixture, legacy_key=legacy_key
+    )
+
+    assert migrated == 1
+    assert await client.exists(legacy_key) == 0
+    assert await redis_revocation_repo_fixture.is_revoked(live_token) is True
+    assert await redis_revocation_repo_fixture.is_revoked(expired_token) is False
@@ -0,0 +1,20 @@
+from api.repository.auth.mongo import MongoAuthRepository
+from api.repository.mongo_client import mongo_client
+from api.repository.movie.mongo import MongoMovieRepository
+
+
+def test_repositories_share_client():
+    movie_repo = MongoMovieRepository(
+        connection_string="mongodb://127.0.0.1:27017", database="movie_track_db"
+    )
+    auth_repo = MongoAuthRepository(
+        connection_string="mongodb://127.0.0.1:27017", database="auth_db"
+    )
+    assert movie_repo._client is auth_repo._client
+    assert movie_repo._client is mongo_client("mongodb://127.0.0.1:27017")
+
+
+def test_client_pool_settings():
+    client = mongo_client("mongodb://127.0.0.1:27017")
+    assert client.options.pool_options.max_pool_size == 100
+    assert client.options.server_selection_timeout == 5
@@ -0,0 +1,41 @@
+from api.repository.movie.batching import BatchingMovieRepository
+from api.repository.movie.cached import CachedMovieRepository
+from api.repository.movie.memory import MemoryMovieRepository
+from api.repository.registry import RepositoryRegistry
+from api.settings.movie import settings_instance as movie_settings_instance
+from api.settings.repository import Settings
+
+
+def test_memory_backend():
+    registry = RepositoryRegistry.from_settings(Settings(repository_backend="memory"))
+    assert isinstance(registry.movies, MemoryMovieRepository)
+    assert registry.redis is None
+
+
+def test_mongo_backend_shares_one_client(monkeypatch):
+    monkeypatch.setenv("MONGO_CONNECTION_STRING", "mongodb://127.0.0.1:27017")
+    monkeypatch.setenv("MONGO_DATABASE_NAME", "movie_track_db")
+    movie_settings_instance.cache_clear()
+
+    first = RepositoryRegistry.from_settings(Settings(repository_backend="mongo"))
+    second = RepositoryRegistry.from_settings(Settings(repository_backend="mongo"))
+
+    assert first.movies._client is first.auth._client
+    assert first.movies._client is second.movies._client
+    movie_settings_instance.cache_clear()
+
+
+def test_movie_layers():
+    registry = RepositoryRegistry.from_settings(
+        Settings(
+            repository_backend="memory",
+            movie_batching_enabled=True,
+            movie_batch_window_ms=2.0,
+            movie_cache_enabled=True,
+        )
+    )
+    # The cache sits on top, only its misses are batched
+    assert isinstance(registry.movies, CachedMovieRepository)
+    assert isinstance(registry.movies._repository, BatchingMovieRepository)
+    assert registry.movies._repository._window == 0.002
+    assert isinstance(registry.movies._repository._repository, MemoryMovieRepository)
@@ -0,0 +1,60 @@
+import time
+
+import pytest
+from jose import JWTError, jwt
+
+from api.settings.auth import jwt_settings_instance
+from api.utils.auth import (
+    create_access_token,
+    decode_token,
+    signing_key,
+    token_cache,
+    token_digest,
+)
+
+
+@pytest.fixture
+def jwt_env(monkeypatch):
+    monkeypatch.setenv("SECRET_KEY", "my_secret_key")
+    monkeypatch.setenv("ALGORITHM", "HS256")
+    monkeypatch.setenv("ACCESS_TOKEN_EXPIRE_MINUTES", "15")
+    monkeypatch.setenv("REFRESH_TOKEN_EXPIRE_MINUTES", "60")
+    jwt_settings_instance.cache_clear()
+    signing_key.cache_clear()
+    token_cache().clear()
+    yield
+    jwt_settings_instance.cache_clear()
+    signing_key.cache_clear()
+    token_cache().clear()
+
+
+def test_decode_token_caches_payload(jwt_env):
+    token = create_access_token("my_username")
+    payload = decode_token(token)
+    assert payload["sub"] == "my_username"
+    assert token_cache().get(token_digest(token)) == payload
+
+    # Mutating the returned claims does not leak into the cache
+    payload["sub"] = "other_username"
+    assert decode_token(token)["sub"] == "my_username"
+
+
+def test_decode_token_rejects_invalid(jwt_env):
+    with pytest.raises(JWTError):
+        decode_token("not_a_token")
+    assert len(token_cache()) == 0
+
+
+def test_decode_token_skips_expired(jwt_env):
+    token = jwt.encode(
+        {"sub": "my_username", "exp": int(time.time()) - 10},
+        "my_secret_key",
+        "HS256",
+    )
+    with pytest.raises(JWTError):
+        decode_token(token)
+    assert token_cache().get(token_digest(token)) is None
+
+
+def test_settings_read_once(jwt_env):
+    assert jwt_settings_instance() is jwt_settings_instance()
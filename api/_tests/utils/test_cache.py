@@ -0,0 +1,38 @@
+import time
+
+from api.utils.cache import TTLCache
+
+
+def test_get_set():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("my_key", "my_value")
+    assert cache.get("my_key") == "my_value"
+    assert cache.get("other_key") is None
+
+
+def test_evicts_least_recently_used():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("first", 1)
+    cache.set("second", 2)
+    cache.get("first")
+    cache.set("third", 3)
+    assert cache.get("first") == 1
+    assert cache.get("second") is None
+    assert len(cache) == 2
+
+
+def test_expires_entries(monkeypatch):
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("my_key", "my_value")
+    cache.set("short_key", "my_value", ttl=1)
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now + 30)
+    assert cache.get("my_key") == "my_value"
+    assert cache.get("short_key") is None
+
+
+def test_invalidate():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("my_key", "my_value")
+    cache.invalidate("my_key")
+    assert cache.get("my_key") is None
@@ -0,0 +1,51 @@
+from datetime import datetime
+
+from api.entities.movie import Movie
+from api.utils.conditional import conditional_headers, is_not_modified, movies_etag
+
+
+def make_movie(version=1, updated_at=datetime(2023, 5, 1, 12, 0, 0, 500000)):
+    return Movie(
+        movie_id="my_id",
+        title="my_title",
+        description="my_description",
+        released_year=2020,
+        version=version,
+        updated_at=updated_at,
+    )
+
+
+def test_etag_changes_with_version():
+    etag = movies_etag([make_movie()])
+    assert etag.startswith('"') and etag.endswith('"')
+    assert etag == movies_etag([make_movie()])
+    assert etag != movies_etag([make_movie(version=2)])
+    assert etag != movies_etag([])
+
+
+def test_conditional_headers():
+    assert conditional_headers('"tag"', None) == {"ETag": '"tag"'}
+    assert conditional_headers('"tag"', datetime(2023, 5, 1, 12)) == {
+        "ETag": '"tag"',
+        "Last-Modified": "Mon, 01 May 2023 12:00:00 GMT",
+    }
+
+
+def test_if_none_match():
+    assert is_not_modified('"a"', None, '"a"', None)
+    assert is_not_modified('"a"', None, 'W/"a"', None)
+    assert is_not_modified('"a"', None, '"b", "a"', None)
+    assert is_not_modified('"a"', None, "*", None)
+    assert not is_not_modified('"a"', None, '"b"', None)
+    # If-None-Match takes precedence over If-Modified-Since
+    assert not is_not_modified(
+        '"a"', datetime(2023, 5, 1), '"b"', "Tue, 02 May 2023 00:00:00 GMT"
+    )
+
+
+def test_if_modified_since():
+    updated_at = datetime(2023, 5, 1, 12, 0, 0, 500000)
+    assert is_not_modified('"a"', updated_at, None, "Mon, 01 May 2023 12:00:00 GMT")
+    assert not is_not_modified('"a"', updated_at, None, "Mon, 01 May 2023 11:59:59 GMT")
+    assert not is_not_modified('"a"', updated_at, None, "not a date")
+    assert not is_not_modified('"a"', None, None, "Mon, 01 May 2023 12:00:00 GMT")
@@ -0,0 +1,20 @@
+import pytest
+
+from api.utils.pagination import decode_cursor, encode_cursor
+
+
+@pytest.mark.parametrize(
+    "value",
+    [
+        pytest.param("5d9c3a53-3f4e-4d4b-9e0a-0a1b2c3d4e5f", id="id"),
+        pytest.param([2020, "my_id"], id="compound"),
+    ],
+)
+def test_cursor_round_trip(value):
+    assert decode_cursor(encode_cursor(value)) == value
+
+
+@pytest.mark.parametrize("cursor", ["", "not a cursor", "e3"])
+def test_decode_cursor_fail(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
@@ -0,0 +1,44 @@
+import asyncio
+import threading
+
+import pytest
+
+from api.utils.metrics import PASSWORD_HASH_QUEUE_DEPTH
+from api.utils.password import PasswordHasher
+
+
+@pytest.mark.asyncio
+async def test_hash_verify():
+    hasher = PasswordHasher(rounds=4, max_workers=2)
+    hashed_password = await hasher.hash("my_password")
+    assert hashed_password.startswith("$2b$04$")
+    assert await hasher.verify("my_password", hashed_password) is True
+    assert await hasher.verify("not_my_password", hashed_password) is False
+
+
+@pytest.mark.asyncio
+async def test_concurrent_hashes():
+    hasher = PasswordHasher(rounds=4, max_workers=2)
+    hashed_passwords = await asyncio.gather(
+        *(hasher.hash(f"password_{index}") for index in range(5))
+    )
+    for index, hashed_password in enumerate(hashed_passwords):
+        assert await hasher.verify(f"password_{index}", hashed_password) is True
+
+
+@pytest.mark.asyncio
+async def test_cancelled_queued_hash_leaves_queue():
+    hasher = PasswordHasher(rounds=4, max_workers=1)
+    release = threading.Event()
+    # Occupying the only worker so the next hash waits in the queue
+    blocking = asyncio.ensure_future(hasher._submit(release.wait))
+    queued = asyncio.ensure_future(hasher.hash("my_password"))
+    await asyncio.sleep(0.01)
+    assert PASSWORD_HASH_QUEUE_DEPTH._value.get() == 1
+
+    queued.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await queued
+    release.set()
+    await blocking
+    assert PASSWORD_HASH_QUEUE_DEPTH._value.get() == 0
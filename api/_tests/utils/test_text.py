@@ -0,0 +1,16 @@
+from api.utils.text import TITLE_WEIGHT, token_weights, tokenize
+
+
+def test_tokenize():
+    assert tokenize("The Matrix: Reloaded!") == ["the", "matrix", "reloaded"]
+    assert tokenize("") == []
+
+
+def test_token_weights():
+    assert token_weights("Star Wars", "a star is born") == {
+        "star": TITLE_WEIGHT + 1,
+        "wars": TITLE_WEIGHT,
+        "a": 1,
+        "is": 1,
+        "born": 1,
+    }
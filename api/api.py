@@ -1,12 +1,41 @@
+import logging
+from contextlib import asynccontextmanager
+from typing import Optional
+
 from fastapi import FastAPI
 from starlette_prometheus import metrics
 
 from api.handlers import demo, movie_v1, auth_v1
 from api.middleware.middleware import middleware
+from api.repository.registry import RepositoryRegistry
+from api.settings.repository import settings_instance
+
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Runs the one-off startup work before the app starts serving requests
+    """
+    # Repositories are application scoped, created once per worker unless
+    # create_app was given its own
+    if not hasattr(app.state, "repositories"):
+        app.state.repositories = RepositoryRegistry.from_settings(settings_instance())
+
+    # Failing fast when a backend is unreachable or its indexes are missing
+    app.state.repository_reports = await app.state.repositories.initialize()
+    logger.info("Repositories ready: %s", app.state.repository_reports)
+
+    yield
+
+    await app.state.repositories.close()
 
 
-def create_app():
-    app = FastAPI(docs_url="/", middleware=middleware)
+def create_app(repositories: Optional[RepositoryRegistry] = None):
+    app = FastAPI(docs_url="/", middleware=middleware, lifespan=lifespan)
+    if repositories is not None:
+        app.state.repositories = repositories
 
     # Routers
     # app.include_router(demo.router)
@@ -1,7 +1,10 @@
 import datetime
 from typing import Optional
 
-from pydantic import BaseModel, validator
+from pydantic import BaseModel, conlist, validator
+
+# Upper bound on the number of items a single bulk request may carry
+MAX_BULK_ITEMS = 1000
 
 
 class CreateMovieBody(BaseModel):
@@ -82,3 +85,38 @@ class UpdateMovieBody(BaseModel):
         if v > today.year:
             raise ValueError("released_year must be less than current year")
         return v
+
+
+class BulkCreateMoviesBody(BaseModel):
+    movies: conlist(CreateMovieBody, min_items=1, max_items=MAX_BULK_ITEMS)
+
+
+class BulkUpdateMovieBody(UpdateMovieBody):
+    id: str
+
+
+class BulkUpdateMoviesBody(BaseModel):
+    movies: conlist(BulkUpdateMovieBody, min_items=1, max_items=MAX_BULK_ITEMS)
+
+
+class BulkDeleteMoviesBody(BaseModel):
+    ids: conlist(str, min_items=1, max_items=MAX_BULK_ITEMS)
+
+
+class BulkItemResponse(BaseModel):
+    id: str
+    status: str
+    message: Optional[str] = None
+
+
+class BulkOperationResponse(BaseModel):
+    results: list[BulkItemResponse]
+
+
+class BatchGetMoviesBody(BaseModel):
+    ids: conlist(str, min_items=1, max_items=MAX_BULK_ITEMS)
+
+
+class BatchGetMoviesResponse(BaseModel):
+    movies: list[MovieResponse]
+    missing: list[str]
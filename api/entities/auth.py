@@ -1,7 +1,12 @@
 from passlib.context import CryptContext
 
+# Shared by every user, building a context parses its whole configuration
+_pwd_context = CryptContext(schemes=["bcrypt"])
+
 
 class AuthUser:
+    __slots__ = ("_user_id", "_username", "_password")
+
     def __init__(
         self,
         *,
@@ -32,16 +37,45 @@ class AuthUser:
     def password(self) -> str:
         return self._password
 
+    def to_document(self) -> dict:
+        """
+        Returns the stored fields
+        """
+        return {
+            "user_id": self._user_id,
+            "username": self._username,
+            "password": self._password,
+        }
+
+    @classmethod
+    def from_document(cls, document: dict) -> "AuthUser":
+        """
+        Builds a user from a stored document
+        """
+        return cls(
+            user_id=document["user_id"],
+            username=document["username"],
+            password=document["password"],
+        )
+
     def __repr__(self):
         return f"AuthUser(user_id = '{self._user_id}', username='{self._username}', password='{self._password}')"
 
+    def verify_password(self, plain_password: str) -> bool:
+        """
+        Checks a plain password against the stored hash
+
+        Runs a full bcrypt verification, request handlers should go through
+        the repository and its PasswordHasher instead
+        """
+        return _pwd_context.verify(plain_password, self._password)
+
     def __eq__(self, o: object) -> bool:
         if not isinstance(o, AuthUser):
             return False
         else:
-            pwd_context = CryptContext(schemes=["bcrypt"])
             return (
                 self.user_id == o.user_id
                 and self.username == o.username
-                and pwd_context.verify(o.password, self.password)
+                and self.password == o.password
             )
@@ -1,4 +1,19 @@
+from datetime import datetime
+from typing import Optional
+
+
 class Movie:
+    # No per-instance __dict__, the memory repository keeps every movie resident
+    __slots__ = (
+        "_id",
+        "_title",
+        "_description",
+        "_released_year",
+        "_watched",
+        "_version",
+        "_updated_at",
+    )
+
     def __init__(
         self,
         *,
@@ -6,7 +21,9 @@ class Movie:
         title: str,
         description: str,
         released_year: int,
-        watched: bool = False
+        watched: bool = False,
+        version: int = 1,
+        updated_at: Optional[datetime] = None
     ):
         if movie_id is None:
             raise ValueError("id is required")
@@ -16,6 +33,9 @@ class Movie:
         self._description = description
         self._released_year = released_year
         self._watched = watched
+        # Maintained by the repositories on every write, not part of equality
+        self._version = version
+        self._updated_at = updated_at
 
     @property
     def id(self) -> str:
@@ -37,6 +57,43 @@ class Movie:
     def watched(self) -> bool:
         return self._watched
 
+    @property
+    def version(self) -> int:
+        return self._version
+
+    @property
+    def updated_at(self) -> Optional[datetime]:
+        return self._updated_at
+
+    def to_document(self) -> dict:
+        """
+        Returns the stored fields, version and updated_at are left to the repositories
+        """
+        return {
+            "id": self._id,
+            "title": self._title,
+            "description": self._description,
+            "released_year": self._released_year,
+            "watched": self._watched,
+        }
+
+    @classmethod
+    def from_document(cls, document: dict) -> "Movie":
+        """
+        Builds a movie from a stored document, missing versions default to 1
+
+        Documents stored by older releases may lack fields, these are left None
+        """
+        return cls(
+            movie_id=document["id"],
+            title=document.get("title"),
+            description=document.get("description"),
+            released_year=document.get("released_year"),
+            watched=document.get("watched", False),
+            version=document.get("version", 1),
+            updated_at=document.get("updated_at"),
+        )
+
     def __eq__(self, o: object) -> bool:
         if not isinstance(o, Movie):
             return False
@@ -1,46 +1,36 @@
-from functools import lru_cache
 from http import HTTPStatus
+import time
 import uuid
-from redis import Redis
 from datetime import datetime
-from fastapi import APIRouter, Body, Depends, Form, Header, Response
+from fastapi import APIRouter, Body, Depends, Form, Header, Request, Response
 from fastapi.responses import JSONResponse
 from fastapi.encoders import jsonable_encoder
 from fastapi.security import OAuth2PasswordRequestForm
+from jose import JWTError
 from api.dto.auth import TokenResponse, UserRegisteredResponse
 from api.dto.detail import DetailResponse
 from api.entities.auth import AuthUser
 from api.repository.auth.abstractions import AuthUserRepository
-from api.repository.auth.mongo import MongoAuthRepository
-
-from api.settings.auth import Settings, settings_instance
+from api.repository.revocation.abstractions import TokenRevocationRepository
+from api.settings.auth import JWTSettings
 from api.utils.auth import create_access_token, create_refresh_token, decode_token
 
 
 router = APIRouter(prefix="/api/v1/auth", tags=["auth"])
 
 
-@lru_cache()
-def auth_repository(settings: Settings = Depends(settings_instance)):
+def auth_repository(request: Request) -> AuthUserRepository:
     """
-    Creates a singleton instance of Auth Repository Dependency
+    Returns the application scoped Auth Repository built in the app lifespan
     """
-    return MongoAuthRepository(
-        connection_string=settings.mongo_connection_string,
-        database=settings.mongo_database_name,
-    )
+    return request.app.state.repositories.auth
 
 
-@lru_cache()
-def redis_instance(settings: Settings = Depends(settings_instance)):
+def revocation_repository(request: Request) -> TokenRevocationRepository:
     """
-    Creates a singleton instance of Redis Dependency
+    Returns the application scoped Token Revocation Repository built in the app lifespan
     """
-    return Redis(
-        host=settings.redis_host,
-        port=settings.redis_port,
-        db=settings.redis_db,
-    )
+    return request.app.state.repositories.revocations
 
 
 @router.post(
@@ -134,16 +124,14 @@ async def login_user(
 )
 async def refresh_token(
     refresh_token: str = Form(),
-    redis_client: Redis = Depends(redis_instance),
+    revocations: TokenRevocationRepository = Depends(revocation_repository),
 ):
     """
     Refresh the access token
     """
 
     # Validate the refresh token
-    if redis_client.exists("token_blacklist") and redis_client.sismember(
-        "token_blacklist", refresh_token
-    ):
+    if await revocations.is_revoked(refresh_token):
         return JSONResponse(
             status_code=HTTPStatus.UNAUTHORIZED,
             content=jsonable_encoder(DetailResponse(message="Invalid refresh token")),
@@ -174,7 +162,7 @@ async def refresh_token(
     # Rotating the refresh token:
 
     # 1. Revoke the existing refresh token
-    redis_client.sadd("token_blacklist", refresh_token)
+    await revocations.revoke(refresh_token, expires_at=expiry)
     # 2. Generate a new refresh token
     new_refresh_token = create_refresh_token(username=username)
 
@@ -201,27 +189,43 @@ async def refresh_token(
 async def logout_user(
     authorization: str = Header(...),
     refresh_token: str = Form(...),
-    redis_client: Redis = Depends(redis_instance),
+    revocations: TokenRevocationRepository = Depends(revocation_repository),
 ):
     """
     Logout a user
     """
 
     # Validate the refresh token
-    if redis_client.exists("token_blacklist") and redis_client.sismember(
-        "token_blacklist", refresh_token
-    ):
+    if await revocations.is_revoked(refresh_token):
         return JSONResponse(
             status_code=HTTPStatus.UNAUTHORIZED,
             content=jsonable_encoder(DetailResponse(message="Invalid refresh token")),
         )
 
-    # Revoke the refresh token
-    redis_client.sadd("token_blacklist", refresh_token)
-
-    # Revoke the access token
+    # Reading the expiry of both tokens, the access token has already been
+    # validated by the middleware
     access_token = authorization.split(" ")[1]
-    redis_client.sadd("token_blacklist", access_token)
+    try:
+        refresh_expiry = decode_token(refresh_token).get("exp")
+        access_expiry = decode_token(access_token).get("exp")
+    except JWTError:
+        return JSONResponse(
+            status_code=HTTPStatus.UNAUTHORIZED,
+            content=jsonable_encoder(DetailResponse(message="Invalid token")),
+        )
+
+    # Tokens without an expiry are revoked for the lifetime they would be issued with
+    jwtsettings = JWTSettings.get_settings()
+    now = int(time.time())
+    if refresh_expiry is None:
+        refresh_expiry = now + jwtsettings.REFRESH_TOKEN_EXPIRE_MINUTES * 60
+    if access_expiry is None:
+        access_expiry = now + jwtsettings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+
+    # Revoke the refresh and access tokens in one round trip
+    await revocations.revoke_many(
+        {refresh_token: refresh_expiry, access_token: access_expiry}
+    )
 
     # Return the response
     return JSONResponse(
@@ -1,36 +1,47 @@
 import uuid
 from collections import namedtuple
-from functools import lru_cache
 from http import HTTPStatus
+from typing import AsyncIterator, List, Optional
 
-from fastapi import APIRouter, Body, Depends, Path, Query, Response
+import orjson
+from fastapi import APIRouter, Body, Depends, Header, Path, Query, Request, Response
 from fastapi.encoders import jsonable_encoder
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse, StreamingResponse
 
 from api.dto.detail import DetailResponse
 from api.dto.movie import (
+    BatchGetMoviesBody,
+    BatchGetMoviesResponse,
+    BulkCreateMoviesBody,
+    BulkDeleteMoviesBody,
+    BulkItemResponse,
+    BulkOperationResponse,
+    BulkUpdateMoviesBody,
     CreateMovieBody,
     MovieCreatedResponse,
     MovieResponse,
     UpdateMovieBody,
 )
 from api.entities.movie import Movie
-from api.repository.movie.abstractions import MovieRepository, RepositoryException
-from api.repository.movie.mongo import MongoMovieRepository
-from api.settings.movie import Settings, settings_instance
+from api.repository.movie.abstractions import (
+    SEARCH_SORT_FIELDS,
+    BulkItemResult,
+    MovieRepository,
+    RepositoryException,
+)
+from api.utils.conditional import conditional_headers, is_not_modified, movies_etag
+from api.utils.pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor
 
 router = APIRouter(prefix="/api/v1/movies", tags=["movies"])
 
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
 
-@lru_cache()
-def movie_repository(settings: Settings = Depends(settings_instance)):
+def movie_repository(request: Request) -> MovieRepository:
     """
-    Creates a singleton instance of Movie Repository Dependency
+    Returns the application scoped Movie Repository built in the app lifespan
     """
-    return MongoMovieRepository(
-        connection_string=settings.mongo_connection_string,
-        database=settings.mongo_database_name,
-    )
+    return request.app.state.repositories.movies
 
 
 def pagination_params(
@@ -43,6 +54,56 @@ def pagination_params(
     return namedtuple("Pagination", ["skip", "limit"])(skip, limit)
 
 
+def movie_payload(movie: Movie) -> dict:
+    """
+    Converts a movie to the MovieResponse shape without building the model
+
+    Responses made of these payloads are encoded by orjson directly, skipping
+    the response_model validation and jsonable_encoder pass
+    """
+    return {
+        "id": movie.id,
+        "title": movie.title,
+        "description": movie.description,
+        "released_year": movie.released_year,
+        "watched": movie.watched,
+    }
+
+
+async def ndjson_lines(movies: AsyncIterator[Movie]) -> AsyncIterator[bytes]:
+    """
+    Serializes movies to newline delimited JSON as they are produced
+    """
+    async for movie in movies:
+        yield orjson.dumps(movie_payload(movie)) + b"\n"
+
+
+def duplicate_ids_response(movie_ids: List[str]) -> Optional[JSONResponse]:
+    """
+    Returns a bad request response when an id is given more than once
+
+    Each id gets exactly one result, whatever the backend
+    """
+    if len(set(movie_ids)) == len(movie_ids):
+        return None
+    return JSONResponse(
+        status_code=HTTPStatus.BAD_REQUEST.value,
+        content=jsonable_encoder(DetailResponse(message="Duplicate movie ids")),
+    )
+
+
+def bulk_operation_response(results: List[BulkItemResult]) -> BulkOperationResponse:
+    """
+    Converts the repository bulk results to the response model
+    """
+    return BulkOperationResponse(
+        results=[
+            BulkItemResponse(id=result.id, status=result.status, message=result.message)
+            for result in results
+        ]
+    )
+
+
 @router.post("/", status_code=HTTPStatus.CREATED, response_model=MovieCreatedResponse)
 async def create_movie(
     movie: CreateMovieBody = Body(..., title="my_title", description="my_description"),
@@ -66,6 +127,212 @@ async def create_movie(
     return MovieCreatedResponse(id=movie_id)
 
 
+# The bulk and search routes are declared before the /{movie_id} ones so that
+# "bulk" and "search" are never captured as movie ids
+@router.post("/bulk", response_model=BulkOperationResponse)
+async def bulk_create_movies(
+    body: BulkCreateMoviesBody = Body(
+        ..., title="Movies", description="The movies to be created"
+    ),
+    repo: MovieRepository = Depends(movie_repository),
+):
+    """
+    Creates many movies in one request and reports the outcome of each one
+    """
+    results = await repo.bulk_create(
+        movies=[
+            Movie(
+                movie_id=str(uuid.uuid4()),
+                title=movie.title,
+                description=movie.description,
+                released_year=movie.released_year,
+                watched=movie.watched,
+            )
+            for movie in body.movies
+        ]
+    )
+    return bulk_operation_response(results)
+
+
+@router.patch(
+    "/bulk",
+    response_model=BulkOperationResponse,
+    responses={HTTPStatus.BAD_REQUEST.value: {"model": DetailResponse}},
+)
+async def bulk_update_movies(
+    body: BulkUpdateMoviesBody = Body(
+        ..., title="Updates", description="The ids and parameters to be updated"
+    ),
+    repo: MovieRepository = Depends(movie_repository),
+):
+    """
+    Updates many movies in one request and reports the outcome of each one
+    """
+    duplicates = duplicate_ids_response([movie.id for movie in body.movies])
+    if duplicates is not None:
+        return duplicates
+
+    results = await repo.bulk_update(
+        update_parameters={
+            movie.id: movie.dict(exclude={"id"}, exclude_unset=True, exclude_none=True)
+            for movie in body.movies
+        }
+    )
+    return bulk_operation_response(results)
+
+
+@router.delete(
+    "/bulk",
+    response_model=BulkOperationResponse,
+    responses={HTTPStatus.BAD_REQUEST.value: {"model": DetailResponse}},
+)
+async def bulk_delete_movies(
+    body: BulkDeleteMoviesBody = Body(
+        ..., title="Ids", description="The ids of the movies to be deleted"
+    ),
+    repo: MovieRepository = Depends(movie_repository),
+):
+    """
+    Deletes many movies in one request and reports the outcome of each one
+    """
+    duplicates = duplicate_ids_response(body.ids)
+    if duplicates is not None:
+        return duplicates
+
+    results = await repo.bulk_delete(movie_ids=body.ids)
+    return bulk_operation_response(results)
+
+
+@router.post("/batch-get", response_model=BatchGetMoviesResponse)
+async def batch_get_movies(
+    body: BatchGetMoviesBody = Body(
+        ..., title="Ids", description="The ids of the movies to be returned"
+    ),
+    repo: MovieRepository = Depends(movie_repository),
+):
+    """
+    Returns many movies by id in one request, in the requested order, along
+    with the ids that were not found
+    """
+    movie_ids = list(dict.fromkeys(body.ids))
+    found = await repo.get_many(movie_ids=movie_ids)
+    return ORJSONResponse(
+        content={
+            "movies": [
+                movie_payload(found[movie_id])
+                for movie_id in movie_ids
+                if movie_id in found
+            ],
+            "missing": [movie_id for movie_id in movie_ids if movie_id not in found],
+        }
+    )
+
+
+@router.get(
+    "/search",
+    response_model=list[MovieResponse],
+    responses={HTTPStatus.BAD_REQUEST.value: {"model": DetailResponse}},
+)
+async def search_movies(
+    title: Optional[str] = Query(
+        None, title="Title", description="The title of the movies", min_length=3
+    ),
+    released_year: Optional[int] = Query(
+        None, title="Released Year", description="The release year of the movies"
+    ),
+    watched: Optional[bool] = Query(
+        None, title="Watched", description="Whether the movies were watched"
+    ),
+    sort: str = Query(
+        "id",
+        title="Sort",
+        description="The field the movies are ordered by, then by id",
+        regex=f"^({'|'.join(SEARCH_SORT_FIELDS)})$",
+    ),
+    limit: int = Query(1000, title="Limit", description="The page size", ge=0, le=1000),
+    cursor: Optional[str] = Query(
+        None,
+        title="Cursor",
+        description=f"The {NEXT_CURSOR_HEADER} header of the previous page",
+    ),
+    repo: MovieRepository = Depends(movie_repository),
+):
+    """
+    Returns the movies matching every given filter
+
+    Filtering happens in the repository on its indexes, a full page sets the
+    X-Next-Cursor header to pass back as cursor with the same filters and sort
+    """
+    filters = {
+        field: value
+        for field, value in (
+            ("title", title),
+            ("released_year", released_year),
+            ("watched", watched),
+        )
+        if value is not None
+    }
+
+    after = None
+    if cursor is not None:
+        try:
+            decoded = decode_cursor(cursor)
+        except ValueError:
+            decoded = None
+        # Cursors carry their sort field, a page cannot resume another ordering
+        if (
+            not isinstance(decoded, list)
+            or len(decoded) != 3
+            or decoded[0] != sort
+            or not isinstance(
+                decoded[1], (int if sort == "released_year" else str, type(None))
+            )
+            or not isinstance(decoded[2], str)
+        ):
+            return JSONResponse(
+                status_code=HTTPStatus.BAD_REQUEST.value,
+                content=jsonable_encoder(DetailResponse(message="Invalid cursor")),
+            )
+        after = (decoded[1], decoded[2])
+
+    movies = await repo.search(filters=filters, sort=sort, limit=limit, cursor=after)
+
+    headers = {}
+    if limit and len(movies) == limit:
+        last = movies[-1]
+        headers[NEXT_CURSOR_HEADER] = encode_cursor(
+            [sort, getattr(last, sort), last.id]
+        )
+    return ORJSONResponse(
+        content=[movie_payload(movie) for movie in movies], headers=headers
+    )
+
+
+@router.get("/search/text", response_model=list[MovieResponse])
+async def text_search_movies(
+    q: str = Query(
+        ...,
+        title="Query",
+        description="The words to look for in titles and descriptions",
+        min_length=2,
+    ),
+    prefix: bool = Query(
+        True,
+        title="Prefix",
+        description="Whether the last word may be incomplete, for type-ahead",
+    ),
+    limit: int = Query(20, title="Limit", description="The page size", ge=1, le=100),
+    repo: MovieRepository = Depends(movie_repository),
+):
+    """
+    Returns the movies holding every word of q, best matches first
+
+    Title matches rank above description ones
+    """
+    movies = await repo.text_search(query=q, prefix=prefix, limit=limit)
+    return ORJSONResponse(content=[movie_payload(movie) for movie in movies])
+
+
 @router.get(
     "/{movie_id}",
     responses={
@@ -74,13 +341,20 @@ async def create_movie(
             "model": DetailResponse,
             "description": "Movie not found",
         },
+        HTTPStatus.NOT_MODIFIED.value: {"description": "Movie not modified"},
     },
 )
 async def get_movie_by_id(
-    movie_id: str, repo: MovieRepository = Depends(movie_repository)
+    movie_id: str,
+    if_none_match: Optional[str] = Header(None),
+    if_modified_since: Optional[str] = Header(None),
+    repo: MovieRepository = Depends(movie_repository),
 ):
     """
     Returns a movie by id if found, otherwise returns None
+
+    The response carries ETag and Last-Modified, sending them back in
+    If-None-Match or If-Modified-Since answers 304 while the movie is unchanged
     """
     movie = await repo.get_by_id(movie_id=movie_id)
     if movie is None:
@@ -90,38 +364,87 @@ async def get_movie_by_id(
                 DetailResponse(message=f"Movie with id {movie_id} not found")
             ),
         )
-    return MovieResponse(
-        id=movie.id,
-        title=movie.title,
-        description=movie.description,
-        released_year=movie.released_year,
-        watched=movie.watched,
-    )
 
+    etag = movies_etag([movie])
+    headers = conditional_headers(etag, movie.updated_at)
+    if is_not_modified(etag, movie.updated_at, if_none_match, if_modified_since):
+        return Response(status_code=HTTPStatus.NOT_MODIFIED.value, headers=headers)
+    return ORJSONResponse(content=movie_payload(movie), headers=headers)
 
-@router.get("/", response_model=list[MovieResponse])
+
+@router.get(
+    "/",
+    response_model=list[MovieResponse],
+    responses={
+        HTTPStatus.OK.value: {"content": {NDJSON_MEDIA_TYPE: {}}},
+        HTTPStatus.BAD_REQUEST.value: {"model": DetailResponse},
+        HTTPStatus.NOT_MODIFIED.value: {"description": "Movies not modified"},
+    },
+)
 async def get_movie_by_title(
     title: str = Query(
         ..., title="Title", description="The title of the movie", min_length=3
     ),
     pagination: namedtuple = Depends(pagination_params),
+    cursor: Optional[str] = Query(
+        None,
+        title="Cursor",
+        description=f"The {NEXT_CURSOR_HEADER} header of the previous page, replaces skip",
+    ),
+    accept: Optional[str] = Header(None),
+    if_none_match: Optional[str] = Header(None),
     repo: MovieRepository = Depends(movie_repository),
 ):
-    movies = await repo.get_by_title(
-        title=title, skip=pagination.skip, limit=pagination.limit
-    )
-    movie_return_value = []
-    for movie in movies:
-        movie_return_value.append(
-            MovieResponse(
-                id=movie.id,
-                title=movie.title,
-                description=movie.description,
-                released_year=movie.released_year,
-                watched=movie.watched,
+    """
+    Returns the movies sharing a title, ordered by id
+
+    A full page sets the X-Next-Cursor header, pass it back as cursor to fetch
+    the next page at the same cost as the first one
+
+    With Accept: application/x-ndjson and no cursor the movies are streamed
+    one per line as they are read from the database
+
+    Other pages carry an ETag and answer If-None-Match with 304 while the set
+    of movies and their versions is unchanged. They send no Last-Modified, a
+    movie leaving the page would not move it forward
+    """
+    if cursor is None and accept is not None and NDJSON_MEDIA_TYPE in accept:
+        return StreamingResponse(
+            ndjson_lines(
+                repo.iter_by_title(
+                    title=title, skip=pagination.skip, limit=pagination.limit
+                )
+            ),
+            media_type=NDJSON_MEDIA_TYPE,
+        )
+
+    if cursor is not None:
+        try:
+            after_id = decode_cursor(cursor)
+        except ValueError:
+            after_id = None
+        if not isinstance(after_id, str):
+            return JSONResponse(
+                status_code=HTTPStatus.BAD_REQUEST.value,
+                content=jsonable_encoder(DetailResponse(message="Invalid cursor")),
             )
+        movies = await repo.get_by_title_after(
+            title=title, after_id=after_id, limit=pagination.limit
         )
-    return movie_return_value
+    else:
+        movies = await repo.get_by_title(
+            title=title, skip=pagination.skip, limit=pagination.limit
+        )
+
+    etag = movies_etag(movies)
+    headers = conditional_headers(etag, None)
+    if pagination.limit and len(movies) == pagination.limit:
+        headers[NEXT_CURSOR_HEADER] = encode_cursor(movies[-1].id)
+    if is_not_modified(etag, None, if_none_match, None):
+        return Response(status_code=HTTPStatus.NOT_MODIFIED.value, headers=headers)
+    return ORJSONResponse(
+        content=[movie_payload(movie) for movie in movies], headers=headers
+    )
 
 
 @router.patch(
@@ -1,108 +1,170 @@
-from functools import lru_cache
-from fastapi import Depends, HTTPException
-from http import HTTPStatus
-from jose import jwt, JWTError
+import time
 from datetime import datetime
-from redis import Redis
+from http import HTTPStatus
+from typing import Optional, Tuple
+
+from jose import JWTError
+from starlette.datastructures import Headers
 from starlette.middleware import Middleware
-from starlette.requests import Request
-from starlette.responses import JSONResponse
-from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.middleware.cors import CORSMiddleware
 from starlette.middleware.httpsredirect import HTTPSRedirectMiddleware
-from starlette_prometheus import PrometheusMiddleware
-
-from api.middleware.protected_routes import PROTECTED_ROUTES
-from api.repository.auth.mongo import MongoAuthRepository
-from api.settings.auth import settings_instance
+from starlette.responses import JSONResponse
+from starlette.routing import Match
+from starlette.status import HTTP_500_INTERNAL_SERVER_ERROR
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from starlette_prometheus.middleware import (
+    EXCEPTIONS,
+    REQUESTS,
+    REQUESTS_IN_PROGRESS,
+    REQUESTS_PROCESSING_TIME,
+    RESPONSES,
+)
+
+from api.middleware.protected_routes import PROTECTED_ROUTES, RouteMatcher
 from api.utils.auth import decode_token
+from api.utils.cache import principal_cache
+from api.utils.metrics import CACHE_REQUESTS
+from api.utils.pagination import NEXT_CURSOR_HEADER
 
 
-@lru_cache()
-def auth_repository():
-    """
-    Creates a singleton instance of Auth Repository Dependency
+class AuthenticatedMiddleware:
     """
-    settings = settings_instance()
-    return MongoAuthRepository(
-        connection_string=settings.mongo_connection_string,
-        database=settings.mongo_database_name,
-    )
+    Rejects requests to protected routes without a valid access token
 
+    A plain ASGI middleware, unprotected requests are passed straight through
+    and responses, streaming ones included, are never buffered or wrapped
+    """
 
-@lru_cache()
-def redis_instance():
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.principals = principal_cache()
+        # Compiled once, matching costs a walk over the request path
+        self.protected_routes = RouteMatcher(PROTECTED_ROUTES)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or not self.protected_routes.matches(
+            scope["method"], scope["path"]
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        error = await self.authenticate(scope)
+        if error is not None:
+            response = JSONResponse(
+                status_code=HTTPStatus.UNAUTHORIZED, content={"message": error}
+            )
+            await response(scope, receive, send)
+            return
+
+        await self.app(scope, receive, send)
+
+    async def authenticate(self, scope: Scope) -> Optional[str]:
+        """
+        Returns why the request is not authenticated, None if it is
+        """
+        # Check if the request has an Authorization header
+        auth_header = Headers(scope=scope).get("Authorization")
+        if not auth_header or not auth_header.startswith("Bearer "):
+            return "Invalid Authorization header"
+
+        # Extracting the token from the header
+        token = auth_header.split(" ")[1]
+
+        # Repositories are application scoped, built in the app lifespan
+        repositories = scope["app"].state.repositories
+
+        # Checking if the token has been revoked
+        if await repositories.revocations.is_revoked(token):
+            return "Invalid token"
+
+        # Decoding the token
+        try:
+            payload = decode_token(token)
+        except JWTError:
+            return "Invalid token"
+        username: str = payload.get("sub")
+        expiry: int = payload.get("exp")
+
+        # Checking if the token is expired
+        if expiry is None or datetime.utcfromtimestamp(expiry) < datetime.utcnow():
+            return "Token expired"
+
+        # Checking if username is there in the authe database, known
+        # usernames are cached and invalidated by the auth repository
+        if self.principals.get(username) is not None:
+            CACHE_REQUESTS.labels(cache="principal", result="hit").inc()
+        else:
+            CACHE_REQUESTS.labels(cache="principal", result="miss").inc()
+            if await repositories.auth.get_user(username=username) is None:
+                return "Invalid token"
+            self.principals.set(username, True)
+        return None
+
+
+class PrometheusMiddleware:
     """
-    Creates a singleton instance of Redis Dependency
+    Plain ASGI port of starlette_prometheus' middleware
+
+    Records into the same metric objects, so /metrics keeps exporting the
+    starlette_* series, without the per request task and memory streams of
+    BaseHTTPMiddleware. Processing time covers the whole response body.
     """
-    settings = settings_instance()
-    return Redis(
-        host=settings.redis_host,
-        port=settings.redis_port,
-        db=settings.redis_db,
-    )
-
-
-class AuthenticatedMiddleware(BaseHTTPMiddleware):
-    def __init__(self, app):
-        super().__init__(app)
-        self.repo = auth_repository()
-        self.blacklist = redis_instance()
-
-    async def dispatch(self, request: Request, call_next):
-        # Check if the route requires protection
-        if request.url.path in PROTECTED_ROUTES:
-            # Check if the request has an Authorization header
-            auth_header = request.headers.get("Authorization")
-            if not auth_header or not auth_header.startswith("Bearer "):
-                return JSONResponse(
-                    status_code=HTTPStatus.UNAUTHORIZED,
-                    content={"message": "Invalid Authorization header"},
-                )
-
-            # Extracting the token from the header
-            token = auth_header.split(" ")[1]
-
-            # Checking if the token is blacklisted
-            if self.blacklist.exists("token_blacklist") and self.blacklist.sismember(
-                "token_blacklist", token
-            ):
-                return JSONResponse(
-                    status_code=HTTPStatus.UNAUTHORIZED,
-                    content={"message": "Invalid token"},
-                )
-
-            # Decoding the token
-            try:
-                payload = decode_token(token)
-                username: str = payload.get("sub")
-                expiry: int = payload.get("exp")
-
-                # Checking if the token is expired
-                if (
-                    expiry is None
-                    or datetime.utcfromtimestamp(expiry) < datetime.utcnow()
-                ):
-                    return JSONResponse(
-                        status_code=HTTPStatus.UNAUTHORIZED,
-                        content={"message": "Token expired"},
-                    )
-
-                # Checking if username is there in the authe database
-                if await self.repo.get_user(username=username) is None:
-                    return JSONResponse(
-                        status_code=HTTPStatus.UNAUTHORIZED,
-                        content={"message": "Invalid token"},
-                    )
-
-            except JWTError:
-                return JSONResponse(
-                    status_code=HTTPStatus.UNAUTHORIZED,
-                    content={"message": "Invalid token"},
-                )
-
-        response = await call_next(request)
-        return response
+
+    def __init__(self, app: ASGIApp, filter_unhandled_paths: bool = False):
+        self.app = app
+        self.filter_unhandled_paths = filter_unhandled_paths
+
+    @staticmethod
+    def get_path_template(scope: Scope) -> Tuple[str, bool]:
+        for route in scope["app"].routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return route.path, True
+        return scope["path"], False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        path_template, is_handled_path = self.get_path_template(scope)
+        if self.filter_unhandled_paths and not is_handled_path:
+            await self.app(scope, receive, send)
+            return
+
+        status_code = HTTP_500_INTERNAL_SERVER_ERROR
+
+        async def send_wrapper(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        REQUESTS_IN_PROGRESS.labels(method=method, path_template=path_template).inc()
+        REQUESTS.labels(method=method, path_template=path_template).inc()
+        before_time = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except BaseException as e:
+            status_code = HTTP_500_INTERNAL_SERVER_ERROR
+            EXCEPTIONS.labels(
+                method=method,
+                path_template=path_template,
+                exception_type=type(e).__name__,
+            ).inc()
+            raise
+        else:
+            REQUESTS_PROCESSING_TIME.labels(
+                method=method, path_template=path_template
+            ).observe(time.perf_counter() - before_time)
+        finally:
+            RESPONSES.labels(
+                method=method, path_template=path_template, status_code=status_code
+            ).inc()
+            REQUESTS_IN_PROGRESS.labels(
+                method=method, path_template=path_template
+            ).dec()
 
 
 # The middleware is added to the app in api\api.py:
@@ -113,6 +175,7 @@ middleware = [
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=[NEXT_CURSOR_HEADER],
     ),
     Middleware(PrometheusMiddleware),
     # Middleware(HTTPSRedirectMiddleware),
@@ -1,5 +1,97 @@
+from typing import Dict, FrozenSet, Iterable, NamedTuple, Optional
+
+# Stands for every method but OPTIONS, CORS preflight requests carry no token
+ANY_METHOD = "*"
+
+
+class ProtectedRoute(NamedTuple):
+    """
+    A path requiring a valid access token
+
+    path may hold {parameter} segments matching any single segment, prefix
+    protects the path and everything below it, methods defaults to all
+    """
+
+    path: str
+    methods: Optional[FrozenSet[str]] = None
+    prefix: bool = False
+
+
 PROTECTED_ROUTES = [
-    "/api/v1/movies/",
-    "/api/v1/auth/logout",
-    "/api/v1/auth/refresh",
+    ProtectedRoute("/api/v1/movies", prefix=True),
+    ProtectedRoute("/api/v1/auth/logout"),
+    ProtectedRoute("/api/v1/auth/refresh"),
 ]
+
+
+class _Node:
+    __slots__ = ("children", "parameter", "exact", "prefix")
+
+    def __init__(self):
+        self.children: Dict[str, "_Node"] = {}
+        self.parameter: Optional["_Node"] = None
+        # Methods protected on this exact path and on everything below it
+        self.exact = set()
+        self.prefix = set()
+
+
+def _allows(methods: set, method: str) -> bool:
+    if not methods:
+        return False
+    if method in methods:
+        return True
+    if method == "HEAD" and "GET" in methods:
+        return True
+    return method != "OPTIONS" and ANY_METHOD in methods
+
+
+class RouteMatcher:
+    """
+    Protected routes compiled into a trie of path segments
+
+    Matching walks the request path once, only backtracking where a literal
+    segment and a template parameter share a position
+    """
+
+    def __init__(self, routes: Iterable[ProtectedRoute]):
+        self._root = _Node()
+        for route in routes:
+            self.add(route)
+
+    def add(self, route: ProtectedRoute):
+        path = route.path.rstrip("/") if route.prefix else route.path
+        node = self._root
+        for segment in path.split("/"):
+            if segment.startswith("{") and segment.endswith("}"):
+                if node.parameter is None:
+                    node.parameter = _Node()
+                node = node.parameter
+            else:
+                node = node.children.setdefault(segment, _Node())
+
+        methods = (
+            {ANY_METHOD}
+            if route.methods is None
+            else {method.upper() for method in route.methods}
+        )
+        (node.prefix if route.prefix else node.exact).update(methods)
+
+    def matches(self, method: str, path: str) -> bool:
+        return self._match(self._root, path.split("/"), 0, method.upper())
+
+    def _match(self, node: _Node, segments: list, index: int, method: str) -> bool:
+        if _allows(node.prefix, method):
+            return True
+        if index == len(segments):
+            return _allows(node.exact, method)
+
+        segment = segments[index]
+        child = node.children.get(segment)
+        if child is not None and self._match(child, segments, index + 1, method):
+            return True
+        # Template parameters never match an empty segment
+        return (
+            node.parameter is not None
+            and segment != ""
+            and self._match(node.parameter, segments, index + 1, method)
+        )
@@ -9,6 +9,15 @@ class RepositoryException(Exception):
 
 
 class AuthUserRepository(abc.ABC):
+    async def initialize(self):
+        """
+        Prepares the backend once at application startup
+
+        Raises RepositoryException if the backend is not usable
+
+        """
+        return None
+
     async def create(self, authuser: AuthUser):
         """
         Creates a authuser profile and returns true on success
@@ -1,10 +1,11 @@
-from typing import List, Optional
+from typing import Dict, List, Optional
 
-from passlib.context import CryptContext
 from pydantic import ValidationError
 
 from api.entities.auth import AuthUser
 from api.repository.auth.abstractions import RepositoryException, AuthUserRepository
+from api.utils.cache import principal_cache
+from api.utils.password import password_hasher
 
 
 class MemoryAuthRepository(AuthUserRepository):
@@ -16,38 +17,52 @@ class MemoryAuthRepository(AuthUserRepository):
 
     def __init__(self):
         self._storage = {}
-        self._pwd_context = CryptContext(schemes=["bcrypt"])
+        # Secondary index: username -> user_id
+        self._usernames: Dict[str, str] = {}
+        # Hashing runs on a bounded worker pool, off the event loop
+        self._hasher = password_hasher()
+        # Usernames cached by the auth middleware, dropped when a user changes
+        self._principals = principal_cache()
+
+    def _ensure_username_available(self, username: str):
+        if username in self._usernames:
+            raise RepositoryException(f"User with username {username} already exists")
 
     async def create(self, authuser: AuthUser):
-        authuser._password = self._pwd_context.hash(authuser.password)
-        for stored_user in self._storage.values():
-            if authuser.username == stored_user.username:
-                raise RepositoryException(
-                    f"User with username {authuser.username} already exists"
-                )
+        # Rejecting duplicates before paying for a bcrypt round
+        self._ensure_username_available(authuser.username)
+        hashed_password = await self._hasher.hash(authuser.password)
+        # Checking again as another registration may have won while hashing
+        self._ensure_username_available(authuser.username)
+
+        authuser._password = hashed_password
+        replaced_user = self._storage.get(authuser.user_id)
+        if replaced_user is not None:
+            self._usernames.pop(replaced_user.username, None)
         self._storage[authuser.user_id] = authuser
+        self._usernames[authuser.username] = authuser.user_id
 
     async def get_user(self, username: str) -> Optional[AuthUser]:
-        for authuser in self._storage.values():
-            if authuser.username == username:
-                return authuser
-        return None
+        user_id = self._usernames.get(username)
+        if user_id is None:
+            return None
+        return self._storage.get(user_id)
 
     async def verify_account(self, username: str, password: str) -> bool:
         stored_user = await self.get_user(username)
         if stored_user is None:
             raise RepositoryException(f"User with username {username} not found")
 
-        if not self._pwd_context.verify(password, stored_user.password):
+        if not await self._hasher.verify(password, stored_user.password):
             raise RepositoryException("Invalid password")
         else:
             return True
 
     async def delete(self, username: str):
-        for stored_user in self._storage.values():
-            if username == stored_user.username:
-                self._storage.pop(stored_user.user_id, None)
-                return
+        user_id = self._usernames.pop(username, None)
+        if user_id is not None:
+            self._storage.pop(user_id, None)
+            self._principals.invalidate(username)
 
     async def update(self, authuser: AuthUser, update_parameters: dict):
         try:
@@ -58,17 +73,29 @@ class MemoryAuthRepository(AuthUserRepository):
             raise e
 
         stored_user = await self.get_user(authuser.username)
-        for key, value in update_parameters.items():
-            if key == "user_id":
-                raise RepositoryException("Cannot update user id")
-
-            if key == "password":
-                if self._pwd_context.verify(value, stored_user.password):
-                    raise RepositoryException(
-                        "New password cannot be the same as the old one"
-                    )
-                value = self._pwd_context.hash(value)
-
-            # Check that update parameters are fields from User Entity
-            if hasattr(stored_user, key):
-                setattr(stored_user, f"_{key}", value)
+        new_username = update_parameters.get("username", stored_user.username)
+        if new_username != stored_user.username:
+            self._ensure_username_available(new_username)
+
+        self._principals.invalidate(authuser.username)
+        try:
+            for key, value in update_parameters.items():
+                if key == "user_id":
+                    raise RepositoryException("Cannot update user id")
+
+                if key == "password":
+                    if await self._hasher.verify(value, stored_user.password):
+                        raise RepositoryException(
+                            "New password cannot be the same as the old one"
+                        )
+                    value = await self._hasher.hash(value)
+
+                # Check that update parameters are fields from User Entity
+                if hasattr(stored_user, key):
+                    setattr(stored_user, f"_{key}", value)
+        finally:
+            # Keeping the username index in line with a renamed user, even
+            # when a later parameter is rejected
+            if stored_user.username != authuser.username:
+                self._usernames.pop(authuser.username, None)
+                self._usernames[stored_user.username] = stored_user.user_id
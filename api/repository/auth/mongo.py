@@ -1,11 +1,20 @@
 from typing import List, Optional
 
 import motor.motor_asyncio
+from pymongo import ASCENDING, IndexModel
 from pymongo.errors import DuplicateKeyError
-from passlib.context import CryptContext
 
 from api.entities.auth import AuthUser
 from api.repository.auth.abstractions import AuthUserRepository, RepositoryException
+from api.repository.mongo_client import mongo_client
+from api.utils.cache import principal_cache
+from api.utils.password import password_hasher
+
+# Indexes the auth collection relies on, created once at application startup
+AUTH_INDEXES = [
+    IndexModel([("username", ASCENDING)], name="username_1", unique=True),
+    IndexModel([("user_id", ASCENDING)], name="user_id_1"),
+]
 
 
 class MongoAuthRepository(AuthUserRepository):
@@ -18,23 +27,40 @@ class MongoAuthRepository(AuthUserRepository):
         self,
         connection_string: str = "mongodb://127.0.0.1:27017",
         database: str = "auth_db",
+        client: Optional[motor.motor_asyncio.AsyncIOMotorClient] = None,
     ):
-        self._client = motor.motor_asyncio.AsyncIOMotorClient(connection_string)
+        # Repositories share the process wide client unless given their own
+        self._client = client if client is not None else mongo_client(connection_string)
         self._database = self._client[database]
         # Auth collection which holds our auth documents
         self._auth = self._database["auth_users"]
-        self._pwd_context = CryptContext(schemes=["bcrypt"])
+        # Hashing runs on a bounded worker pool, off the event loop
+        self._hasher = password_hasher()
+        # Usernames cached by the auth middleware, dropped when a user changes
+        self._principals = principal_cache()
+
+    async def initialize(self) -> dict:
+        """
+        Warms the connection pool and makes sure the auth indexes exist,
+        returns a report of the indexes present on the collection
+
+        Raises RepositoryException if an expected index could not be found
+        """
+        await self._client.admin.command("ping")
+        await self._auth.create_indexes(AUTH_INDEXES)
+        index_information = await self._auth.index_information()
+        for index in AUTH_INDEXES:
+            if index.document["name"] not in index_information:
+                raise RepositoryException(
+                    f"Index {index.document['name']} missing on auth_users collection"
+                )
+        return {name: info["key"] for name, info in index_information.items()}
 
     async def create(self, authuser: AuthUser):
-        await self._auth.create_index("username", unique=True)
-        hashed_password = self._pwd_context.hash(authuser.password)
+        hashed_password = await self._hasher.hash(authuser.password)
         try:
             result = await self._auth.insert_one(
-                {
-                    "user_id": authuser.user_id,
-                    "username": authuser.username,
-                    "password": hashed_password,
-                }
+                {**authuser.to_document(), "password": hashed_password}
             )
         except DuplicateKeyError:
             raise RepositoryException(
@@ -44,17 +70,13 @@ class MongoAuthRepository(AuthUserRepository):
     async def get_user(self, username: str) -> Optional[AuthUser]:
         document = await self._auth.find_one({"username": username})
         if document:
-            return AuthUser(
-                user_id=document.get("user_id"),
-                username=document.get("username"),
-                password=document.get("password"),
-            )
+            return AuthUser.from_document(document)
         return None
 
     async def verify_account(self, username: str, password: str) -> bool:
         document = await self._auth.find_one({"username": username})
         if document:
-            if self._pwd_context.verify(password, document.get("password")):
+            if await self._hasher.verify(password, document.get("password")):
                 return True
             else:
                 raise RepositoryException(f"Password for user {username} is incorrect")
@@ -63,6 +85,7 @@ class MongoAuthRepository(AuthUserRepository):
 
     async def delete(self, username: str):
         await self._auth.delete_one({"username": username})
+        self._principals.invalidate(username)
 
     async def update(self, authuser: AuthUser, update_parameters: dict):
         if "user_id" in update_parameters.keys():
@@ -77,19 +100,20 @@ class MongoAuthRepository(AuthUserRepository):
 
         stored_user = await self.get_user(authuser.username)
         if "password" in update_parameters.keys():
-            if self._pwd_context.verify(
+            if await self._hasher.verify(
                 update_parameters["password"], stored_user.password
             ):
                 raise RepositoryException(
                     "New password cannot be the same as the old password"
                 )
-            update_parameters["password"] = self._pwd_context.hash(
+            update_parameters["password"] = await self._hasher.hash(
                 update_parameters["password"]
             )
 
         result = await self._auth.update_one(
             {"user_id": authuser.user_id}, {"$set": update_parameters}
         )
+        self._principals.invalidate(authuser.username)
 
         if result.modified_count == 0:
             raise RepositoryException(f"User with id {authuser.username} not updated")
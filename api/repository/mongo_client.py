@@ -0,0 +1,24 @@
+from functools import lru_cache
+
+import motor.motor_asyncio
+
+from api.settings.mongo import settings_instance
+
+
+@lru_cache()
+def mongo_client(connection_string: str) -> motor.motor_asyncio.AsyncIOMotorClient:
+    """
+    Creates a singleton Mongo client, and so a single connection pool, per
+    connection string for the whole process
+    """
+    settings = settings_instance()
+    options = {
+        "maxPoolSize": settings.mongo_max_pool_size,
+        "minPoolSize": settings.mongo_min_pool_size,
+        "serverSelectionTimeoutMS": settings.mongo_server_selection_timeout_ms,
+    }
+    if settings.mongo_max_idle_time_ms is not None:
+        options["maxIdleTimeMS"] = settings.mongo_max_idle_time_ms
+    if settings.mongo_compressors:
+        options["compressors"] = settings.mongo_compressors
+    return motor.motor_asyncio.AsyncIOMotorClient(connection_string, **options)
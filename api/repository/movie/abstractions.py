@@ -1,5 +1,5 @@
 import abc
-from typing import List, Optional
+from typing import Any, AsyncIterator, Dict, List, NamedTuple, Optional, Tuple
 
 from api.entities.movie import Movie
 
@@ -8,7 +8,61 @@ class RepositoryException(Exception):
     pass
 
 
+class BulkItemResult(NamedTuple):
+    """
+    Outcome of a single item of a bulk operation
+    """
+
+    id: str
+    status: str
+    message: Optional[str] = None
+
+
+BULK_CREATED = "created"
+BULK_UPDATED = "updated"
+BULK_DELETED = "deleted"
+BULK_NOT_FOUND = "not_found"
+BULK_FAILED = "failed"
+
+# Fields search can filter on, by equality, and sort on, ascending
+SEARCH_FILTER_FIELDS = ("title", "released_year", "watched")
+SEARCH_SORT_FIELDS = ("id", "title", "released_year")
+
+
+def check_search_fields(filters: Dict[str, Any], sort: str):
+    """
+    Raises RepositoryException if search is given fields it does not support
+    """
+    unknown = set(filters) - set(SEARCH_FILTER_FIELDS)
+    if unknown:
+        raise RepositoryException(f"Cannot filter movies on {sorted(unknown)}")
+    if sort not in SEARCH_SORT_FIELDS:
+        raise RepositoryException(f"Cannot sort movies on {sort}")
+
+
+# Fields maintained by the repositories, never given in update parameters
+READ_ONLY_FIELDS = ("id", "version", "updated_at")
+
+
+def check_update_fields(update_parameters: dict):
+    """
+    Raises RepositoryException if update parameters set a read only field
+    """
+    for field in READ_ONLY_FIELDS:
+        if field in update_parameters:
+            raise RepositoryException(f"Cannot update movie {field}")
+
+
 class MovieRepository(abc.ABC):
+    async def initialize(self):
+        """
+        Prepares the backend once at application startup
+
+        Raises RepositoryException if the backend is not usable
+
+        """
+        return None
+
     async def create(self, movie: Movie):
         """
         Creates a movie and returns true on success
@@ -25,6 +79,13 @@ class MovieRepository(abc.ABC):
         """
         return NotImplementedError
 
+    async def get_many(self, movie_ids: List[str]) -> Dict[str, Movie]:
+        """
+        Returns the movies found among movie_ids, keyed by id, in one read
+
+        """
+        return NotImplementedError
+
     async def get_by_title(
         self, title: str, skip: int = 0, limit: int = 1000
     ) -> List[Movie]:
@@ -34,6 +95,57 @@ class MovieRepository(abc.ABC):
         """
         return NotImplementedError
 
+    async def iter_by_title(
+        self, title: str, skip: int = 0, limit: int = 1000
+    ) -> AsyncIterator[Movie]:
+        """
+        Yields the movies sharing the same title one at a time
+
+        Backends able to stream results should override this, the default
+        falls back to get_by_title
+        """
+        for movie in await self.get_by_title(title=title, skip=skip, limit=limit):
+            yield movie
+
+    async def get_by_title_after(
+        self, title: str, after_id: Optional[str] = None, limit: int = 1000
+    ) -> List[Movie]:
+        """
+        Returns a page of movies sharing the same title ordered by id,
+        starting right after after_id (from the first movie when None)
+
+        """
+        return NotImplementedError
+
+    async def search(
+        self,
+        filters: Dict[str, Any],
+        sort: str = "id",
+        limit: int = 1000,
+        cursor: Optional[Tuple[Any, str]] = None,
+    ) -> List[Movie]:
+        """
+        Returns a page of the movies matching every filter, ordered by the
+        sort field then id, starting right after the (sort value, id) cursor
+
+        Raises RepositoryException on unknown filter or sort fields
+
+        """
+        return NotImplementedError
+
+    async def text_search(
+        self, query: str, prefix: bool = True, limit: int = 20
+    ) -> List[Movie]:
+        """
+        Returns the movies whose title or description hold every query token,
+        best ranked first, title matches weighing more than description ones
+
+        With prefix the last token also matches the words it starts, for
+        type-ahead lookups
+
+        """
+        return NotImplementedError
+
     async def delete(self, movie_id: str):
         """
         Deletes a movie by id
@@ -51,3 +163,27 @@ class MovieRepository(abc.ABC):
 
         """
         return NotImplementedError
+
+    async def bulk_create(self, movies: List[Movie]) -> List[BulkItemResult]:
+        """
+        Creates many movies at once and returns the outcome of each one
+
+        """
+        return NotImplementedError
+
+    async def bulk_update(
+        self, update_parameters: Dict[str, dict]
+    ) -> List[BulkItemResult]:
+        """
+        Updates many movies at once, update_parameters maps a movie id to
+        its updates, and returns the outcome of each one
+
+        """
+        return NotImplementedError
+
+    async def bulk_delete(self, movie_ids: List[str]) -> List[BulkItemResult]:
+        """
+        Deletes many movies at once and returns the outcome of each one
+
+        """
+        return NotImplementedError
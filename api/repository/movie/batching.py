@@ -0,0 +1,150 @@
+import asyncio
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from api.entities.movie import Movie
+from api.repository.movie.abstractions import BulkItemResult, MovieRepository
+from api.utils.metrics import MOVIE_BATCH_SIZE
+
+
+def _retrieve_exception(read: asyncio.Future):
+    # Marks the error as retrieved, every caller of the read may have been
+    # cancelled before the batch failed
+    if not read.cancelled():
+        read.exception()
+
+
+class BatchingMovieRepository(MovieRepository):
+    """
+    BatchingMovieRepository merges concurrent reads by id into get_many calls.
+
+    The first get_by_id of a batch opens a short window on the event loop, the
+    ids requested until it closes, or until max_size distinct ids are pending,
+    are read with a single get_many and every caller gets its own movie back.
+    Callers asking for the same id share one lookup. Everything else is passed
+    through to the wrapped repository.
+
+    """
+
+    def __init__(
+        self,
+        repository: MovieRepository,
+        window: float = 0.001,
+        max_size: int = 1000,
+    ):
+        self._repository = repository
+        self._window = window
+        self._max_size = max_size
+        # Ids of the batch being collected and the futures of their callers
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+        # Dispatched batches, referenced until they complete
+        self._batches: set = set()
+
+    def _dispatch(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        pending, self._pending = self._pending, {}
+        if not pending:
+            return
+        batch = asyncio.ensure_future(self._load(pending))
+        self._batches.add(batch)
+        batch.add_done_callback(self._batches.discard)
+
+    async def _load(self, pending: Dict[str, asyncio.Future]):
+        MOVIE_BATCH_SIZE.observe(len(pending))
+        try:
+            movies = await self._repository.get_many(movie_ids=list(pending))
+        except asyncio.CancelledError:
+            for read in pending.values():
+                read.cancel()
+            raise
+        except Exception as e:
+            for read in pending.values():
+                if not read.done():
+                    read.set_exception(e)
+            return
+        for movie_id, read in pending.items():
+            if not read.done():
+                read.set_result(movies.get(movie_id))
+
+    async def initialize(self):
+        return await self._repository.initialize()
+
+    async def create(self, movie: Movie):
+        await self._repository.create(movie=movie)
+
+    async def get_by_id(self, movie_id: str) -> Optional[Movie]:
+        read = self._pending.get(movie_id)
+        if read is None:
+            read = asyncio.get_running_loop().create_future()
+            read.add_done_callback(_retrieve_exception)
+            self._pending[movie_id] = read
+            if len(self._pending) >= self._max_size:
+                self._dispatch()
+            elif self._timer is None:
+                self._timer = asyncio.get_running_loop().call_later(
+                    self._window, self._dispatch
+                )
+        # Shielded so a cancelled caller does not fail the others sharing the read
+        return await asyncio.shield(read)
+
+    async def get_many(self, movie_ids: List[str]) -> Dict[str, Movie]:
+        return await self._repository.get_many(movie_ids=movie_ids)
+
+    async def get_by_title(
+        self, title: str, skip: int = 0, limit: int = 1000
+    ) -> List[Movie]:
+        return await self._repository.get_by_title(title=title, skip=skip, limit=limit)
+
+    async def iter_by_title(
+        self, title: str, skip: int = 0, limit: int = 1000
+    ) -> AsyncIterator[Movie]:
+        async for movie in self._repository.iter_by_title(
+            title=title, skip=skip, limit=limit
+        ):
+            yield movie
+
+    async def get_by_title_after(
+        self, title: str, after_id: Optional[str] = None, limit: int = 1000
+    ) -> List[Movie]:
+        return await self._repository.get_by_title_after(
+            title=title, after_id=after_id, limit=limit
+        )
+
+    async def search(
+        self,
+        filters: Dict[str, Any],
+        sort: str = "id",
+        limit: int = 1000,
+        cursor: Optional[Tuple[Any, str]] = None,
+    ) -> List[Movie]:
+        return await self._repository.search(
+            filters=filters, sort=sort, limit=limit, cursor=cursor
+        )
+
+    async def text_search(
+        self, query: str, prefix: bool = True, limit: int = 20
+    ) -> List[Movie]:
+        return await self._repository.text_search(
+            query=query, prefix=prefix, limit=limit
+        )
+
+    async def delete(self, movie_id: str):
+        await self._repository.delete(movie_id=movie_id)
+
+    async def update(self, movie_id: str, update_parameters: dict):
+        await self._repository.update(
+            movie_id=movie_id, update_parameters=update_parameters
+        )
+
+    async def bulk_create(self, movies: List[Movie]) -> List[BulkItemResult]:
+        return await self._repository.bulk_create(movies=movies)
+
+    async def bulk_update(
+        self, update_parameters: Dict[str, dict]
+    ) -> List[BulkItemResult]:
+        return await self._repository.bulk_update(update_parameters=update_parameters)
+
+    async def bulk_delete(self, movie_ids: List[str]) -> List[BulkItemResult]:
+        return await self._repository.bulk_delete(movie_ids=movie_ids)
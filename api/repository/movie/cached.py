@@ -0,0 +1,267 @@
+import asyncio
+import functools
+import json
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from redis.asyncio import Redis
+
+from api.entities.movie import Movie
+from api.repository.movie.abstractions import BulkItemResult, MovieRepository
+from api.utils.cache import TTLCache
+from api.utils.metrics import CACHE_REQUESTS
+
+MOVIE_CACHE_KEY_PREFIX = "movie:"
+# Stored in place of a movie written recently, fills never overwrite it
+MOVIE_CACHE_TOMBSTONE = b"tombstone"
+
+
+class CachedMovieRepository(MovieRepository):
+    """
+    CachedMovieRepository is a read-through cache in front of any other MovieRepository.
+
+    get_by_id is answered from a bounded in-process LRU, then from Redis when a
+    client is given, and only then from the wrapped repository. Concurrent misses
+    for the same id share a single read. Writes going through this repository
+    invalidate both tiers, other workers see them once their LRU entry expires.
+
+    Invalidating leaves a tombstone in Redis for redis_tombstone_ttl seconds and
+    fills only set missing keys, so a worker that read a movie before another
+    one wrote it cannot put the old movie back in Redis, as long as its read
+    took less than the tombstone lifetime.
+
+    """
+
+    def __init__(
+        self,
+        repository: MovieRepository,
+        maxsize: int = 10000,
+        ttl: float = 30.0,
+        redis: Optional[Redis] = None,
+        redis_ttl: int = 300,
+        redis_tombstone_ttl: int = 5,
+        key_prefix: str = MOVIE_CACHE_KEY_PREFIX,
+    ):
+        self._repository = repository
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._redis = redis
+        self._redis_ttl = redis_ttl
+        self._redis_tombstone_ttl = redis_tombstone_ttl
+        self._key_prefix = key_prefix
+        # Reads in flight, keyed by movie id
+        self._inflight: Dict[str, asyncio.Future] = {}
+        # Bumped on every write so a read racing with it is not cached
+        self._invalidations = 0
+
+    def _key(self, movie_id: str) -> str:
+        return f"{self._key_prefix}{movie_id}"
+
+    async def _read_redis(self, movie_id: str) -> Optional[Movie]:
+        if self._redis is None:
+            return None
+        return self._loads(await self._redis.get(self._key(movie_id)))
+
+    @staticmethod
+    def _loads(raw: Optional[bytes]) -> Optional[Movie]:
+        if raw is None or raw == MOVIE_CACHE_TOMBSTONE:
+            CACHE_REQUESTS.labels(cache="movie_redis", result="miss").inc()
+            return None
+        CACHE_REQUESTS.labels(cache="movie_redis", result="hit").inc()
+        document = json.loads(raw)
+        # Entries written before versioning have no updated_at
+        if document.get("updated_at") is not None:
+            document["updated_at"] = datetime.fromisoformat(document["updated_at"])
+        return Movie.from_document(document)
+
+    @staticmethod
+    def _dumps(movie: Movie) -> str:
+        document = {
+            **movie.to_document(),
+            "version": movie.version,
+            "updated_at": (
+                movie.updated_at.isoformat() if movie.updated_at is not None else None
+            ),
+        }
+        return json.dumps(document)
+
+    async def _write_redis(self, movie: Movie):
+        if self._redis is None:
+            return
+        # Never replacing a tombstone, or a movie another worker just cached
+        await self._redis.set(
+            self._key(movie.id), self._dumps(movie), ex=self._redis_ttl, nx=True
+        )
+
+    async def _load(self, movie_id: str) -> Optional[Movie]:
+        invalidations = self._invalidations
+        movie = await self._read_redis(movie_id)
+        from_redis = movie is not None
+        if movie is None:
+            movie = await self._repository.get_by_id(movie_id=movie_id)
+
+        # Dropping the result if a write happened while reading
+        if movie is not None and invalidations == self._invalidations:
+            self._cache.set(movie_id, movie)
+            if not from_redis:
+                await self._write_redis(movie)
+        return movie
+
+    def _forget_read(self, movie_id: str, read: asyncio.Future):
+        # An invalidation may already have replaced the read with a newer one
+        if self._inflight.get(movie_id) is read:
+            del self._inflight[movie_id]
+
+    async def _invalidate(self, movie_ids: List[str]):
+        self._invalidations += 1
+        for movie_id in movie_ids:
+            self._cache.invalidate(movie_id)
+            self._inflight.pop(movie_id, None)
+        if self._redis is not None and movie_ids:
+            pipeline = self._redis.pipeline(transaction=False)
+            for movie_id in movie_ids:
+                pipeline.set(
+                    self._key(movie_id),
+                    MOVIE_CACHE_TOMBSTONE,
+                    ex=self._redis_tombstone_ttl,
+                )
+            await pipeline.execute()
+
+    async def initialize(self):
+        return await self._repository.initialize()
+
+    async def create(self, movie: Movie):
+        await self._repository.create(movie=movie)
+        await self._invalidate([movie.id])
+
+    async def get_by_id(self, movie_id: str) -> Optional[Movie]:
+        movie = self._cache.get(movie_id)
+        if movie is not None:
+            CACHE_REQUESTS.labels(cache="movie", result="hit").inc()
+            return movie
+        CACHE_REQUESTS.labels(cache="movie", result="miss").inc()
+
+        # Single flight: the first miss reads, the others wait for its result
+        read = self._inflight.get(movie_id)
+        if read is None:
+            read = asyncio.ensure_future(self._load(movie_id))
+            self._inflight[movie_id] = read
+            read.add_done_callback(functools.partial(self._forget_read, movie_id))
+        # Shielded so a cancelled caller does not cancel the shared read
+        return await asyncio.shield(read)
+
+    async def get_many(self, movie_ids: List[str]) -> Dict[str, Movie]:
+        found: Dict[str, Movie] = {}
+        misses: List[str] = []
+        for movie_id in dict.fromkeys(movie_ids):
+            movie = self._cache.get(movie_id)
+            if movie is not None:
+                CACHE_REQUESTS.labels(cache="movie", result="hit").inc()
+                found[movie_id] = movie
+            else:
+                CACHE_REQUESTS.labels(cache="movie", result="miss").inc()
+                misses.append(movie_id)
+        if not misses:
+            return found
+
+        invalidations = self._invalidations
+        loaded: Dict[str, Movie] = {}
+        if self._redis is not None:
+            documents = await self._redis.mget(
+                [self._key(movie_id) for movie_id in misses]
+            )
+            for movie_id, document in zip(misses, documents):
+                movie = self._loads(document)
+                if movie is not None:
+                    loaded[movie_id] = movie
+        from_redis = set(loaded)
+        remaining = [movie_id for movie_id in misses if movie_id not in loaded]
+        if remaining:
+            loaded.update(await self._repository.get_many(remaining))
+
+        # Dropping the results if a write happened while reading
+        if invalidations == self._invalidations:
+            for movie_id, movie in loaded.items():
+                self._cache.set(movie_id, movie)
+            if self._redis is not None:
+                # Never replacing a tombstone, like _write_redis
+                pipeline = self._redis.pipeline(transaction=False)
+                for movie_id, movie in loaded.items():
+                    if movie_id not in from_redis:
+                        pipeline.set(
+                            self._key(movie_id),
+                            self._dumps(movie),
+                            ex=self._redis_ttl,
+                            nx=True,
+                        )
+                await pipeline.execute()
+        found.update(loaded)
+        return found
+
+    async def get_by_title(
+        self, title: str, skip: int = 0, limit: int = 1000
+    ) -> List[Movie]:
+        return await self._repository.get_by_title(title=title, skip=skip, limit=limit)
+
+    async def iter_by_title(
+        self, title: str, skip: int = 0, limit: int = 1000
+    ) -> AsyncIterator[Movie]:
+        async for movie in self._repository.iter_by_title(
+            title=title, skip=skip, limit=limit
+        ):
+            yield movie
+
+    async def get_by_title_after(
+        self, title: str, after_id: Optional[str] = None, limit: int = 1000
+    ) -> List[Movie]:
+        return await self._repository.get_by_title_after(
+            title=title, after_id=after_id, limit=limit
+        )
+
+    async def search(
+        self,
+        filters: Dict[str, Any],
+        sort: str = "id",
+        limit: int = 1000,
+        cursor: Optional[Tuple[Any, str]] = None,
+    ) -> List[Movie]:
+        return await self._repository.search(
+            filters=filters, sort=sort, limit=limit, cursor=cursor
+        )
+
+    async def text_search(
+        self, query: str, prefix: bool = True, limit: int = 20
+    ) -> List[Movie]:
+        return await self._repository.text_search(
+            query=query, prefix=prefix, limit=limit
+        )
+
+    async def delete(self, movie_id: str):
+        await self._repository.delete(movie_id=movie_id)
+        await self._invalidate([movie_id])
+
+    async def update(self, movie_id: str, update_parameters: dict):
+        try:
+            await self._repository.update(
+                movie_id=movie_id, update_parameters=update_parameters
+            )
+        finally:
+            await self._invalidate([movie_id])
+
+    async def bulk_create(self, movies: List[Movie]) -> List[BulkItemResult]:
+        results = await self._repository.bulk_create(movies=movies)
+        await self._invalidate([movie.id for movie in movies])
+        return results
+
+    async def bulk_update(
+        self, update_parameters: Dict[str, dict]
+    ) -> List[BulkItemResult]:
+        results = await self._repository.bulk_update(
+            update_parameters=update_parameters
+        )
+        await self._invalidate(list(update_parameters.keys()))
+        return results
+
+    async def bulk_delete(self, movie_ids: List[str]) -> List[BulkItemResult]:
+        results = await self._repository.bulk_delete(movie_ids=movie_ids)
+        await self._invalidate(movie_ids)
+        return results
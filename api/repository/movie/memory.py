@@ -1,8 +1,86 @@
-import itertools
-from typing import List, Optional
+import bisect
+import heapq
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set, Tuple
 
 from api.entities.movie import Movie
-from api.repository.movie.abstractions import MovieRepository, RepositoryException
+from api.repository.movie.abstractions import (
+    BULK_CREATED,
+    BULK_DELETED,
+    BULK_FAILED,
+    BULK_NOT_FOUND,
+    BULK_UPDATED,
+    SEARCH_SORT_FIELDS,
+    BulkItemResult,
+    MovieRepository,
+    RepositoryException,
+    check_search_fields,
+    check_update_fields,
+)
+from api.utils.text import token_weights, tokenize
+
+# Fields with a value -> movie ids index, title is looked up on its sort index
+INDEXED_FIELDS = ("released_year", "watched")
+
+
+# Pending changes above this are applied by rebuilding the list instead
+_SORTED_LIST_INSORT_MAX = 64
+
+
+class _SortedList:
+    """
+    A list sorted on read: additions and removals are recorded in O(1) and
+    applied in one pass the next time the items are read, so loading N movies
+    costs one sort instead of N insertions into the middle of a list
+    """
+
+    __slots__ = ("_items", "_added", "_removed")
+
+    def __init__(self):
+        self._items: list = []
+        self._added: set = set()
+        self._removed: set = set()
+
+    def add(self, item):
+        # An item removed since the last read is still in the list
+        if item in self._removed:
+            self._removed.discard(item)
+        else:
+            self._added.add(item)
+
+    def discard(self, item):
+        if item in self._added:
+            self._added.discard(item)
+        else:
+            self._removed.add(item)
+
+    def items(self) -> list:
+        if len(self._added) + len(self._removed) <= _SORTED_LIST_INSORT_MAX:
+            # A few changes are cheaper to apply in place, each one is a
+            # memmove of the list
+            for item in self._removed:
+                position = bisect.bisect_left(self._items, item)
+                if position < len(self._items) and self._items[position] == item:
+                    del self._items[position]
+            for item in self._added:
+                bisect.insort(self._items, item)
+        else:
+            if self._removed:
+                removed = self._removed
+                self._items = [item for item in self._items if item not in removed]
+            # Two sorted runs, which the sort merges in linear time
+            self._items.extend(sorted(self._added))
+            self._items.sort()
+        self._added.clear()
+        self._removed.clear()
+        return self._items
+
+
+def _sort_entry(value: Any, movie_id: str) -> Tuple[Tuple[bool, Any], str]:
+    """
+    Position of a movie in a sort index, None values come first
+    """
+    return (value is not None, value), movie_id
 
 
 class MemoryMovieRepository(MovieRepository):
@@ -14,40 +92,273 @@ class MemoryMovieRepository(MovieRepository):
 
     def __init__(self):
         self._storage = {}
+        # Secondary indexes used by search: field -> value -> movie ids
+        self._field_indexes: Dict[str, Dict[Any, Set[str]]] = {
+            field: {} for field in INDEXED_FIELDS
+        }
+        # Sorted (value, id) entries per sort field, searches resume on them and
+        # the title one holds the movies sharing a title as a contiguous range
+        self._sort_indexes: Dict[str, _SortedList] = {
+            field: _SortedList() for field in SEARCH_SORT_FIELDS
+        }
+        # Inverted index for text search: token -> movie id -> weight, and the
+        # distinct tokens kept sorted so a prefix is a contiguous range
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._tokens = _SortedList()
+
+    def _index(self, movie: Movie):
+        self._index_text(movie)
+        for field, index in self._field_indexes.items():
+            index.setdefault(getattr(movie, field), set()).add(movie.id)
+        for field, entries in self._sort_indexes.items():
+            entries.add(_sort_entry(getattr(movie, field), movie.id))
+
+    def _unindex(self, movie: Movie):
+        self._unindex_text(movie)
+        for field, index in self._field_indexes.items():
+            value = getattr(movie, field)
+            movie_ids = index.get(value)
+            if movie_ids is None:
+                continue
+            movie_ids.discard(movie.id)
+            if not movie_ids:
+                del index[value]
+        for field, entries in self._sort_indexes.items():
+            entries.discard(_sort_entry(getattr(movie, field), movie.id))
+
+    def _index_text(self, movie: Movie):
+        for token, weight in token_weights(movie.title, movie.description).items():
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = {}
+                self._tokens.add(token)
+            postings[movie.id] = weight
+
+    def _unindex_text(self, movie: Movie):
+        for token in token_weights(movie.title, movie.description):
+            postings = self._postings.get(token)
+            if postings is None:
+                continue
+            postings.pop(movie.id, None)
+            if not postings:
+                del self._postings[token]
+                self._tokens.discard(token)
+
+    def _prefix_postings(self, prefix: str) -> Dict[str, int]:
+        # Best weight of any token starting with prefix, per movie id
+        postings: Dict[str, int] = {}
+        tokens = self._tokens.items()
+        position = bisect.bisect_left(tokens, prefix)
+        while position < len(tokens) and tokens[position].startswith(prefix):
+            for movie_id, weight in self._postings[tokens[position]].items():
+                if weight > postings.get(movie_id, 0):
+                    postings[movie_id] = weight
+            position += 1
+        return postings
+
+    def _title_range(self, title: str) -> Tuple[list, int, int]:
+        """
+        Title sort index entries and the bounds of the ones holding title
+        """
+        entries = self._sort_indexes["title"].items()
+        value = _sort_entry(title, "")[0]
+        # A 1-tuple sorts before every entry sharing its value, and
+        # title + "\0" is the smallest title after title
+        start = bisect.bisect_left(entries, (value,))
+        end = bisect.bisect_left(entries, (_sort_entry(title + "\0", "")[0],), start)
+        return entries, start, end
 
     async def create(self, movie: Movie):
-        self._storage[movie.id] = movie
+        existing = self._storage.get(movie.id)
+        if existing is not None:
+            self._unindex(existing)
+        # Storing a copy, the caller's movie is left untouched
+        stored = Movie(
+            movie_id=movie.id,
+            title=movie.title,
+            description=movie.description,
+            released_year=movie.released_year,
+            watched=movie.watched,
+            version=1 if existing is None else existing.version + 1,
+            updated_at=datetime.utcnow(),
+        )
+        self._storage[movie.id] = stored
+        self._index(stored)
 
     async def get_by_id(self, movie_id: str) -> Optional[Movie]:
         return self._storage.get(movie_id)
 
+    async def get_many(self, movie_ids: List[str]) -> Dict[str, Movie]:
+        return {
+            movie_id: self._storage[movie_id]
+            for movie_id in movie_ids
+            if movie_id in self._storage
+        }
+
     async def get_by_title(
         self, title: str, skip: int = 0, limit: int = 1000
     ) -> List[Movie]:
+        entries, start, end = self._title_range(title)
+        start += skip
+        if limit:
+            end = min(end, start + limit)
+        return [self._storage[movie_id] for _, movie_id in entries[start:end]]
+
+    async def get_by_title_after(
+        self, title: str, after_id: Optional[str] = None, limit: int = 1000
+    ) -> List[Movie]:
+        entries, start, end = self._title_range(title)
+        if after_id is not None:
+            start = bisect.bisect_right(
+                entries, _sort_entry(title, after_id), start, end
+            )
+        if limit:
+            end = min(end, start + limit)
+        return [self._storage[movie_id] for _, movie_id in entries[start:end]]
+
+    async def search(
+        self,
+        filters: Dict[str, Any],
+        sort: str = "id",
+        limit: int = 1000,
+        cursor: Optional[Tuple[Any, str]] = None,
+    ) -> List[Movie]:
+        check_search_fields(filters, sort)
+
+        entries = self._sort_indexes[sort].items()
+        start = 0
+        if cursor is not None:
+            start = bisect.bisect_right(entries, _sort_entry(*cursor))
+
+        # Intersecting the matching ids of every filter, smallest first
+        candidates = []
+        for field, value in filters.items():
+            if field == "title":
+                titles, title_start, title_end = self._title_range(value)
+                candidates.append(
+                    [movie_id for _, movie_id in titles[title_start:title_end]]
+                )
+            else:
+                candidates.append(self._field_indexes[field].get(value, set()))
+        if not candidates:
+            # Reading the page straight off the sort index
+            end = len(entries) if limit == 0 else start + limit
+            return [self._storage[movie_id] for _, movie_id in entries[start:end]]
+
+        candidates.sort(key=len)
+        movie_ids = set(candidates[0])
+        for other in candidates[1:]:
+            if not movie_ids:
+                break
+            movie_ids.intersection_update(other)
+
+        # Walking the sort index reads about limit * N / matches entries, which
+        # beats ordering every match when the filters match many movies
+        if limit and limit * len(entries) < len(movie_ids) ** 2:
+            page = []
+            for position in range(start, len(entries)):
+                movie_id = entries[position][1]
+                if movie_id in movie_ids:
+                    page.append(self._storage[movie_id])
+                    if len(page) == limit:
+                        break
+            return page
+
+        def sort_key(movie_id: str):
+            return _sort_entry(getattr(self._storage[movie_id], sort), movie_id)
+
+        if cursor is not None:
+            after = _sort_entry(*cursor)
+            movie_ids = (
+                movie_id for movie_id in movie_ids if sort_key(movie_id) > after
+            )
+        if limit == 0:
+            ranked = sorted(movie_ids, key=sort_key)
+        else:
+            ranked = heapq.nsmallest(limit, movie_ids, key=sort_key)
+        return [self._storage[movie_id] for movie_id in ranked]
+
+    async def text_search(
+        self, query: str, prefix: bool = True, limit: int = 20
+    ) -> List[Movie]:
+        terms = tokenize(query)
+        scores: Dict[str, int] = {}
+        for position, term in enumerate(terms):
+            if prefix and position == len(terms) - 1:
+                postings = self._prefix_postings(term)
+            else:
+                postings = self._postings.get(term, {})
+            if position == 0:
+                scores = dict(postings)
+            else:
+                scores = {
+                    movie_id: score + postings[movie_id]
+                    for movie_id, score in scores.items()
+                    if movie_id in postings
+                }
+            if not scores:
+                return []
+
+        def rank(item: Tuple[str, int]):
+            movie_id, score = item
+            return -score, self._storage[movie_id].title, movie_id
+
         if limit == 0:
-            return [
-                movie
-                for _, movie in itertools.islice(self._storage.items(), skip, None)
-                if movie.title == title
-            ]
-        return [
-            movie
-            for _, movie in itertools.islice(self._storage.items(), skip, skip + limit)
-            if movie.title == title
-        ]
+            ranked = sorted(scores.items(), key=rank)
+        else:
+            ranked = heapq.nsmallest(limit, scores.items(), key=rank)
+        return [self._storage[movie_id] for movie_id, _ in ranked]
 
     async def delete(self, movie_id: str):
-        self._storage.pop(movie_id, None)
+        movie = self._storage.pop(movie_id, None)
+        if movie is not None:
+            self._unindex(movie)
 
     async def update(self, movie_id: str, update_parameters: dict):
         movie = self._storage.get(movie_id)
         if movie is None:
             raise RepositoryException(f"Movie with id {movie_id} not found")
 
-        for key, value in update_parameters.items():
-            if key == "id":
-                raise RepositoryException("Cannot update movie id")
+        check_update_fields(update_parameters)
 
+        self._unindex(movie)
+        for key, value in update_parameters.items():
             # Check that update parameters are fields from Movie Entity
             if hasattr(movie, key):
                 setattr(movie, f"_{key}", value)
+        movie._version += 1
+        movie._updated_at = datetime.utcnow()
+        self._index(movie)
+
+    async def bulk_create(self, movies: List[Movie]) -> List[BulkItemResult]:
+        for movie in movies:
+            await self.create(movie)
+        return [BulkItemResult(id=movie.id, status=BULK_CREATED) for movie in movies]
+
+    async def bulk_update(
+        self, update_parameters: Dict[str, dict]
+    ) -> List[BulkItemResult]:
+        results = []
+        for movie_id, parameters in update_parameters.items():
+            if movie_id not in self._storage:
+                results.append(BulkItemResult(id=movie_id, status=BULK_NOT_FOUND))
+                continue
+            try:
+                await self.update(movie_id=movie_id, update_parameters=parameters)
+            except RepositoryException as e:
+                results.append(
+                    BulkItemResult(id=movie_id, status=BULK_FAILED, message=str(e))
+                )
+            else:
+                results.append(BulkItemResult(id=movie_id, status=BULK_UPDATED))
+        return results
+
+    async def bulk_delete(self, movie_ids: List[str]) -> List[BulkItemResult]:
+        results = []
+        for movie_id in movie_ids:
+            if movie_id not in self._storage:
+                results.append(BulkItemResult(id=movie_id, status=BULK_NOT_FOUND))
+                continue
+            await self.delete(movie_id=movie_id)
+            results.append(BulkItemResult(id=movie_id, status=BULK_DELETED))
+        return results
@@ -0,0 +1,33 @@
+import asyncio
+
+from api.repository.movie.mongo import MongoMovieRepository
+from api.settings.movie import settings_instance
+
+
+async def migrate(repo: MongoMovieRepository, batch_size: int = 1000) -> int:
+    """
+    Brings the movies stored by older releases up to date
+
+    Creates the indexes, builds the text search rows of the movies missing them
+    and drops the indexes no longer used. Can be run again, returns the number
+    of movies updated.
+    """
+
+    await repo.ensure_indexes()
+    updated = await repo.backfill_search_fields(batch_size=batch_size)
+    await repo.drop_legacy_indexes()
+    return updated
+
+
+async def main():
+    settings = settings_instance()
+    repo = MongoMovieRepository(
+        connection_string=settings.mongo_connection_string,
+        database=settings.mongo_database_name,
+    )
+    updated = await migrate(repo)
+    print(f"Updated {updated} movies")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,9 +1,126 @@
-from typing import List, Optional
+import heapq
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
 import motor.motor_asyncio
+from pymongo import ASCENDING, DESCENDING, IndexModel, UpdateOne
+from pymongo.errors import BulkWriteError
 
 from api.entities.movie import Movie
-from api.repository.movie.abstractions import MovieRepository, RepositoryException
+from api.repository.mongo_client import mongo_client
+from api.repository.movie.abstractions import (
+    BULK_CREATED,
+    BULK_DELETED,
+    BULK_FAILED,
+    BULK_NOT_FOUND,
+    BULK_UPDATED,
+    BulkItemResult,
+    MovieRepository,
+    RepositoryException,
+    check_search_fields,
+    check_update_fields,
+)
+from api.utils.text import token_weights, tokenize
+
+# Indexes the movie collection relies on, created once at application startup
+MOVIE_INDEXES = [
+    IndexModel([("id", ASCENDING)], name="id_1", unique=True),
+    IndexModel([("title", ASCENDING), ("id", ASCENDING)], name="title_1_id_1"),
+    # Search filters come first, then the sort field and id, so filtered and
+    # sorted pages are read in index order. Every filter and sort combination
+    # has an index returning its order, a filter left out of the index is
+    # applied to the fetched documents, never with an in-memory sort
+    IndexModel(
+        [("released_year", ASCENDING), ("id", ASCENDING)], name="released_year_1_id_1"
+    ),
+    IndexModel([("watched", ASCENDING), ("id", ASCENDING)], name="watched_1_id_1"),
+    IndexModel(
+        [("watched", ASCENDING), ("released_year", ASCENDING), ("id", ASCENDING)],
+        name="watched_1_released_year_1_id_1",
+    ),
+    IndexModel(
+        [("title", ASCENDING), ("released_year", ASCENDING), ("id", ASCENDING)],
+        name="title_1_released_year_1_id_1",
+    ),
+    IndexModel(
+        [("watched", ASCENDING), ("title", ASCENDING), ("id", ASCENDING)],
+        name="watched_1_title_1_id_1",
+    ),
+    IndexModel(
+        [("released_year", ASCENDING), ("title", ASCENDING), ("id", ASCENDING)],
+        name="released_year_1_title_1_id_1",
+    ),
+]
+
+# Text search reads the rows of a term in rank order straight off the first
+# index, the second one looks up the rows of given movies
+MOVIE_TOKEN_INDEXES = [
+    IndexModel(
+        [
+            ("prefix", ASCENDING),
+            ("term", ASCENDING),
+            ("weight", DESCENDING),
+            ("title", ASCENDING),
+            ("movie_id", ASCENDING),
+        ],
+        name="prefix_1_term_1_weight_-1_title_1_movie_id_1",
+    ),
+    IndexModel(
+        [("movie_id", ASCENDING), ("prefix", ASCENDING), ("term", ASCENDING)],
+        name="movie_id_1_prefix_1_term_1",
+    ),
+]
+
+# Indexes created by older releases and no longer used
+LEGACY_MOVIE_INDEXES = ["title_text_description_text", "search_tokens_1"]
+
+# Bumped when the token rows of a movie change shape, migrate rebuilds the
+# rows of every movie stored with another version
+TOKENS_VERSION = 1
+
+# Driving rows read per round trip by a multi term text search
+TEXT_SEARCH_BATCH = 100
+
+# Only fetch the fields a Movie entity needs, never the internal _id
+MOVIE_PROJECTION = {
+    "_id": 0,
+    "id": 1,
+    "title": 1,
+    "description": 1,
+    "released_year": 1,
+    "watched": 1,
+    "version": 1,
+    "updated_at": 1,
+}
+
+
+def _token_rows(
+    movie_id: str, title: Optional[str], description: Optional[str]
+) -> List[dict]:
+    """
+    Text search rows of a movie, one per token with its weight and one per
+    token prefix with the best weight of the tokens it starts
+    """
+    title = title or ""
+    weights = token_weights(title, description or "")
+    prefix_weights: Dict[str, int] = {}
+    for token, weight in weights.items():
+        for length in range(1, len(token) + 1):
+            prefix = token[:length]
+            if weight > prefix_weights.get(prefix, 0):
+                prefix_weights[prefix] = weight
+    # The title breaks ties between equal weights, as in the ranking
+    return [
+        {
+            "movie_id": movie_id,
+            "term": term,
+            "prefix": prefix,
+            "weight": weight,
+            "title": title,
+        }
+        for prefix, term_weights in ((False, weights), (True, prefix_weights))
+        for term, weight in term_weights.items()
+    ]
 
 
 class MongoMovieRepository(MovieRepository):
@@ -16,65 +133,509 @@ class MongoMovieRepository(MovieRepository):
         self,
         connection_string: str = "mongodb://127.0.0.1:27017",
         database: str = "movie_track_db",
+        client: Optional[motor.motor_asyncio.AsyncIOMotorClient] = None,
     ):
-        self._client = motor.motor_asyncio.AsyncIOMotorClient(connection_string)
+        # Repositories share the process wide client unless given their own
+        self._client = client if client is not None else mongo_client(connection_string)
         self._database = self._client[database]
         # Movie collection which holds our movie documents
         self._movies = self._database["movies"]
+        # Text search rows, (term, weight, movie id) kept in rank order
+        self._tokens = self._database["movie_tokens"]
+
+    async def initialize(self) -> dict:
+        """
+        Warms the connection pool and makes sure the movie indexes exist,
+        returns the index report of ensure_indexes
+        """
+        await self._client.admin.command("ping")
+        return await self.ensure_indexes()
+
+    async def backfill_search_fields(self, batch_size: int = 1000) -> int:
+        """
+        Rebuilds the text search rows of the movies stored before text search
+        existed or with older rows, batch_size movies per write, returns how
+        many were updated
+
+        Run once by api.repository.movie.migrate, not at application startup
+        """
+        updated = 0
+        documents: List[dict] = []
+        document_cursor = self._movies.find(
+            {"tokens_version": {"$ne": TOKENS_VERSION}},
+            {"_id": 0, "id": 1, "title": 1, "description": 1},
+            batch_size=batch_size,
+        )
+        async for document in document_cursor:
+            documents.append(document)
+            if len(documents) == batch_size:
+                updated += await self._backfill_tokens(documents)
+                documents = []
+        if documents:
+            updated += await self._backfill_tokens(documents)
+        return updated
+
+    async def _backfill_tokens(self, documents: List[dict]) -> int:
+        await self._replace_tokens(
+            {
+                document["id"]: _token_rows(
+                    document["id"], document.get("title"), document.get("description")
+                )
+                for document in documents
+            }
+        )
+        # Dropping the token fields older releases stored on the movie
+        await self._movies.update_many(
+            {"id": {"$in": [document["id"] for document in documents]}},
+            {
+                "$set": {"tokens_version": TOKENS_VERSION},
+                "$unset": {"search_tokens": "", "search_weights": ""},
+            },
+        )
+        return len(documents)
+
+    async def ensure_indexes(self) -> dict:
+        """
+        Creates the movie and token indexes if missing and returns a report of
+        the indexes present on the movie collection
+
+        Raises RepositoryException if an expected index could not be found
+        """
+        await self._ensure_collection_indexes(self._tokens, MOVIE_TOKEN_INDEXES)
+        return await self._ensure_collection_indexes(self._movies, MOVIE_INDEXES)
+
+    @staticmethod
+    async def _ensure_collection_indexes(
+        collection: motor.motor_asyncio.AsyncIOMotorCollection,
+        indexes: List[IndexModel],
+    ) -> dict:
+        await collection.create_indexes(indexes)
+        index_information = await collection.index_information()
+        for index in indexes:
+            if index.document["name"] not in index_information:
+                raise RepositoryException(
+                    f"Index {index.document['name']} missing on "
+                    f"{collection.name} collection"
+                )
+        return {name: info["key"] for name, info in index_information.items()}
+
+    async def drop_legacy_indexes(self) -> List[str]:
+        """
+        Drops the indexes older releases created, returns the dropped names
+        """
+        index_information = await self._movies.index_information()
+        dropped = [name for name in LEGACY_MOVIE_INDEXES if name in index_information]
+        for name in dropped:
+            await self._movies.drop_index(name)
+        return dropped
 
     async def create(self, movie: Movie):
-        result = await self._movies.update_one(
+        await self._movies.update_one(
             {"id": movie.id},
             {
                 "$set": {
-                    "id": movie.id,
-                    "title": movie.title,
-                    "description": movie.description,
-                    "released_year": movie.released_year,
-                    "watched": movie.watched,
-                }
+                    **movie.to_document(),
+                    "tokens_version": TOKENS_VERSION,
+                    "updated_at": datetime.utcnow(),
+                },
+                "$inc": {"version": 1},
             },
             upsert=True,
         )
+        await self._replace_tokens(
+            {movie.id: _token_rows(movie.id, movie.title, movie.description)}
+        )
 
     async def get_by_id(self, movie_id: str) -> Optional[Movie]:
-        document = await self._movies.find_one({"id": movie_id})
+        document = await self._movies.find_one({"id": movie_id}, MOVIE_PROJECTION)
         if document:
-            return Movie(
-                movie_id=document.get("id"),
-                title=document.get("title"),
-                description=document.get("description"),
-                released_year=document.get("released_year"),
-                watched=document.get("watched"),
-            )
+            return Movie.from_document(document)
         return None
 
+    async def get_many(self, movie_ids: List[str]) -> Dict[str, Movie]:
+        if not movie_ids:
+            return {}
+        # One round trip on the unique id index, whatever the number of ids
+        document_cursor = self._movies.find(
+            {"id": {"$in": list(set(movie_ids))}}, MOVIE_PROJECTION
+        )
+        return {
+            document["id"]: Movie.from_document(document)
+            async for document in document_cursor
+        }
+
     async def get_by_title(
         self, title: str, skip: int = 0, limit: int = 1000
     ) -> List[Movie]:
         return_value: List[Movie] = []
         # Get cursor to iterate over documents
-        document_cursor = self._movies.find({"title": title}).skip(skip).limit(limit)
+        document_cursor = (
+            self._movies.find({"title": title}, MOVIE_PROJECTION)
+            .sort("id", ASCENDING)
+            .skip(skip)
+            .limit(limit)
+        )
         async for document in document_cursor:
-            return_value.append(
-                Movie(
-                    movie_id=document.get("id"),
-                    title=document.get("title"),
-                    description=document.get("description"),
-                    released_year=document.get("released_year"),
-                    watched=document.get("watched"),
-                )
-            )
+            return_value.append(Movie.from_document(document))
+        return return_value
+
+    async def iter_by_title(
+        self, title: str, skip: int = 0, limit: int = 1000
+    ) -> AsyncIterator[Movie]:
+        # Movies are yielded batch by batch as the cursor is drained
+        document_cursor = (
+            self._movies.find({"title": title}, MOVIE_PROJECTION)
+            .sort("id", ASCENDING)
+            .skip(skip)
+            .limit(limit)
+        )
+        async for document in document_cursor:
+            yield Movie.from_document(document)
+
+    async def get_by_title_after(
+        self, title: str, after_id: Optional[str] = None, limit: int = 1000
+    ) -> List[Movie]:
+        query = {"title": title}
+        if after_id is not None:
+            query["id"] = {"$gt": after_id}
+
+        return_value: List[Movie] = []
+        # Seek straight to after_id on the title+id index instead of skipping
+        document_cursor = (
+            self._movies.find(query, MOVIE_PROJECTION)
+            .sort("id", ASCENDING)
+            .limit(limit)
+        )
+        async for document in document_cursor:
+            return_value.append(Movie.from_document(document))
+        return return_value
+
+    async def search(
+        self,
+        filters: Dict[str, Any],
+        sort: str = "id",
+        limit: int = 1000,
+        cursor: Optional[Tuple[Any, str]] = None,
+    ) -> List[Movie]:
+        check_search_fields(filters, sort)
+
+        query = dict(filters)
+        if cursor is not None:
+            sort_value, after_id = cursor
+            if sort == "id":
+                query["id"] = {"$gt": after_id}
+            else:
+                # Resuming after the last (sort value, id) pair seen, nulls sort
+                # first and only compare equal to each other
+                query["$or"] = [
+                    {
+                        sort: {"$ne": None}
+                        if sort_value is None
+                        else {"$gt": sort_value}
+                    },
+                    {sort: sort_value, "id": {"$gt": after_id}},
+                ]
+
+        sort_keys = [("id", ASCENDING)]
+        if sort != "id":
+            sort_keys.insert(0, (sort, ASCENDING))
+
+        return_value: List[Movie] = []
+        document_cursor = (
+            self._movies.find(query, MOVIE_PROJECTION).sort(sort_keys).limit(limit)
+        )
+        async for document in document_cursor:
+            return_value.append(Movie.from_document(document))
         return return_value
 
+    async def text_search(
+        self, query: str, prefix: bool = True, limit: int = 20
+    ) -> List[Movie]:
+        terms = tokenize(query)
+        if not terms:
+            return []
+        # Every term is required, with prefix the last one only has to start
+        # a token and counts its best completion
+        keys = [
+            (term, prefix and position == len(terms) - 1)
+            for position, term in enumerate(terms)
+        ]
+
+        # The rows of one term are read in rank order and the other terms are
+        # looked up for those movies only, longer terms tend to be rarer
+        driving = max(range(len(keys)), key=lambda position: len(keys[position][0]))
+        other_keys = keys[:driving] + keys[driving + 1 :]
+
+        # The most the other terms can add to a movie, bounding the unread ones
+        other_bound = 0
+        for term, term_prefix in other_keys:
+            document = await self._tokens.find_one(
+                {"prefix": term_prefix, "term": term},
+                {"_id": 0, "weight": 1},
+                sort=[("weight", DESCENDING)],
+            )
+            if document is None:
+                return []
+            other_bound += document["weight"]
+
+        term, term_prefix = keys[driving]
+        document_cursor = self._tokens.find(
+            {"prefix": term_prefix, "term": term},
+            {"_id": 0, "movie_id": 1, "weight": 1, "title": 1},
+        ).sort([("weight", DESCENDING), ("title", ASCENDING), ("movie_id", ASCENDING)])
+        batch_size = max(limit, TEXT_SEARCH_BATCH) if other_keys else limit
+        # (-score, title, movie id) of the best matches so far
+        ranked: List[Tuple[int, str, str]] = []
+        while True:
+            rows = await document_cursor.to_list(length=batch_size or None)
+            if not rows:
+                break
+            other_weights = await self._term_weights(
+                other_keys, [row["movie_id"] for row in rows]
+            )
+            for row in rows:
+                weights = other_weights.get(row["movie_id"], {})
+                if all(key in weights for key in other_keys):
+                    score = row["weight"] + sum(weights[key] for key in other_keys)
+                    ranked.append((-score, row["title"], row["movie_id"]))
+            if limit:
+                ranked = heapq.nsmallest(limit, ranked)
+                # An unread movie ranks after the last row read with the best
+                # weights of the other terms, stopping once the page beats it
+                last = rows[-1]
+                bound = (
+                    -(last["weight"] + other_bound),
+                    last["title"],
+                    last["movie_id"],
+                )
+                if len(ranked) == limit and ranked[-1] <= bound:
+                    break
+            if batch_size == 0:
+                break
+        ranked.sort()
+
+        movies = await self.get_many([movie_id for _, _, movie_id in ranked])
+        return [movies[movie_id] for _, _, movie_id in ranked if movie_id in movies]
+
+    async def _term_weights(
+        self, keys: List[Tuple[str, bool]], movie_ids: List[str]
+    ) -> Dict[str, Dict[Tuple[str, bool], int]]:
+        """
+        Weight of each (term, prefix) key for the given movies, keyed by movie
+        id, keys a movie does not match are left out
+        """
+        if not keys:
+            return {}
+        document_cursor = self._tokens.find(
+            {
+                "$or": [
+                    {
+                        "movie_id": {"$in": movie_ids},
+                        "prefix": term_prefix,
+                        "term": term,
+                    }
+                    for term, term_prefix in set(keys)
+                ]
+            },
+            {"_id": 0, "movie_id": 1, "term": 1, "prefix": 1, "weight": 1},
+        )
+        weights: Dict[str, Dict[Tuple[str, bool], int]] = {}
+        async for document in document_cursor:
+            weights.setdefault(document["movie_id"], {})[
+                (document["term"], document["prefix"])
+            ] = document["weight"]
+        return weights
+
+    async def _replace_tokens(self, token_rows: Dict[str, List[dict]]):
+        """
+        Replaces the text search rows of the given movies
+        """
+        if not token_rows:
+            return
+        await self._tokens.delete_many({"movie_id": {"$in": list(token_rows)}})
+        rows = [row for movie_rows in token_rows.values() for row in movie_rows]
+        if rows:
+            await self._tokens.insert_many(rows, ordered=False)
+
     async def delete(self, movie_id: str):
         await self._movies.delete_one({"id": movie_id})
+        await self._tokens.delete_many({"movie_id": movie_id})
 
     async def update(self, movie_id: str, update_parameters: dict):
-        if "id" in update_parameters.keys():
-            raise RepositoryException("Cannot update movie id")
+        check_update_fields(update_parameters)
+        token_rows = await self._updated_token_rows({movie_id: update_parameters})
         result = await self._movies.update_one(
-            {"id": movie_id}, {"$set": update_parameters}
+            {"id": movie_id},
+            {
+                "$set": {
+                    **update_parameters,
+                    **({"tokens_version": TOKENS_VERSION} if token_rows else {}),
+                    "updated_at": datetime.utcnow(),
+                },
+                "$inc": {"version": 1},
+            },
         )
-        if result.modified_count == 0:
+        if result.matched_count == 0:
             raise RepositoryException(f"Movie with id {movie_id} not updated")
+        await self._replace_tokens(token_rows)
+
+    async def _updated_token_rows(
+        self, update_parameters: Dict[str, dict]
+    ) -> Dict[str, List[dict]]:
+        # Tokens depend on both title and description, reading the stored
+        # value of the one not being updated
+        movie_ids = [
+            movie_id
+            for movie_id, parameters in update_parameters.items()
+            if "title" in parameters or "description" in parameters
+        ]
+        if not movie_ids:
+            return {}
+        document_cursor = self._movies.find(
+            {"id": {"$in": movie_ids}},
+            {"_id": 0, "id": 1, "title": 1, "description": 1},
+        )
+        token_rows = {}
+        async for document in document_cursor:
+            parameters = update_parameters[document["id"]]
+            token_rows[document["id"]] = _token_rows(
+                document["id"],
+                parameters.get("title", document.get("title")),
+                parameters.get("description", document.get("description")),
+            )
+        return token_rows
+
+    async def _existing_ids(self, movie_ids: List[str]) -> set:
+        # Covered by the unique id index, no document is fetched
+        document_cursor = self._movies.find(
+            {"id": {"$in": movie_ids}}, {"_id": 0, "id": 1}
+        )
+        return {document["id"] async for document in document_cursor}
+
+    async def _bulk_write(self, requests: List[UpdateOne]) -> Dict[int, str]:
+        """
+        Runs the requests as one unordered bulk write and returns the error
+        message of each failed request keyed by its position
+        """
+        if not requests:
+            return {}
+        try:
+            await self._movies.bulk_write(requests, ordered=False)
+        except BulkWriteError as e:
+            return {
+                error["index"]: error.get("errmsg", "Write failed")
+                for error in e.details.get("writeErrors", [])
+            }
+        return {}
+
+    async def bulk_create(self, movies: List[Movie]) -> List[BulkItemResult]:
+        now = datetime.utcnow()
+        errors = await self._bulk_write(
+            [
+                UpdateOne(
+                    {"id": movie.id},
+                    {
+                        "$set": {
+                            **movie.to_document(),
+                            "tokens_version": TOKENS_VERSION,
+                            "updated_at": now,
+                        },
+                        "$inc": {"version": 1},
+                    },
+                    upsert=True,
+                )
+                for movie in movies
+            ]
+        )
+        await self._replace_tokens(
+            {
+                movie.id: _token_rows(movie.id, movie.title, movie.description)
+                for index, movie in enumerate(movies)
+                if index not in errors
+            }
+        )
+        return [
+            BulkItemResult(id=movie.id, status=BULK_FAILED, message=errors[index])
+            if index in errors
+            else BulkItemResult(id=movie.id, status=BULK_CREATED)
+            for index, movie in enumerate(movies)
+        ]
+
+    async def bulk_update(
+        self, update_parameters: Dict[str, dict]
+    ) -> List[BulkItemResult]:
+        existing_ids = await self._existing_ids(list(update_parameters.keys()))
+        rejected: Dict[str, str] = {}
+        for movie_id, parameters in update_parameters.items():
+            try:
+                check_update_fields(parameters)
+            except RepositoryException as e:
+                rejected[movie_id] = str(e)
+        token_rows = await self._updated_token_rows(
+            {
+                movie_id: parameters
+                for movie_id, parameters in update_parameters.items()
+                if movie_id not in rejected
+            }
+        )
+        now = datetime.utcnow()
+
+        results: Dict[str, BulkItemResult] = {}
+        requests_ids: List[str] = []
+        requests: List[UpdateOne] = []
+        for movie_id, parameters in update_parameters.items():
+            if movie_id not in existing_ids:
+                results[movie_id] = BulkItemResult(id=movie_id, status=BULK_NOT_FOUND)
+            elif movie_id in rejected:
+                results[movie_id] = BulkItemResult(
+                    id=movie_id, status=BULK_FAILED, message=rejected[movie_id]
+                )
+            else:
+                requests_ids.append(movie_id)
+                requests.append(
+                    UpdateOne(
+                        {"id": movie_id},
+                        {
+                            "$set": {
+                                **parameters,
+                                **(
+                                    {"tokens_version": TOKENS_VERSION}
+                                    if movie_id in token_rows
+                                    else {}
+                                ),
+                                "updated_at": now,
+                            },
+                            "$inc": {"version": 1},
+                        },
+                    )
+                )
+
+        errors = await self._bulk_write(requests)
+        await self._replace_tokens(
+            {
+                movie_id: token_rows[movie_id]
+                for index, movie_id in enumerate(requests_ids)
+                if index not in errors and movie_id in token_rows
+            }
+        )
+        for index, movie_id in enumerate(requests_ids):
+            if index in errors:
+                results[movie_id] = BulkItemResult(
+                    id=movie_id, status=BULK_FAILED, message=errors[index]
+                )
+            else:
+                results[movie_id] = BulkItemResult(id=movie_id, status=BULK_UPDATED)
+
+        return [results[movie_id] for movie_id in update_parameters.keys()]
+
+    async def bulk_delete(self, movie_ids: List[str]) -> List[BulkItemResult]:
+        existing_ids = await self._existing_ids(movie_ids)
+        if existing_ids:
+            await self._movies.delete_many({"id": {"$in": list(existing_ids)}})
+            await self._tokens.delete_many({"movie_id": {"$in": list(existing_ids)}})
+        return [
+            BulkItemResult(id=movie_id, status=BULK_DELETED)
+            if movie_id in existing_ids
+            else BulkItemResult(id=movie_id, status=BULK_NOT_FOUND)
+            for movie_id in movie_ids
+        ]
@@ -0,0 +1,108 @@
+from typing import Optional
+
+from redis.asyncio import Redis
+
+from api.repository.auth.abstractions import AuthUserRepository
+from api.repository.auth.memory import MemoryAuthRepository
+from api.repository.auth.mongo import MongoAuthRepository
+from api.repository.movie.abstractions import MovieRepository
+from api.repository.movie.batching import BatchingMovieRepository
+from api.repository.movie.cached import CachedMovieRepository
+from api.repository.movie.memory import MemoryMovieRepository
+from api.repository.movie.mongo import MongoMovieRepository
+from api.repository.revocation.abstractions import TokenRevocationRepository
+from api.repository.revocation.memory import MemoryTokenRevocationRepository
+from api.repository.revocation.redis import RedisTokenRevocationRepository
+from api.settings.auth import settings_instance as auth_settings_instance
+from api.settings.movie import settings_instance as movie_settings_instance
+from api.settings.repository import Settings
+from api.utils.redis_client import create_redis_client
+
+
+class RepositoryRegistry:
+    """
+    Holds the application scoped repositories
+
+    Built once in the app lifespan and kept on app.state, so that request
+    dependencies only have to read an attribute.
+    """
+
+    def __init__(
+        self,
+        *,
+        movies: MovieRepository,
+        auth: AuthUserRepository,
+        revocations: TokenRevocationRepository,
+        redis: Optional[Redis] = None,
+    ):
+        self.movies = movies
+        self.auth = auth
+        self.revocations = revocations
+        self.redis = redis
+
+    @classmethod
+    def memory(cls) -> "RepositoryRegistry":
+        return cls(
+            movies=MemoryMovieRepository(),
+            auth=MemoryAuthRepository(),
+            revocations=MemoryTokenRevocationRepository(),
+        )
+
+    @classmethod
+    def mongo(cls) -> "RepositoryRegistry":
+        movie_settings = movie_settings_instance()
+        auth_settings = auth_settings_instance()
+        # One pooled async Redis client per worker, shared by every request
+        redis = create_redis_client(auth_settings)
+        return cls(
+            movies=MongoMovieRepository(
+                connection_string=movie_settings.mongo_connection_string,
+                database=movie_settings.mongo_database_name,
+            ),
+            auth=MongoAuthRepository(
+                connection_string=auth_settings.mongo_connection_string,
+                database=auth_settings.mongo_database_name,
+            ),
+            revocations=RedisTokenRevocationRepository(redis),
+            redis=redis,
+        )
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "RepositoryRegistry":
+        if settings.repository_backend == "memory":
+            registry = cls.memory()
+        else:
+            registry = cls.mongo()
+
+        # Batching sits under the cache, so only cache misses wait for a batch
+        if settings.movie_batching_enabled:
+            registry.movies = BatchingMovieRepository(
+                registry.movies,
+                window=settings.movie_batch_window_ms / 1000,
+                max_size=settings.movie_batch_max_size,
+            )
+        if settings.movie_cache_enabled:
+            registry.movies = CachedMovieRepository(
+                registry.movies,
+                maxsize=settings.movie_cache_size,
+                ttl=settings.movie_cache_ttl,
+                redis=registry.redis if settings.movie_cache_redis_enabled else None,
+                redis_ttl=settings.movie_cache_redis_ttl,
+                redis_tombstone_ttl=settings.movie_cache_redis_tombstone_ttl,
+            )
+        return registry
+
+    async def initialize(self) -> dict:
+        """
+        Initializes every repository and returns their reports
+
+        Raises RepositoryException if a backend is not usable
+        """
+        return {
+            "movies": await self.movies.initialize(),
+            "auth": await self.auth.initialize(),
+        }
+
+    async def close(self):
+        if self.redis is not None:
+            await self.redis.close(close_connection_pool=True)
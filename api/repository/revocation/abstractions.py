@@ -0,0 +1,25 @@
+import abc
+from typing import Dict
+
+
+class TokenRevocationRepository(abc.ABC):
+    async def revoke(self, token: str, expires_at: int):
+        """
+        Revokes a token until its expiry, given as a unix timestamp
+
+        """
+        return NotImplementedError
+
+    async def revoke_many(self, tokens: Dict[str, int]):
+        """
+        Revokes many tokens at once, tokens maps a token to its expiry
+
+        """
+        return NotImplementedError
+
+    async def is_revoked(self, token: str) -> bool:
+        """
+        Returns True if the token has been revoked and has not expired yet
+
+        """
+        return NotImplementedError
@@ -0,0 +1,36 @@
+import time
+from typing import Dict
+
+from api.repository.revocation.abstractions import TokenRevocationRepository
+from api.utils.auth import token_digest
+
+
+class MemoryTokenRevocationRepository(TokenRevocationRepository):
+    """
+
+    MemoryTokenRevocationRepository is a repository pattern implementation that stores revoked tokens in memory.
+
+    """
+
+    def __init__(self):
+        # Token digest -> expiry of the revocation
+        self._storage: Dict[str, int] = {}
+
+    async def revoke(self, token: str, expires_at: int):
+        await self.revoke_many({token: expires_at})
+
+    async def revoke_many(self, tokens: Dict[str, int]):
+        now = time.time()
+        for token, expires_at in tokens.items():
+            if expires_at > now:
+                self._storage[token_digest(token)] = expires_at
+
+    async def is_revoked(self, token: str) -> bool:
+        digest = token_digest(token)
+        expires_at = self._storage.get(digest)
+        if expires_at is None:
+            return False
+        if expires_at <= time.time():
+            del self._storage[digest]
+            return False
+        return True
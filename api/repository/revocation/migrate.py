@@ -0,0 +1,63 @@
+import asyncio
+import time
+
+from jose import JWTError, jwt
+from redis.asyncio import Redis
+
+from api.repository.revocation.abstractions import TokenRevocationRepository
+from api.repository.revocation.redis import RedisTokenRevocationRepository
+from api.settings.auth import settings_instance
+from api.utils.redis_client import create_redis_client
+
+LEGACY_BLACKLIST_KEY = "token_blacklist"
+
+
+async def drain_legacy_blacklist(
+    client: Redis,
+    repo: TokenRevocationRepository,
+    legacy_key: str = LEGACY_BLACKLIST_KEY,
+    batch_size: int = 500,
+) -> int:
+    """
+    Moves the tokens of the legacy blacklist set into the revocation repository
+
+    Tokens are only removed from the set once they are stored in the repository,
+    so the migration can be interrupted and run again. Expired or undecodable
+    tokens are dropped. Returns the number of tokens still revoked afterwards.
+    """
+
+    migrated = 0
+    while True:
+        members = await client.srandmember(legacy_key, batch_size)
+        if not members:
+            return migrated
+
+        now = time.time()
+        tokens = {}
+        for member in members:
+            token = member.decode() if isinstance(member, bytes) else member
+            try:
+                expiry = jwt.get_unverified_claims(token).get("exp")
+            except JWTError:
+                continue
+            if expiry is not None and expiry > now:
+                tokens[token] = int(expiry)
+
+        await repo.revoke_many(tokens)
+        await client.srem(legacy_key, *members)
+        migrated += len(tokens)
+
+
+async def main():
+    client = create_redis_client(settings_instance())
+    try:
+        migrated = await drain_legacy_blacklist(
+            client, RedisTokenRevocationRepository(client)
+        )
+        print(f"Migrated {migrated} revoked tokens")
+    finally:
+        await client.close(close_connection_pool=True)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
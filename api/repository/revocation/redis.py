@@ -0,0 +1,42 @@
+import time
+from typing import Dict
+
+from redis.asyncio import Redis
+
+from api.repository.revocation.abstractions import TokenRevocationRepository
+from api.utils.auth import token_digest
+
+REVOKED_TOKEN_KEY_PREFIX = "token_revoked:"
+
+
+class RedisTokenRevocationRepository(TokenRevocationRepository):
+    """
+    RedisTokenRevocationRepository is a repository pattern implementation that stores revoked tokens in Redis.
+
+    Every revoked token gets its own key which expires together with the token,
+    so a lookup is a single EXISTS and the keyspace never outgrows the live tokens.
+
+    """
+
+    def __init__(self, client: Redis, key_prefix: str = REVOKED_TOKEN_KEY_PREFIX):
+        self._client = client
+        self._key_prefix = key_prefix
+
+    def _key(self, token: str) -> str:
+        return f"{self._key_prefix}{token_digest(token)}"
+
+    async def revoke(self, token: str, expires_at: int):
+        await self.revoke_many({token: expires_at})
+
+    async def revoke_many(self, tokens: Dict[str, int]):
+        now = int(time.time())
+        async with self._client.pipeline(transaction=False) as pipe:
+            for token, expires_at in tokens.items():
+                ttl = int(expires_at) - now
+                # Already expired tokens are rejected on decode anyway
+                if ttl > 0:
+                    pipe.set(self._key(token), 1, ex=ttl)
+            await pipe.execute()
+
+    async def is_revoked(self, token: str) -> bool:
+        return await self._client.exists(self._key(token)) > 0
@@ -4,10 +4,6 @@ from pydantic import BaseSettings, Field
 
 
 class Settings(BaseSettings):
-    
-    def __hash__(self) -> int:
-        return 1
-
     # MongoDB Settings
     mongo_connection_string: str = Field(
         "mongodb://127.0.0.1:27017",
@@ -45,6 +41,58 @@ class Settings(BaseSettings):
         env="REDIS_DB",
     )
 
+    redis_max_connections: int = Field(
+        50,
+        title="Redis Max Connections",
+        description="The size of the redis connection pool shared by a worker",
+        env="REDIS_MAX_CONNECTIONS",
+    )
+
+    redis_pool_timeout: float = Field(
+        5.0,
+        title="Redis Pool Timeout",
+        description="Seconds to wait for a free pooled connection before failing",
+        env="REDIS_POOL_TIMEOUT",
+    )
+
+    # Password Hashing Settings
+    bcrypt_rounds: int = Field(
+        12,
+        title="Bcrypt Rounds",
+        description="The bcrypt cost factor used for new password hashes",
+        env="BCRYPT_ROUNDS",
+    )
+
+    password_hash_workers: int = Field(
+        4,
+        title="Password Hash Workers",
+        description="How many password hashes may run at the same time",
+        env="PASSWORD_HASH_WORKERS",
+    )
+
+    # Principal Cache Settings
+    principal_cache_size: int = Field(
+        10000,
+        title="Principal Cache Size",
+        description="How many known usernames the auth middleware keeps in memory",
+        env="PRINCIPAL_CACHE_SIZE",
+    )
+
+    principal_cache_ttl: float = Field(
+        60.0,
+        title="Principal Cache TTL",
+        description="Seconds a username is trusted before it is checked again",
+        env="PRINCIPAL_CACHE_TTL",
+    )
+
+    # Token Cache Settings
+    token_cache_size: int = Field(
+        10000,
+        title="Token Cache Size",
+        description="How many verified token payloads are kept until their expiry",
+        env="TOKEN_CACHE_SIZE",
+    )
+
     class Config:
         env_file = ".env"
 
@@ -68,4 +116,13 @@ class JWTSettings(BaseSettings):
 
     @classmethod
     def get_settings(cls):
-        return cls()
+        # Read once, building the settings parses the .env file again
+        return jwt_settings_instance()
+
+
+@lru_cache()
+def jwt_settings_instance() -> JWTSettings:
+    """
+    Creates a singleton instance of the JWT Settings
+    """
+    return JWTSettings()
@@ -0,0 +1,53 @@
+from functools import lru_cache
+from typing import Optional
+
+from pydantic import BaseSettings, Field
+
+
+class Settings(BaseSettings):
+    # MongoDB Connection Pool Settings
+    mongo_max_pool_size: int = Field(
+        100,
+        title="MongoDB Max Pool Size",
+        description="The maximum number of connections the worker keeps to MongoDB",
+        env="MONGODB_MAX_POOL_SIZE",
+    )
+
+    mongo_min_pool_size: int = Field(
+        0,
+        title="MongoDB Min Pool Size",
+        description="The number of connections kept open even when idle",
+        env="MONGODB_MIN_POOL_SIZE",
+    )
+
+    mongo_max_idle_time_ms: Optional[int] = Field(
+        None,
+        title="MongoDB Max Idle Time",
+        description="Milliseconds an idle pooled connection is kept before closing",
+        env="MONGODB_MAX_IDLE_TIME_MS",
+    )
+
+    mongo_server_selection_timeout_ms: int = Field(
+        5000,
+        title="MongoDB Server Selection Timeout",
+        description="Milliseconds to wait for a usable server before failing",
+        env="MONGODB_SERVER_SELECTION_TIMEOUT_MS",
+    )
+
+    mongo_compressors: str = Field(
+        "",
+        title="MongoDB Compressors",
+        description="Comma separated wire compressors to negotiate, e.g. zstd,zlib",
+        env="MONGODB_COMPRESSORS",
+    )
+
+    class Config:
+        env_file = ".env"
+
+
+@lru_cache()
+def settings_instance():
+    """
+    Creates a singleton instance of Fast API Settings Dependency
+    """
+    return Settings()
@@ -5,9 +5,6 @@ from pydantic import BaseSettings, Field
 
 class Settings(BaseSettings):
     # MongoDB Settings
-    def __hash__(self) -> int:
-        return 1
-
     mongo_connection_string: str
     mongo_database_name: str
 
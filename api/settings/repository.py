@@ -0,0 +1,91 @@
+from functools import lru_cache
+
+from pydantic import BaseSettings, Field
+
+
+class Settings(BaseSettings):
+    # Repository Backend Settings
+    repository_backend: str = Field(
+        "mongo",
+        title="Repository Backend",
+        description="mongo for MongoDB and Redis, memory for in-process storage",
+        env="REPOSITORY_BACKEND",
+        regex="^(mongo|memory)$",
+    )
+
+    # Movie Cache Settings
+    movie_cache_enabled: bool = Field(
+        False,
+        title="Movie Cache Enabled",
+        description="Serve movies by id through an in-process read-through cache",
+        env="MOVIE_CACHE_ENABLED",
+    )
+
+    movie_cache_size: int = Field(
+        10000,
+        title="Movie Cache Size",
+        description="How many movies each worker keeps in memory",
+        env="MOVIE_CACHE_SIZE",
+    )
+
+    movie_cache_ttl: float = Field(
+        30.0,
+        title="Movie Cache TTL",
+        description="Seconds a movie is kept in memory, bounds staleness across workers",
+        env="MOVIE_CACHE_TTL",
+    )
+
+    movie_cache_redis_enabled: bool = Field(
+        False,
+        title="Movie Cache Redis Enabled",
+        description="Share cached movies between workers through Redis",
+        env="MOVIE_CACHE_REDIS_ENABLED",
+    )
+
+    movie_cache_redis_ttl: int = Field(
+        300,
+        title="Movie Cache Redis TTL",
+        description="Seconds a movie is kept in Redis",
+        env="MOVIE_CACHE_REDIS_TTL",
+    )
+
+    movie_cache_redis_tombstone_ttl: int = Field(
+        5,
+        title="Movie Cache Redis Tombstone TTL",
+        description="Seconds Redis refuses to cache a movie after a write, must "
+        "exceed the slowest movie read",
+        env="MOVIE_CACHE_REDIS_TOMBSTONE_TTL",
+    )
+
+    # Movie Batching Settings
+    movie_batching_enabled: bool = Field(
+        False,
+        title="Movie Batching Enabled",
+        description="Whether concurrent movie reads by id are merged into one query",
+        env="MOVIE_BATCHING_ENABLED",
+    )
+
+    movie_batch_window_ms: float = Field(
+        1.0,
+        title="Movie Batch Window",
+        description="Milliseconds a read by id waits for others to join its batch",
+        env="MOVIE_BATCH_WINDOW_MS",
+    )
+
+    movie_batch_max_size: int = Field(
+        1000,
+        title="Movie Batch Max Size",
+        description="Distinct ids after which a batch is sent without waiting",
+        env="MOVIE_BATCH_MAX_SIZE",
+    )
+
+    class Config:
+        env_file = ".env"
+
+
+@lru_cache()
+def settings_instance():
+    """
+    Creates a singleton instance of Fast API Settings Dependency
+    """
+    return Settings()
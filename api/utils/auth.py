@@ -1,8 +1,31 @@
-from jose import jwt
-from api.settings.auth import JWTSettings
+import hashlib
+import time
+from functools import lru_cache
+from jose import jwk, jwt
+from jose.backends.base import Key
+from api.settings.auth import JWTSettings, settings_instance
+from api.utils.cache import TTLCache
 from datetime import datetime, timedelta
 
 
+@lru_cache()
+def signing_key() -> Key:
+    """
+    Builds the key material from the settings once
+    """
+    jwtsettings = JWTSettings.get_settings()
+    return jwk.construct(jwtsettings.SECRET_KEY, jwtsettings.ALGORITHM)
+
+
+@lru_cache()
+def token_cache() -> TTLCache:
+    """
+    Creates a singleton cache of verified token payloads, keyed by token digest
+    """
+    # Entries are always stored with the lifetime left on their token
+    return TTLCache(maxsize=settings_instance().token_cache_size, ttl=0)
+
+
 def create_access_token(username: str) -> str:
     """
     Create an access token for the user
@@ -18,7 +41,7 @@ def create_access_token(username: str) -> str:
     payload = {"sub": username, "exp": exipry}
 
     # Creating the token
-    access_token = jwt.encode(payload, jwtsettings.SECRET_KEY, jwtsettings.ALGORITHM)
+    access_token = jwt.encode(payload, signing_key(), jwtsettings.ALGORITHM)
 
     # Returning the token
     return access_token
@@ -39,7 +62,7 @@ def create_refresh_token(username: str) -> str:
     payload = {"sub": username, "exp": exipry}
 
     # Creating the token
-    refresh_token = jwt.encode(payload, jwtsettings.SECRET_KEY, jwtsettings.ALGORITHM)
+    refresh_token = jwt.encode(payload, signing_key(), jwtsettings.ALGORITHM)
 
     # Returning the token
     return refresh_token
@@ -48,13 +71,36 @@ def create_refresh_token(username: str) -> str:
 def decode_token(token: str) -> dict:
     """
     Decode the access token
+
+    Verified payloads are cached until the token expires, so a token is only
+    checked once per process
     """
 
+    cache = token_cache()
+    digest = token_digest(token)
+    payload = cache.get(digest)
+    if payload is not None:
+        # Callers get their own copy of the cached claims
+        return dict(payload)
+
     # Getting the secret key and algorithm from the settings
     jwtsettings = JWTSettings.get_settings()
 
     # Decoding the token
-    payload = jwt.decode(token, jwtsettings.SECRET_KEY, jwtsettings.ALGORITHM)
+    payload = jwt.decode(token, signing_key(), jwtsettings.ALGORITHM)
+
+    # Caching the payload until the token expires
+    expiry = payload.get("exp")
+    if isinstance(expiry, (int, float)) and expiry > time.time():
+        cache.set(digest, dict(payload), ttl=expiry - time.time())
 
     # Returning the payload
     return payload
+
+
+def token_digest(token: str) -> str:
+    """
+    Hash a token so it can be stored or used as a key without keeping it around
+    """
+
+    return hashlib.sha256(token.encode()).hexdigest()
@@ -0,0 +1,61 @@
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Hashable, Optional
+
+from api.settings.auth import settings_instance
+
+
+class TTLCache:
+    """
+    Bounded in-process LRU cache whose entries expire after a time to live
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._maxsize = maxsize
+        self._ttl = ttl
+        # key -> (monotonic expiry, value), least recently used first
+        self._entries: OrderedDict = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            return default
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return default
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """
+        Stores a value, ttl overrides the cache wide time to live
+        """
+        if self._maxsize <= 0:
+            return
+        ttl = self._ttl if ttl is None else ttl
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._maxsize:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key: Hashable):
+        self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+
+
+@lru_cache()
+def principal_cache() -> TTLCache:
+    """
+    Creates a singleton cache of the usernames known to exist
+    """
+    settings = settings_instance()
+    return TTLCache(
+        maxsize=settings.principal_cache_size, ttl=settings.principal_cache_ttl
+    )
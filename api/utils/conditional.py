@@ -0,0 +1,72 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Dict, Iterable, Optional
+
+from api.entities.movie import Movie
+
+
+def movies_etag(movies: Iterable[Movie]) -> str:
+    """
+    Strong entity tag of a representation made of the given movies, in order
+
+    Every write bumps a movie version, so the tag changes whenever the body would
+    """
+
+    digest = hashlib.sha1()
+    for movie in movies:
+        updated_at = movie.updated_at.isoformat() if movie.updated_at else ""
+        digest.update(f"{movie.id}:{movie.version}:{updated_at}\n".encode())
+    return f'"{digest.hexdigest()}"'
+
+
+def http_date(value: datetime) -> str:
+    """
+    Format a naive UTC datetime as an HTTP date
+    """
+
+    return format_datetime(value.replace(tzinfo=timezone.utc), usegmt=True)
+
+
+def conditional_headers(etag: str, last_modified: Optional[datetime]) -> Dict[str, str]:
+    """
+    Validator headers sent with both 200 and 304 responses
+    """
+
+    headers = {"ETag": etag}
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(last_modified)
+    return headers
+
+
+def is_not_modified(
+    etag: str,
+    last_modified: Optional[datetime],
+    if_none_match: Optional[str],
+    if_modified_since: Optional[str],
+) -> bool:
+    """
+    Evaluate If-None-Match, or If-Modified-Since when it is absent, as in RFC 9110
+    """
+
+    if if_none_match is not None:
+        for tag in if_none_match.split(","):
+            tag = tag.strip()
+            # If-None-Match uses the weak comparison
+            if tag.startswith("W/"):
+                tag = tag[2:]
+            if tag == "*" or tag == etag:
+                return True
+        return False
+
+    if if_modified_since is None or last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    # HTTP dates have a one second resolution
+    modified = last_modified.replace(microsecond=0, tzinfo=timezone.utc)
+    return modified <= since
@@ -0,0 +1,21 @@
+from prometheus_client import Counter, Gauge, Histogram
+
+# Exported on /metrics together with the starlette_prometheus request metrics
+CACHE_REQUESTS = Counter(
+    "cache_requests_total",
+    "Total count of in-process cache lookups by cache and result.",
+    ["cache", "result"],
+)
+PASSWORD_HASH_QUEUE_DEPTH = Gauge(
+    "password_hash_queue_depth",
+    "Gauge of password hash and verify calls waiting for a free worker",
+)
+PASSWORD_HASH_IN_PROGRESS = Gauge(
+    "password_hash_in_progress",
+    "Gauge of password hash and verify calls currently running",
+)
+MOVIE_BATCH_SIZE = Histogram(
+    "movie_get_by_id_batch_size",
+    "Histogram of the distinct movie ids read per batched get_by_id query",
+    buckets=(1, 2, 5, 10, 25, 50, 100, 250, 500, 1000),
+)
@@ -0,0 +1,29 @@
+import base64
+import binascii
+import json
+from typing import Any
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(value: Any) -> str:
+    """
+    Encode the last seen sort key into an opaque, url safe cursor
+    """
+
+    raw = json.dumps(value, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Any:
+    """
+    Decode a cursor created by encode_cursor
+
+    Raises ValueError if the cursor is malformed
+    """
+
+    padded = cursor + "=" * (-len(cursor) % 4)
+    try:
+        return json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, UnicodeDecodeError, json.JSONDecodeError) as e:
+        raise ValueError("Invalid cursor") from e
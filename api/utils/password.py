@@ -0,0 +1,60 @@
+import asyncio
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
+
+from passlib.context import CryptContext
+
+from api.settings.auth import settings_instance
+from api.utils.metrics import PASSWORD_HASH_IN_PROGRESS, PASSWORD_HASH_QUEUE_DEPTH
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt hashing and verification on a bounded thread pool
+
+    bcrypt releases the GIL while it works, so the event loop keeps serving
+    other requests and at most max_workers hashes run at the same time. Calls
+    beyond that wait in the pool queue, whose depth is exported as a metric.
+    """
+
+    def __init__(self, rounds: int = 12, max_workers: int = 4):
+        self._pwd_context = CryptContext(schemes=["bcrypt"], bcrypt__rounds=rounds)
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="password-hasher"
+        )
+
+    @staticmethod
+    def _run(function, *args):
+        PASSWORD_HASH_QUEUE_DEPTH.dec()
+        with PASSWORD_HASH_IN_PROGRESS.track_inprogress():
+            return function(*args)
+
+    @staticmethod
+    def _forget_cancelled(job: Future):
+        # A job cancelled while queued never runs, so never leaves the queue
+        if job.cancelled():
+            PASSWORD_HASH_QUEUE_DEPTH.dec()
+
+    async def _submit(self, function, *args):
+        PASSWORD_HASH_QUEUE_DEPTH.inc()
+        job = self._executor.submit(self._run, function, *args)
+        job.add_done_callback(self._forget_cancelled)
+        # Cancelling the awaiting request cancels the job if it has not started
+        return await asyncio.wrap_future(job)
+
+    async def hash(self, password: str) -> str:
+        return await self._submit(self._pwd_context.hash, password)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        return await self._submit(self._pwd_context.verify, password, hashed_password)
+
+
+@lru_cache()
+def password_hasher() -> PasswordHasher:
+    """
+    Creates a singleton instance of the Password Hasher
+    """
+    settings = settings_instance()
+    return PasswordHasher(
+        rounds=settings.bcrypt_rounds, max_workers=settings.password_hash_workers
+    )
@@ -0,0 +1,20 @@
+from redis.asyncio import BlockingConnectionPool, Redis
+
+from api.settings.auth import Settings
+
+
+def create_redis_client(settings: Settings) -> Redis:
+    """
+    Create an async Redis client backed by a size bounded connection pool
+    """
+
+    # Waits for a free connection once the pool is exhausted instead of
+    # opening an unbounded number of connections
+    pool = BlockingConnectionPool(
+        host=settings.redis_host,
+        port=settings.redis_port,
+        db=settings.redis_db,
+        max_connections=settings.redis_max_connections,
+        timeout=settings.redis_pool_timeout,
+    )
+    return Redis(connection_pool=pool)
@@ -0,0 +1,28 @@
+import re
+from typing import Dict, List
+
+# A title token counts this many times a description one when ranking
+TITLE_WEIGHT = 10
+
+_TOKEN = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lowercase word tokens
+    """
+
+    return _TOKEN.findall(text.lower())
+
+
+def token_weights(title: str, description: str) -> Dict[str, int]:
+    """
+    Weight of every token of a movie, title occurrences weigh TITLE_WEIGHT
+    """
+
+    weights: Dict[str, int] = {}
+    for token in tokenize(title):
+        weights[token] = weights.get(token, 0) + TITLE_WEIGHT
+    for token in tokenize(description):
+        weights[token] = weights.get(token, 0) + 1
+    return weights
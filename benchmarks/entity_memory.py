@@ -0,0 +1,85 @@
+"""
+Measures the per-entity footprint of Movie and AuthUser
+
+    python -m benchmarks.entity_memory [count]
+
+The slotted entities are compared with equivalent classes keeping their
+attributes in a per-instance __dict__, as the entities did before. Field values
+are shared between instances so only the entity objects themselves are counted.
+"""
+import sys
+import tracemalloc
+from datetime import datetime
+
+from api.entities.auth import AuthUser
+from api.entities.movie import Movie
+
+
+class DictMovie:
+    def __init__(self, **fields):
+        for name, value in fields.items():
+            setattr(self, f"_{name}", value)
+
+
+class DictAuthUser:
+    def __init__(self, **fields):
+        for name, value in fields.items():
+            setattr(self, f"_{name}", value)
+
+
+MOVIE_FIELDS = {
+    "movie_id": "my_id",
+    "title": "my_title",
+    "description": "my_description",
+    "released_year": 2020,
+    "watched": False,
+    "version": 1,
+    "updated_at": datetime(2023, 5, 1),
+}
+DICT_MOVIE_FIELDS = {
+    ("id" if name == "movie_id" else name): value
+    for name, value in MOVIE_FIELDS.items()
+}
+AUTH_USER_FIELDS = {
+    "user_id": "my_id",
+    "username": "my_username",
+    "password": "my_hash",
+}
+
+
+def bytes_per_entity(factory, count: int) -> float:
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    entities = [factory() for _ in range(count)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    # The list itself holds one pointer per entity
+    return (after - before) / len(entities) - 8
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+
+    print(f"{count} entities each, bytes per entity")
+    for name, before, after in (
+        (
+            "Movie",
+            lambda: DictMovie(**DICT_MOVIE_FIELDS),
+            lambda: Movie(**MOVIE_FIELDS),
+        ),
+        (
+            "AuthUser",
+            lambda: DictAuthUser(**AUTH_USER_FIELDS),
+            lambda: AuthUser(**AUTH_USER_FIELDS),
+        ),
+    ):
+        dict_size = bytes_per_entity(before, count)
+        slots_size = bytes_per_entity(after, count)
+        print(
+            f"{name:>9}: __dict__ {dict_size:.0f}, __slots__ {slots_size:.0f}"
+            f" ({1 - slots_size / dict_size:.0%} smaller)"
+        )
+
+
+if __name__ == "__main__":
+    main()
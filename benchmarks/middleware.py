@@ -0,0 +1,147 @@
+"""
+Requests per second through create_app() with the ASGI middleware stack,
+against the same app running BaseHTTPMiddleware based equivalents
+
+    python -m benchmarks.middleware [requests]
+
+Requests are sent straight to the ASGI app, without a server, so the numbers
+isolate the framework and middleware cost. The baseline stack runs
+starlette_prometheus' PrometheusMiddleware and the same authentication wrapped
+in a BaseHTTPMiddleware, as the app did before.
+"""
+import asyncio
+import os
+import secrets
+import sys
+import time
+
+os.environ.setdefault("SECRET_KEY", secrets.token_hex(16))
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "15")
+os.environ.setdefault("REFRESH_TOKEN_EXPIRE_MINUTES", "60")
+
+from http import HTTPStatus
+
+from starlette.middleware import Middleware
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.responses import JSONResponse
+from starlette_prometheus import PrometheusMiddleware as BasePrometheusMiddleware
+
+from api.api import create_app
+from api.entities.auth import AuthUser
+from api.middleware.middleware import AuthenticatedMiddleware, middleware
+from api.repository.registry import RepositoryRegistry
+from api.utils.auth import create_access_token
+
+
+class BaseHTTPAuthenticatedMiddleware(BaseHTTPMiddleware):
+    def __init__(self, app):
+        super().__init__(app)
+        self.authenticated = AuthenticatedMiddleware(app)
+
+    async def dispatch(self, request, call_next):
+        if self.authenticated.protected_routes.matches(
+            request.method, request.url.path
+        ):
+            error = await self.authenticated.authenticate(request.scope)
+            if error is not None:
+                return JSONResponse(
+                    status_code=HTTPStatus.UNAUTHORIZED, content={"message": error}
+                )
+        return await call_next(request)
+
+
+BASELINE_MIDDLEWARE = [
+    middleware[0],
+    Middleware(BasePrometheusMiddleware),
+    Middleware(BaseHTTPAuthenticatedMiddleware),
+]
+
+
+async def request(app, method: str, path: str, headers=()):
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"host", b"bench")] + list(headers),
+        "client": ("127.0.0.1", 1234),
+        "server": ("bench", 80),
+    }
+
+    request_sent = False
+    response_complete = asyncio.Event()
+    status = None
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        # Like a server, reporting the disconnect once the response is sent
+        await response_complete.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body" and not message.get(
+            "more_body", False
+        ):
+            response_complete.set()
+
+    await app(scope, receive, send)
+    return status
+
+
+async def requests_per_second(app, count: int, method: str, path: str, headers):
+    # Warming up the middleware stack and the caches
+    for _ in range(100):
+        await request(app, method, path, headers)
+    start = time.perf_counter()
+    for _ in range(count):
+        await request(app, method, path, headers)
+    return count / (time.perf_counter() - start)
+
+
+async def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+
+    repositories = RepositoryRegistry.memory()
+    await repositories.auth.create(
+        AuthUser(user_id="bench", username="bench", password="bench_password")
+    )
+    token = create_access_token("bench")
+    authorization = [(b"authorization", f"Bearer {token}".encode())]
+
+    cases = [
+        ("unprotected GET /openapi.json", "GET", "/openapi.json", []),
+        ("protected GET /api/v1/movies/{id}", "GET", "/api/v1/movies/x", authorization),
+    ]
+    apps = {}
+    for name, stack in (("BaseHTTPMiddleware", BASELINE_MIDDLEWARE), ("ASGI", None)):
+        app = create_app(repositories=repositories)
+        if stack is not None:
+            app.user_middleware = list(stack)
+        apps[name] = app
+
+    print(f"{count} requests per case, requests per second")
+    for case, method, path, headers in cases:
+        results = {}
+        for name, app in apps.items():
+            results[name] = await requests_per_second(app, count, method, path, headers)
+        baseline, asgi = results["BaseHTTPMiddleware"], results["ASGI"]
+        print(
+            f"{case}: BaseHTTPMiddleware {baseline:.0f}, ASGI {asgi:.0f}"
+            f" ({asgi / baseline - 1:+.0%})"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,71 @@
+"""
+Compares the movie list serialization paths of get_movie_by_title
+
+    python -m benchmarks.serialization [page size] [repeat]
+
+The model path builds MovieResponse objects, validates them against
+list[MovieResponse] and renders them through jsonable_encoder and JSONResponse,
+as FastAPI does for a response_model. The orjson path renders the payloads
+straight into an ORJSONResponse.
+"""
+import sys
+import timeit
+import uuid
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+from pydantic import parse_obj_as
+
+from api.dto.movie import MovieResponse
+from api.entities.movie import Movie
+from api.handlers.movie_v1 import movie_payload
+
+
+def make_movies(count: int):
+    return [
+        Movie(
+            movie_id=str(uuid.uuid4()),
+            title="my_title",
+            description="my_description",
+            released_year=2020,
+            watched=index % 2 == 0,
+        )
+        for index in range(count)
+    ]
+
+
+def model_path(movies) -> bytes:
+    models = [
+        MovieResponse(
+            id=movie.id,
+            title=movie.title,
+            description=movie.description,
+            released_year=movie.released_year,
+            watched=movie.watched,
+        )
+        for movie in movies
+    ]
+    validated = parse_obj_as(list[MovieResponse], models)
+    return JSONResponse(content=jsonable_encoder(validated)).body
+
+
+def orjson_path(movies) -> bytes:
+    return ORJSONResponse(content=[movie_payload(movie) for movie in movies]).body
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    movies = make_movies(count)
+
+    print(f"{count} movies per page, best of 5 x {repeat} renders")
+    timings = {}
+    for name, path in (("model", model_path), ("orjson", orjson_path)):
+        best = min(timeit.repeat(lambda: path(movies), number=repeat, repeat=5))
+        timings[name] = best / repeat
+        print(f"{name:>8}: {timings[name] * 1000:.3f} ms per page")
+    print(f" speedup: {timings['model'] / timings['orjson']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()